@@ -0,0 +1,190 @@
+"""
+Local stand-in for Google Maps, for offline benchmarks.
+
+Serves a minimal Maps-like page (search box + `[role="feed"]` list) that
+loads results the way Google does: one `/search?tbm=map&...&pb=!8i<offset>`
+XHR per 20 places, the next one when the feed is scrolled to the bottom, and
+a 64px end-of-list marker once a page comes back empty. The XHR bodies are
+replayed from benchmarks/fixtures.py, optionally with added latency.
+
+The scraper only talks to https://www.google.com, so the benchmarks route
+those requests here (see `route_google`).
+
+Usage:
+    uv run python -m benchmarks.fake_maps --port 8765 --pages 6
+    # open http://localhost:8765/maps/search/dentist+kyiv/
+"""
+
+import argparse
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fixtures import PAGE_SIZE, load_payloads
+
+EMPTY_PAYLOAD = '{"c":0,"d":")]}\'\\n[[null,[null]]]"}/*""*/'
+
+OFFSET_PATTERN = re.compile(r"!8i(\d+)")
+
+PAGE_HTML = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Google Maps</title></head>
+<body style="margin:0;font-family:sans-serif">
+<input id="searchboxinput" name="q" aria-label="Search Google Maps" style="width:400px">
+<div role="feed" style="height:900px;width:400px;overflow-y:auto"></div>
+<script>
+(function() {
+  const PAGE_SIZE = %(page_size)d;
+  const feed = document.querySelector('[role="feed"]');
+  const input = document.getElementById('searchboxinput');
+  let query = '', offset = 0, loading = false, done = false;
+
+  function entries(text) {
+    const wrapper = JSON.parse(text.replace('/*""*/', ''));
+    const list = JSON.parse(wrapper.d.replace(")]}'", ''))[0][1] || [];
+    return list.slice(1);
+  }
+
+  function load() {
+    if (!query || loading || done) return;
+    loading = true;
+    const xhr = new XMLHttpRequest();
+    xhr.open('GET', `/search?tbm=map&q=${encodeURIComponent(query)}&pb=!7i${PAGE_SIZE}!8i${offset}`);
+    xhr.onload = () => {
+      const places = entries(xhr.responseText);
+      for (const place of places) {
+        const item = document.createElement('div');
+        item.style.height = '120px';
+        item.textContent = place?.[1]?.[11] || '';
+        feed.appendChild(item);
+      }
+      offset += places.length;
+      loading = false;
+      if (!places.length) {
+        done = true;
+        const end = document.createElement('div');
+        end.setAttribute('style', 'height: 64px');
+        feed.appendChild(end);
+      }
+    };
+    xhr.send();
+  }
+
+  function search(text) {
+    query = text;
+    offset = 0;
+    done = false;
+    feed.innerHTML = '';
+    load();
+  }
+
+  feed.addEventListener('scroll', () => {
+    if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 200) load();
+  });
+  input.addEventListener('keydown', event => {
+    if (event.key !== 'Enter') return;
+    history.pushState(null, '', `/maps/search/${encodeURIComponent(input.value).replace(/%%20/g, '+')}/`);
+    search(input.value);
+  });
+
+  const match = location.pathname.match(/\\/maps\\/search\\/([^/]+)/);
+  if (match) search(decodeURIComponent(match[1].replace(/\\+/g, ' ')));
+})();
+</script>
+</body>
+</html>
+"""
+
+
+class FakeMapsServer:
+  """Threaded HTTP server replaying `pages` result pages for every search."""
+
+  def __init__(self, pages: int = 6, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+    self.payloads = load_payloads(pages)
+    self.latency = latency
+    self.search_requests = 0
+    self._lock = threading.Lock()
+    self._httpd = ThreadingHTTPServer((host, port), self._handler())
+    self._httpd.daemon_threads = True
+    self._thread: threading.Thread | None = None
+
+  @property
+  def url(self) -> str:
+    host, port = self._httpd.server_address[:2]
+    return f"http://{host}:{port}"
+
+  def payload(self, offset: int) -> str:
+    page = offset // PAGE_SIZE
+    return self.payloads[page] if page < len(self.payloads) else EMPTY_PAYLOAD
+
+  def _handler(self):
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(self):
+        parsed = urllib.parse.urlsplit(self.path)
+        if parsed.path == "/search" and "tbm=map" in parsed.query:
+          with server._lock:
+            server.search_requests += 1
+          if server.latency:
+            time.sleep(server.latency)
+          match = OFFSET_PATTERN.search(urllib.parse.unquote(parsed.query))
+          self._send(server.payload(int(match.group(1)) if match else 0), "application/json; charset=UTF-8")
+        elif parsed.path.startswith("/maps"):
+          self._send(PAGE_HTML % {"page_size": PAGE_SIZE}, "text/html; charset=utf-8")
+        else:
+          self.send_error(404)
+
+      def _send(self, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+      def log_message(self, format, *args):
+        pass
+
+    return Handler
+
+  def start(self) -> "FakeMapsServer":
+    self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self._httpd.shutdown()
+    self._httpd.server_close()
+
+
+def route_google(context, base_url: str):
+  """Serve every https://www.google.com request of a Playwright context from the fake server."""
+
+  def handle(route):
+    parsed = urllib.parse.urlsplit(route.request.url)
+    target = f"{base_url}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+    route.fulfill(response=route.fetch(url=target))
+
+  context.route(re.compile(r"^https://www\.google\.com/"), handle)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Local stand-in for Google Maps search results")
+  parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+  parser.add_argument("--pages", type=int, default=6, help="Result pages per search (default: 6)")
+  parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every tbm=map response")
+  args = parser.parse_args()
+
+  server = FakeMapsServer(args.pages, args.latency, port=args.port)
+  print(f"🗺️  Fake Maps at {server.url}/maps/search/dentist+kyiv/")
+  try:
+    server._httpd.serve_forever()
+  except KeyboardInterrupt:
+    print("\n👋 Fake Maps stopped")
+
+
+if __name__ == "__main__":
+  main()
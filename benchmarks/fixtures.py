@@ -0,0 +1,100 @@
+"""
+`/search?tbm=map` payloads for the benchmarks.
+
+Recorded response bodies (the raw XHR text, `{"c":..,"d":")]}'\\n[...]"}/*""*/`)
+dropped into benchmarks/payloads/ are replayed in name order. Without them,
+deterministic synthetic pages are generated with every field the parsers read,
+so runs are reproducible on any machine and never touch the network.
+
+Usage:
+    # Write 6 synthetic pages of 20 places to benchmarks/payloads/
+    uv run python -m benchmarks.fixtures --pages 6
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+from maps_parser import FIELD_PATHS, OPENING_HOURS_PATH, PHONES_PATH
+
+PAYLOAD_DIR = Path(__file__).parent / "payloads"
+# Google Maps returns 20 places per tbm=map page
+PAGE_SIZE = 20
+SEED = 1234
+
+CATEGORIES = ["Dentist", "Dental clinic", "Orthodontist", "Medical center", "Pharmacy", "Cafe", "Restaurant"]
+STREETS = ["Khreshchatyk St", "Velyka Vasylkivska St", "Antonovycha St", "Saksahanskoho St", "Lva Tolstoho St"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _set_path(data: list, path: list[int], value):
+  for key in path[:-1]:
+    while len(data) <= key:
+      data.append(None)
+    if data[key] is None:
+      data[key] = []
+    data = data[key]
+  while len(data) <= path[-1]:
+    data.append(None)
+  data[path[-1]] = value
+
+
+def synthetic_place(rng: random.Random, n: int) -> list:
+  """One place entry shaped like Google's (fields at the FIELD_PATHS indexes)."""
+  cid = str(rng.getrandbits(63))
+  fields = {
+    "fullAddress": f"{rng.randint(1, 200)} {rng.choice(STREETS)}, Kyiv, 0{rng.randint(1000, 4999)}",
+    "placeId": f"ChIJbench{n:06d}{rng.getrandbits(32):08x}",
+    "kgmid": f"/g/11bench{n:06d}",
+    "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+    "cid": cid,
+    "featuredImage": f"https://lh5.googleusercontent.com/p/AF1Qip{rng.getrandbits(64):016x}=w80-h106-k-no",
+    "name": f"Bench Place {n}",
+    "latitude": round(50.35 + rng.random() * 0.2, 7),
+    "longitude": round(30.40 + rng.random() * 0.3, 7),
+    "reviewCount": rng.randint(0, 3000),
+    "averageRating": round(rng.uniform(3.0, 5.0), 1),
+    "website": f"https://place{n}.example.com/",
+    "domain": f"place{n}.example.com",
+  }
+  data: list = []
+  for key, path in FIELD_PATHS.items():
+    _set_path(data, path, fields[key])
+  _set_path(data, PHONES_PATH, [[f"044 {rng.randint(100, 999)} {rng.randint(1000, 9999)}"], [f"+380 44 {rng.randint(1000000, 9999999)}"]])
+  _set_path(data, OPENING_HOURS_PATH, [[day, ["9 AM–6 PM"]] for day in DAYS])
+  # Entries carry more slots than the parsed ones; the JS filter keeps those with index 14
+  return [None, data] + [None] * 13
+
+
+def synthetic_payload(page: int, page_size: int = PAGE_SIZE, seed: int = SEED) -> str:
+  """Response body for one results page (same page and seed → same bytes)."""
+  rng = random.Random(seed * 1_000_003 + page)
+  entries = [synthetic_place(rng, page * page_size + i) for i in range(page_size)]
+  inner = ")]}'\n" + json.dumps([[None, [None, *entries]]])
+  return json.dumps({"c": 0, "d": inner}) + '/*""*/'
+
+
+def load_payloads(pages: int, payload_dir: Path = PAYLOAD_DIR) -> list[str]:
+  """`pages` response bodies: recorded ones (cycled) if any exist, else synthetic pages."""
+  recorded = sorted(payload_dir.glob("*.txt")) if payload_dir.is_dir() else []
+  if recorded:
+    return [recorded[i % len(recorded)].read_text(encoding="utf-8") for i in range(pages)]
+  return [synthetic_payload(page) for page in range(pages)]
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Write synthetic tbm=map payloads for the benchmarks")
+  parser.add_argument("--pages", type=int, default=6, help="Number of result pages (default: 6)")
+  parser.add_argument("--out", type=str, default=str(PAYLOAD_DIR), help=f"Output directory (default: {PAYLOAD_DIR})")
+  args = parser.parse_args()
+
+  out = Path(args.out)
+  out.mkdir(parents=True, exist_ok=True)
+  for page in range(args.pages):
+    (out / f"page{page:03d}.txt").write_text(synthetic_payload(page), encoding="utf-8")
+  print(f"✓ Wrote {args.pages} payloads to {out}")
+
+
+if __name__ == "__main__":
+  main()
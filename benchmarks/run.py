@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks: places per second through every stage of the pipeline.
+
+Suites (all replay benchmarks/fixtures.py payloads, nothing leaves the machine):
+  parse       maps_parser.parse_search_response (capture mode parse path)
+  userscript  script.js XHR hook + formatDataItem, run in Node
+  ingest      POST /api/data (JSON) and /api/data/stream (gzip NDJSON) on a local
+              server.py, per batch size × client workers
+  scroll      AutoScrollManager (adaptive) on the fake Maps page
+  search      GoogleMapsScraper.search (navigate strategy, capture mode) end to end, scrolled and with --scroll-mode fetch
+
+The browser suites need Camoufox; they are skipped when it can't start, as
+the userscript suite is without Node. Results are compared with
+benchmarks/baseline.json, and the exit code is 1 if any result is more than
+--tolerance below it. Baselines are machine-specific: record one with
+--save-baseline on the machine that runs the comparison. Ingest rows with more
+clients than the machine has CPUs only measure contention, so they are never
+saved into a baseline.
+
+The checked-in baseline comes from a 1-CPU machine without Camoufox: it gates
+the parse, userscript and single-client ingest rows only. Other rows are
+printed without a comparison until a baseline is recorded where they can run.
+
+Usage:
+    uv run python -m benchmarks.run
+    uv run python -m benchmarks.run --suite parse --suite ingest --batch-sizes 10,500 --workers 1,8
+    uv run python -m benchmarks.run --save-baseline
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from benchmarks.fixtures import load_payloads
+from maps_parser import parse_search_response
+
+BENCH_DIR = Path(__file__).parent
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+USERSCRIPT_BENCH = BENCH_DIR / "userscript_bench.js"
+
+SUITES = ["parse", "userscript", "ingest", "scroll", "search"]
+
+# Benchmark name -> places per second
+Results = dict[str, float]
+
+
+def median_rate(measure: Callable[[], tuple[int, float]], repeat: int) -> float:
+  """Median places/second of `repeat` runs of `measure` (returns places, seconds)."""
+  rates = []
+  for _ in range(repeat):
+    places, seconds = measure()
+    rates.append(places / seconds if seconds > 0 else 0.0)
+  return statistics.median(rates)
+
+
+def bench_parse(args) -> Results:
+  payloads = load_payloads(args.pages)
+
+  def measure():
+    started = time.perf_counter()
+    places = sum(len(parse_search_response(body)) for _ in range(args.rounds) for body in payloads)
+    return places, time.perf_counter() - started
+
+  return {"parse.python": median_rate(measure, args.repeat)}
+
+
+def bench_userscript(args) -> Results:
+  node = shutil.which("node")
+  if not node:
+    print("⏭️  userscript: node not found")
+    return {}
+  request = json.dumps({"payloads": load_payloads(args.pages), "repeat": args.rounds})
+
+  def measure():
+    result = subprocess.run([node, str(USERSCRIPT_BENCH)], input=request, capture_output=True, text=True, check=True)
+    output = json.loads(result.stdout)
+    return output["places"], output["seconds"]
+
+  return {"parse.userscript": median_rate(measure, args.repeat)}
+
+
+def _free_port() -> int:
+  with socket.socket() as sock:
+    sock.bind(("127.0.0.1", 0))
+    return sock.getsockname()[1]
+
+
+def _ingest_items(count: int, payloads: list[str]) -> list[dict]:
+  """`count` formatted places with unique IDs, so none of them is dropped as a duplicate."""
+  places = [place for body in payloads for place in parse_search_response(body)]
+  items = []
+  for i in range(count):
+    item = dict(places[i % len(places)])
+    item["placeId"] = f"{item['placeId']}-{i}"
+    item["cid"] = f"{item['cid']}{i}"
+    item["query"] = "dentist kyiv"
+    item["queryId"] = "bench"
+    items.append(item)
+  return items
+
+
+def _request_bodies(items: list[dict], batch_size: int, path: str) -> list[tuple[bytes, dict[str, str]]]:
+  """Encoded request bodies and headers, one per batch, built before timing starts."""
+  bodies = []
+  for i in range(0, len(items), batch_size):
+    batch = items[i : i + batch_size]
+    if path == "stream":
+      ndjson = "\n".join(json.dumps(item, ensure_ascii=False) for item in batch).encode("utf-8")
+      bodies.append((gzip.compress(ndjson, compresslevel=1), {"Content-Encoding": "gzip", "Content-Type": "application/x-ndjson"}))
+    else:
+      bodies.append((json.dumps({"items": batch}).encode("utf-8"), {"Content-Type": "application/json"}))
+  return bodies
+
+
+def _ingest_once(storage: str, bodies: list[tuple[bytes, dict[str, str]]], items: int, path: str, workers: int) -> tuple[int, float]:
+  """Post pre-encoded batches to a fresh server from `workers` clients; time until they're on disk."""
+  import httpx
+  import uvicorn
+
+  import server
+
+  port = _free_port()
+  server.args = argparse.Namespace(port=port)
+  with tempfile.TemporaryDirectory() as tmp:
+    output = os.path.join(tmp, "bench.db" if storage == "sqlite" else "bench.csv")
+    app = server.create_app(output, storage=storage)
+    uvicorn_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+    thread.start()
+    while not uvicorn_server.started:
+      time.sleep(0.01)
+
+    base_url = f"http://127.0.0.1:{port}"
+    endpoint = "/api/data/stream" if path == "stream" else "/api/data"
+
+    def post_batches(worker: int):
+      with httpx.Client(base_url=base_url, timeout=60) as client:
+        for content, headers in bodies[worker::workers]:
+          client.post(endpoint, content=content, headers=headers).raise_for_status()
+
+    try:
+      started = time.perf_counter()
+      with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(post_batches, range(workers)))
+      written = httpx.post(f"{base_url}/flush", timeout=60).json()["total_written"]
+      elapsed = time.perf_counter() - started
+    finally:
+      uvicorn_server.should_exit = True
+      thread.join()
+  if written != items:
+    raise RuntimeError(f"ingest wrote {written} of {items} items")
+  return written, elapsed
+
+
+def bench_ingest(args) -> Results:
+  items = _ingest_items(args.ingest_items, load_payloads(args.pages))
+  results = {}
+  for path in args.ingest_path or ["data", "stream"]:
+    name = "ingest" if path == "data" else "ingest-stream"
+    for batch_size in args.batch_sizes:
+      bodies = _request_bodies(items, batch_size, path)
+      for workers in args.workers:
+        # The server logs every request; keep that out of the measurement
+        with contextlib.redirect_stdout(io.StringIO()):
+          rate = median_rate(lambda b=bodies, p=path, w=workers: _ingest_once(args.storage, b, len(items), p, w), args.repeat)
+        results[f"{name}.{args.storage}.batch{batch_size}.workers{workers}"] = rate
+  return results
+
+
+def _bench_config():
+  from google_maps_scraper import RateLimitConfig
+
+  # No humanizing pauses: measure the mechanics, not the sleeps
+  return RateLimitConfig(
+    scroll_count=50,
+    scroll_mode="adaptive",
+    min_scroll_gap=0.0,
+    adaptive_jitter_min=0.0,
+    adaptive_jitter_max=0.0,
+    stall_timeout=1.0,
+    search_strategy="navigate",
+    results_timeout=10.0,
+  )
+
+
+@contextlib.contextmanager
+def _fake_maps_scraper(args, on_items=None):
+  """GoogleMapsScraper (capture mode) whose google.com traffic is served by the fake Maps server."""
+  from benchmarks.fake_maps import FakeMapsServer, route_google
+  from google_maps_scraper import GoogleMapsScraper
+
+  fake = FakeMapsServer(args.pages, args.latency).start()
+  scraper = GoogleMapsScraper(headless=True, rate_limit_config=_bench_config(), capture=True, on_items=on_items)
+  try:
+    scraper.start()
+    route_google(scraper.context, fake.url)
+    yield scraper
+  finally:
+    with contextlib.suppress(Exception):
+      scraper.stop()
+    fake.stop()
+
+
+def _run_browser_suite(name: str, suite: Callable[[], Results]) -> Results:
+  try:
+    with contextlib.redirect_stdout(io.StringIO()):
+      return suite()
+  except Exception as e:
+    print(f"⏭️  {name}: browser unavailable ({type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''})")
+    return {}
+
+
+def bench_scroll(args) -> Results:
+  from google_maps_scraper import FEED_SELECTOR, FEED_SIZE_JS, AutoScrollManager
+
+  def suite():
+    with _fake_maps_scraper(args) as scraper:
+      page = scraper.page
+      rates = []
+      for i in range(args.repeat):
+        page.goto(f"https://www.google.com/maps/search/bench+scroll+{i}/", wait_until="domcontentloaded")
+        page.wait_for_function(f"() => document.querySelector('{FEED_SELECTOR}')?.children.length > 0")
+        before = page.evaluate(FEED_SIZE_JS, FEED_SELECTOR)
+        started = time.perf_counter()
+        AutoScrollManager(scraper.rate_limit, page).scroll_with_config()
+        elapsed = time.perf_counter() - started
+        # Minus the end-of-results marker
+        loaded = page.evaluate(FEED_SIZE_JS, FEED_SELECTOR) - 1 - before
+        rates.append(loaded / elapsed)
+      return {"scroll.adaptive": statistics.median(rates)}
+
+  return _run_browser_suite("scroll", suite)
+
+
+def bench_search(args) -> Results:
+  def suite():
+    captured = []
+    with _fake_maps_scraper(args, on_items=captured.extend) as scraper:
+
+      def measure():
+        captured.clear()
+        started = time.perf_counter()
+        for i in range(args.searches):
+          scraper.search(f"bench search {i}", query_id=f"bench{i}")
+        return len(captured), time.perf_counter() - started
+
+      results = {"search.navigate": median_rate(measure, args.repeat)}
+      # Same searches, next pages requested directly instead of scrolled
+      scraper.rate_limit = replace(scraper.rate_limit, scroll_mode="fetch")
+      results["search.navigate-fetch"] = median_rate(measure, args.repeat)
+      return results
+
+  return _run_browser_suite("search", suite)
+
+
+BENCHMARKS = {
+  "parse": bench_parse,
+  "userscript": bench_userscript,
+  "ingest": bench_ingest,
+  "scroll": bench_scroll,
+  "search": bench_search,
+}
+
+
+def baseline_rows(results: Results) -> Results:
+  """Results worth keeping as a baseline: no ingest rows with more clients than this machine has CPUs."""
+  cpus = os.cpu_count() or 1
+  kept = {}
+  for name, rate in results.items():
+    match = re.search(r"\.workers(\d+)$", name)
+    if match and int(match.group(1)) > cpus:
+      continue
+    kept[name] = rate
+  return kept
+
+
+def compare(results: Results, baseline: Results, tolerance: float) -> list[str]:
+  """Print results next to the baseline; returns the names of regressed benchmarks."""
+  regressions = []
+  print(f"\n{'benchmark':<40} {'places/s':>12} {'baseline':>12} {'change':>8}")
+  for name, rate in results.items():
+    base = baseline.get(name)
+    if base:
+      change = rate / base - 1
+      flag = ""
+      if change < -tolerance:
+        regressions.append(name)
+        flag = " ❌"
+      print(f"{name:<40} {rate:>12.0f} {base:>12.0f} {change:>+7.0%}{flag}")
+    else:
+      print(f"{name:<40} {rate:>12.0f} {'-':>12} {'':>8}")
+  return regressions
+
+
+def _int_list(text: str) -> list[int]:
+  return [int(part) for part in text.split(",") if part.strip()]
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description="Offline scraper benchmarks (places per second)",
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  # Everything that can run here, compared with benchmarks/baseline.json
+  uv run python -m benchmarks.run
+
+  # Only the server, SQLite backend
+  uv run python -m benchmarks.run --suite ingest --storage sqlite --batch-sizes 10,100,1000 --workers 1,4,16
+
+  # Record this machine's baseline
+  uv run python -m benchmarks.run --save-baseline
+        """,
+  )
+  parser.add_argument("--suite", action="append", choices=SUITES, help="Suite to run, can be repeated (default: all)")
+  parser.add_argument("--pages", type=int, default=6, help="Result pages per search (default: 6, i.e. 120 places)")
+  parser.add_argument("--rounds", type=int, default=20, help="Passes over the payloads per parse measurement (default: 20)")
+  parser.add_argument("--repeat", type=int, default=3, help="Measurements per benchmark, the median is reported (default: 3)")
+  parser.add_argument("--ingest-items", type=int, default=5000, help="Items posted per ingest measurement (default: 5000)")
+  parser.add_argument("--batch-sizes", type=_int_list, default=[10, 100, 500], help="Ingest batch sizes (default: 10,100,500)")
+  parser.add_argument("--workers", type=_int_list, default=[1, 4], help="Concurrent ingest clients (default: 1,4)")
+  parser.add_argument(
+    "--ingest-path",
+    action="append",
+    choices=["data", "stream"],
+    help="Ingest endpoint: data (/api/data JSON) or stream (/api/data/stream gzip NDJSON), can be repeated (default: both)",
+  )
+  parser.add_argument("--storage", choices=["csv", "sqlite"], default="csv", help="Server storage backend (default: csv)")
+  parser.add_argument("--searches", type=int, default=5, help="Searches per search measurement (default: 5)")
+  parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every fake tbm=map response (default: 0)")
+  parser.add_argument("--baseline", type=str, default=str(BASELINE_FILE), help="Baseline file (default: benchmarks/baseline.json)")
+  parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file instead of comparing")
+  parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs the baseline (default: 0.2 = 20%%)")
+  parser.add_argument("--output", type=str, default=None, help="Also write the results to this JSON file")
+
+  args = parser.parse_args()
+
+  results: Results = {}
+  for suite in args.suite or SUITES:
+    print(f"⏱️  {suite}...")
+    results.update(BENCHMARKS[suite](args))
+
+  report = {
+    "results": {name: round(rate, 1) for name, rate in results.items()},
+    "machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}, {os.cpu_count()} CPUs",
+  }
+  if args.output:
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+  baseline_file = Path(args.baseline)
+  if args.save_baseline:
+    saved = json.loads(baseline_file.read_text(encoding="utf-8"))["results"] if baseline_file.exists() else {}
+    kept = baseline_rows(report["results"])
+    baseline_file.write_text(json.dumps({**report, "results": {**saved, **kept}}, indent=2) + "\n", encoding="utf-8")
+    compare(results, {}, args.tolerance)
+    skipped = sorted(set(report["results"]) - set(kept))
+    if skipped:
+      print(f"\n⚠️  Not saved, more clients than CPUs: {', '.join(skipped)}")
+    print(f"\n✓ Saved baseline to {baseline_file}")
+    return
+
+  baseline = json.loads(baseline_file.read_text(encoding="utf-8")) if baseline_file.exists() else {"results": {}}
+  regressions = compare(results, baseline["results"], args.tolerance)
+  if baseline.get("machine") and baseline["machine"] != report["machine"]:
+    print(f"\n⚠️  Baseline was recorded on: {baseline['machine']}")
+  if regressions:
+    print(f"\n❌ {len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+    sys.exit(1)
+  print("\n✓ No regressions")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,82 @@
+// Runs the userscript's XHR hook + formatDataItem over tbm=map payloads in Node.
+//
+// script.js is evaluated in a sandbox with just enough browser API (XHR,
+// fetch, jQuery, location) to load; every payload is then delivered as the
+// `load` event of a /search?tbm=map request, exactly like in the page.
+//
+// stdin:  {"payloads": ["<response body>", ...], "repeat": 10}
+// stdout: {"places": <formatted places>, "seconds": <parse time>}
+
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+
+const input = JSON.parse(fs.readFileSync(0, 'utf8'));
+const source = fs.readFileSync(path.join(__dirname, '..', 'script.js'), 'utf8');
+
+let places = 0;
+
+class FakeXMLHttpRequest {
+    constructor() {
+        this.listeners = {};
+    }
+    open() {}
+    send() {}
+    addEventListener(type, listener) {
+        (this.listeners[type] = this.listeners[type] || []).push(listener);
+    }
+    deliver(text) {
+        this.responseText = text;
+        (this.listeners.load || []).forEach(listener => listener.call(this));
+    }
+}
+
+// Chainable jQuery stand-in for the status indicator
+const jquery = () => new Proxy({}, { get: () => () => jquery() });
+
+const sandbox = {
+    XMLHttpRequest: FakeXMLHttpRequest,
+    $: jquery,
+    location: { pathname: '/maps/search/dentist+kyiv/' },
+    document: { documentElement: { dataset: { scrapkaQueryId: 'bench' } } },
+    fetch: async (url, options) => ({
+        ok: true,
+        status: 200,
+        json: async () => ({ saved: options?.body ? JSON.parse(options.body).items.length : 0 }),
+    }),
+    console: {
+        log: (message, ...rest) => {
+            const match = typeof message === 'string' && message.match(/Captured (\d+) items/);
+            if (match) places += Number(match[1]);
+        },
+        error: (...args) => console.error(...args),
+    },
+    // Timers never fire: batches are sent when full, the rest stays queued
+    setTimeout: () => 0,
+    clearTimeout: () => {},
+    setInterval: () => 0,
+    clearInterval: () => {},
+    // No indexedDB: pending items stay in memory
+    crypto: globalThis.crypto,
+    performance,
+    Date,
+    JSON,
+    Promise,
+};
+sandbox.window = sandbox;
+vm.createContext(sandbox);
+vm.runInContext(source, sandbox, { filename: 'script.js' });
+
+const XHR = sandbox.XMLHttpRequest;
+const started = process.hrtime.bigint();
+for (let i = 0; i < input.repeat; i++) {
+    for (const payload of input.payloads) {
+        const xhr = new XHR();
+        xhr.open('GET', `/search?tbm=map&pb=!8i${i}`);
+        xhr.send();
+        xhr.deliver(payload);
+    }
+}
+const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+
+process.stdout.write(JSON.stringify({ places, seconds }));
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Long-lived Camoufox browser service.
+
+`serve` launches one Camoufox (with the addons) behind a Playwright websocket
+endpoint and keeps it running between scraper runs. main.py connects to it
+with --browser-ws, so a run (or a restarted worker) only opens a new context
+instead of paying the cold start again. Tabs are recycled after a number of
+queries or when the browser uses too much memory, and a broken context is
+replaced without touching the browser.
+
+Served browsers can't use a persistent profile (Playwright limitation), so
+this is meant for --capture runs that don't need Tampermonkey.
+
+Usage:
+    # Terminal 1: keep a browser warm
+    uv run python browser_service.py serve --port 9377 --headless
+
+    # Terminal 2: scrape through it
+    uv run python main.py queries.csv --capture --browser-ws ws://localhost:9377/scrapka
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+DEFAULT_PORT = 9377
+DEFAULT_WS_PATH = "scrapka"
+
+
+def _read_proc(path: Path) -> str:
+  try:
+    return path.read_text(errors="ignore")
+  except OSError:
+    return ""
+
+
+def process_rss_mb(pid: int) -> float:
+  """Resident memory of one process in MB (0 if it is gone or unreadable)."""
+  for line in _read_proc(Path(f"/proc/{pid}/status")).splitlines():
+    if line.startswith("VmRSS:"):
+      return int(line.split()[1]) / 1024
+  return 0.0
+
+
+def _descendants(root_pid: int) -> set[int]:
+  """PIDs of all processes below `root_pid`."""
+  children: dict[int, list[int]] = {}
+  for entry in Path("/proc").iterdir():
+    if entry.name.isdigit():
+      stat = _read_proc(entry / "stat")
+      if ")" in stat:
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+  found, stack = set(), [root_pid]
+  while stack:
+    for child in children.get(stack.pop(), []):
+      if child not in found:
+        found.add(child)
+        stack.append(child)
+  return found
+
+
+def camoufox_rss_mb(root_pid: int | None = None) -> float:
+  """Resident memory of Camoufox processes in MB: those started by `root_pid`, or all of this user's.
+
+  Playwright doesn't expose Firefox's PIDs, so parent and content processes
+  are found by their executable name in /proc (a scraper's browser runs below
+  it, via the Playwright driver). Returns 0 where /proc is not available.
+  """
+  proc = Path("/proc")
+  if not proc.is_dir():
+    return 0.0
+  pids = _descendants(root_pid) if root_pid else {int(entry.name) for entry in proc.iterdir() if entry.name.isdigit()}
+
+  total = 0.0
+  for pid in pids:
+    argv0 = _read_proc(proc / str(pid) / "cmdline").split("\0", 1)[0]
+    if os.path.basename(argv0).startswith("camoufox"):
+      total += process_rss_mb(pid)
+  return total
+
+
+class TabRecycler:
+  """Decides when the scraper's tab should be replaced with a fresh one."""
+
+  def __init__(self, max_queries: int = 25, max_rss_mb: float = 0):
+    self.max_queries = max_queries
+    self.max_rss_mb = max_rss_mb
+    self.queries = 0
+
+  def record_query(self):
+    self.queries += 1
+
+  def should_recycle(self) -> str | None:
+    """Reason to recycle the tab now, or None."""
+    if self.max_queries and self.queries >= self.max_queries:
+      return f"{self.queries} queries"
+    if self.max_rss_mb:
+      # Own browser if it was launched here, else the (shared) browser service
+      rss = camoufox_rss_mb(os.getpid()) or camoufox_rss_mb()
+      if rss > self.max_rss_mb:
+        return f"browser memory {rss:.0f} MB"
+    return None
+
+  def reset(self):
+    self.queries = 0
+
+
+def serve(port: int = DEFAULT_PORT, ws_path: str = DEFAULT_WS_PATH, headless: bool = True, addons: bool = True):
+  """Run Camoufox behind a Playwright websocket endpoint until interrupted."""
+  from camoufox.server import launch_server
+
+  from google_maps_scraper import build_camoufox_kwargs
+
+  print(f"🌐 Serving Camoufox at ws://localhost:{port}/{ws_path}")
+  launch_server(**build_camoufox_kwargs(headless, None, addons=addons), port=port, ws_path=ws_path)
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description="Long-lived Camoufox browser service",
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  # Keep a headless browser warm
+  uv run python browser_service.py serve --headless
+
+  # Scrape through it
+  uv run python main.py queries.csv --capture --browser-ws ws://localhost:9377/scrapka
+        """,
+  )
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  serve_parser = commands.add_parser("serve", help="Launch Camoufox and serve it over a websocket")
+  serve_parser.add_argument(
+    "--port",
+    type=int,
+    default=DEFAULT_PORT,
+    help=f"Websocket port (default: {DEFAULT_PORT})",
+  )
+  serve_parser.add_argument(
+    "--ws-path",
+    type=str,
+    default=DEFAULT_WS_PATH,
+    help=f"Websocket path (default: {DEFAULT_WS_PATH})",
+  )
+  serve_parser.add_argument(
+    "--headless",
+    action="store_true",
+    help="Run browser without window",
+  )
+  serve_parser.add_argument(
+    "--no-addons",
+    action="store_true",
+    help="Don't load the Tampermonkey extension",
+  )
+
+  args = parser.parse_args()
+
+  if args.command == "serve":
+    try:
+      serve(args.port, args.ws_path, headless=args.headless, addons=not args.no_addons)
+    except KeyboardInterrupt:
+      print("\n👋 Browser service stopped")
+
+
+if __name__ == "__main__":
+  main()
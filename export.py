@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Streaming exporter for scraped places (CSV / XLSX / JSON / JSONL / Parquet).
+
+Rows are read one at a time from the server output (CSV or SQLite) and
+written straight to the target format, so memory stays flat regardless of
+dataset size (CSV outputs take a first pass that counts rows per place, so a
+place's rows are merged into one record). Columns can be projected and rows
+filtered on the way.
+
+Usage:
+    # Everything to Excel
+    uv run python export.py output.csv places.xlsx
+
+    # Subset of columns, only well-rated places with a website
+    uv run python export.py output.db places.jsonl --columns name,phones,website \\
+        --filter "averageRating>=4.5" --filter "website!="
+"""
+
+import argparse
+import csv
+import json
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any
+
+from storage import CSV_COLUMNS, iter_csv_places, iter_sqlite_rows
+
+# Output columns, including the originating search query and its ID
+EXPORT_COLUMNS = CSV_COLUMNS
+
+NUMERIC_COLUMNS = {
+  "averageRating": float,
+  "reviewCount": int,
+  "latitude": float,
+  "longitude": float,
+}
+
+# Excel's per-sheet row limit (including the header)
+XLSX_MAX_ROWS = 1_048_576
+
+Row = dict[str, Any]
+RowFilter = Callable[[Row], bool]
+
+
+@dataclass
+class BusinessData:
+  """Single place, with snake_case fields mapped to the output columns."""
+
+  name: str | None = None
+  full_address: str | None = None
+  phones: str | None = None
+  website: str | None = None
+  domain: str | None = None
+  average_rating: float | None = None
+  review_count: int | None = None
+  categories: str | None = None
+  opening_hours: str | None = None
+  place_id: str | None = None
+  kgmid: str | None = None
+  cid: str | None = None
+  latitude: float | None = None
+  longitude: float | None = None
+  google_maps_url: str | None = None
+  google_knowledge_url: str | None = None
+  featured_image: str | None = None
+  scraped_at: str | None = None
+  query: str | None = None
+  query_id: str | None = None
+
+  def to_row(self) -> Row:
+    """Convert to a row keyed by output column names."""
+    return {FIELD_TO_COLUMN[key]: value for key, value in asdict(self).items()}
+
+  @classmethod
+  def from_row(cls, row: Row) -> "BusinessData":
+    """Build from a row keyed by output column names."""
+    return cls(**{key: row.get(column) for key, column in FIELD_TO_COLUMN.items()})
+
+
+def _column_name(field_name: str) -> str:
+  special = {
+    "google_maps_url": "googleMapsURL",
+    "google_knowledge_url": "googleKnowledgeURL",
+  }
+  if field_name in special:
+    return special[field_name]
+  head, *tail = field_name.split("_")
+  return head + "".join(part.capitalize() for part in tail)
+
+
+FIELD_TO_COLUMN = {f.name: _column_name(f.name) for f in fields(BusinessData)}
+
+
+def typed_value(column: str, value: Any) -> Any:
+  """Convert CSV strings to numbers / None for typed formats."""
+  if value is None or value == "":
+    return None
+  convert = NUMERIC_COLUMNS.get(column)
+  if convert and isinstance(value, str):
+    try:
+      return convert(float(value)) if convert is int else convert(value)
+    except ValueError:
+      return None
+  return value
+
+
+FILTER_PATTERN = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|=|>|<|~)\s*(.*)$")
+
+
+def parse_filter(spec: str) -> RowFilter:
+  """Parse a filter like `averageRating>=4.5`, `domain=medico.ua` or `name~clinic`.
+
+  `=`/`!=` compare text (empty value means "is empty"), `~` is a
+  case-insensitive substring match, `<`/`<=`/`>`/`>=` compare numbers.
+  """
+  match = FILTER_PATTERN.match(spec)
+  if not match:
+    raise ValueError(f"Invalid filter: {spec!r}")
+  column, op, expected = match.groups()
+
+  if op in ("=", "!="):
+
+    def text_equals(row: Row) -> bool:
+      value = row.get(column)
+      value = "" if value is None else str(value)
+      return (value == expected) == (op == "=")
+
+    return text_equals
+
+  if op == "~":
+    needle = expected.lower()
+    return lambda row: needle in str(row.get(column) or "").lower()
+
+  threshold = float(expected)
+  compare = {
+    ">": lambda a: a > threshold,
+    ">=": lambda a: a >= threshold,
+    "<": lambda a: a < threshold,
+    "<=": lambda a: a <= threshold,
+  }[op]
+
+  def numeric(row: Row) -> bool:
+    value = row.get(column)
+    if value is None or value == "":
+      return False
+    try:
+      return compare(float(value))
+    except ValueError:
+      return False
+
+  return numeric
+
+
+class DataManager:
+  """Source of places for export.
+
+  Either holds items added in memory, or streams rows from a server output
+  file (`.csv` or SQLite `.db`/`.sqlite`) without loading it.
+  """
+
+  def __init__(self, source: str | None = None):
+    self.source = Path(source) if source else None
+    self.items: list[BusinessData] = []
+
+  def add_item(self, item: BusinessData):
+    self.items.append(item)
+
+  def iter_rows(self) -> Iterator[Row]:
+    """Yield rows keyed by output column names."""
+    for item in self.items:
+      yield item.to_row()
+
+    if self.source is None:
+      return
+    if self.source.suffix in (".db", ".sqlite", ".sqlite3"):
+      yield from iter_sqlite_rows(str(self.source))
+    else:
+      # A place can have several CSV rows (later ones add fields): one merged record each
+      yield from iter_csv_places([str(self.source)])
+
+
+class ExportManager:
+  """Streams rows from a DataManager into CSV, XLSX, JSON, JSONL or Parquet."""
+
+  def __init__(
+    self,
+    data_manager: DataManager,
+    columns: list[str] | None = None,
+    filters: Iterable[RowFilter | str] | None = None,
+  ):
+    self.data_manager = data_manager
+    self.columns = columns or EXPORT_COLUMNS
+    self.filters = [parse_filter(f) if isinstance(f, str) else f for f in filters or []]
+
+    unknown = [col for col in self.columns if col not in EXPORT_COLUMNS]
+    if unknown:
+      raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+  def rows(self) -> Iterator[Row]:
+    """Filtered, projected rows."""
+    for row in self.data_manager.iter_rows():
+      if all(f(row) for f in self.filters):
+        yield {col: row.get(col) for col in self.columns}
+
+  def typed_rows(self) -> Iterator[Row]:
+    for row in self.rows():
+      yield {col: typed_value(col, value) for col, value in row.items()}
+
+  def export_to_csv(self, path: str) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+      writer = csv.DictWriter(f, fieldnames=self.columns)
+      writer.writeheader()
+      for row in self.rows():
+        writer.writerow({col: "" if value is None else value for col, value in row.items()})
+        count += 1
+    return count
+
+  def export_to_xlsx(self, path: str) -> int:
+    """Write XLSX in openpyxl write-only mode, starting a new sheet at Excel's row limit."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    count = 0
+
+    for row in self.typed_rows():
+      if sheet is None or sheet_rows >= XLSX_MAX_ROWS:
+        sheet = workbook.create_sheet(f"Places {len(workbook.worksheets) + 1}")
+        sheet.append(self.columns)
+        sheet_rows = 1
+      sheet.append([row[col] for col in self.columns])
+      sheet_rows += 1
+      count += 1
+
+    if sheet is None:
+      workbook.create_sheet("Places 1").append(self.columns)
+    workbook.save(path)
+    return count
+
+  def export_to_json(self, path: str) -> int:
+    """Write a JSON array, one row at a time."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+      f.write("[")
+      for row in self.typed_rows():
+        f.write(",\n" if count else "\n")
+        f.write(json.dumps(row, ensure_ascii=False))
+        count += 1
+      f.write("\n]\n")
+    return count
+
+  def export_to_jsonl(self, path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+      for row in self.typed_rows():
+        f.write(json.dumps(row, ensure_ascii=False))
+        f.write("\n")
+        count += 1
+    return count
+
+  def export_to_parquet(self, path: str, batch_size: int = 50_000) -> int:
+    """Write Parquet in row groups of `batch_size` (requires pyarrow)."""
+    try:
+      import pyarrow as pa
+      import pyarrow.parquet as pq
+    except ImportError as e:
+      raise ImportError("Parquet export requires pyarrow: uv pip install pyarrow") from e
+
+    arrow_types = {float: pa.float64(), int: pa.int64()}
+    schema = pa.schema([(col, arrow_types.get(NUMERIC_COLUMNS.get(col), pa.string())) for col in self.columns])
+
+    count = 0
+    batch: list[Row] = []
+    with pq.ParquetWriter(path, schema) as writer:
+      for row in self.typed_rows():
+        batch.append(row)
+        if len(batch) >= batch_size:
+          writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+          count += len(batch)
+          batch = []
+      if batch or not count:
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+        count += len(batch)
+    return count
+
+  def export(self, path: str) -> int:
+    """Export by file extension. Returns number of exported rows."""
+    exporters = {
+      ".csv": self.export_to_csv,
+      ".xlsx": self.export_to_xlsx,
+      ".json": self.export_to_json,
+      ".jsonl": self.export_to_jsonl,
+      ".ndjson": self.export_to_jsonl,
+      ".parquet": self.export_to_parquet,
+    }
+    suffix = Path(path).suffix.lower()
+    if suffix not in exporters:
+      raise ValueError(f"Unsupported export format: {suffix} (use {', '.join(exporters)})")
+    return exporters[suffix](path)
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description="Export scraped places",
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  uv run python export.py output.csv places.xlsx
+  uv run python export.py output.db places.parquet
+  uv run python export.py output.csv kyiv.jsonl --filter "fullAddress~kyiv" --columns name,phones
+
+Filters: column=value, column!=value, column~substring, column>=number (also >, <, <=)
+        """,
+  )
+  parser.add_argument("source", help="Server output (.csv or SQLite .db)")
+  parser.add_argument("target", help="Output file: .csv, .xlsx, .json, .jsonl or .parquet")
+  parser.add_argument(
+    "--columns",
+    type=str,
+    default=None,
+    help="Comma-separated columns to export (default: all)",
+  )
+  parser.add_argument(
+    "--filter",
+    action="append",
+    default=[],
+    help="Row filter, can be repeated (all must match)",
+  )
+
+  args = parser.parse_args()
+
+  columns = [col.strip() for col in args.columns.split(",")] if args.columns else None
+  try:
+    exporter = ExportManager(DataManager(args.source), columns=columns, filters=args.filter)
+    count = exporter.export(args.target)
+  except (ImportError, ValueError) as e:
+    print(f"❌ {e}")
+    raise SystemExit(1) from e
+  print(f"✓ Exported {count} places to {args.target}")
+
+
+if __name__ == "__main__":
+  main()
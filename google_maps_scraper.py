@@ -1,20 +1,212 @@
 """
-Google Maps Scraper - Simplified sync version with auto-scroll only
+Google Maps Scraper - sync and asyncio versions with auto-scroll only
 """
 
+import asyncio
+import json
+import math
 import random
 import time
-from dataclasses import dataclass
+import urllib.parse
+from collections.abc import Callable
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional
+from typing import Any
 
-from camoufox.addons import DefaultAddons
 from dotenv import load_dotenv
+from playwright.sync_api import Error as PlaywrightError
+
+# Export subsystem lives in export.py, re-exported for existing imports
+import metrics
+from export import BusinessData, DataManager, ExportManager  # noqa: F401
+from governor import RateGovernor
+from maps_parser import RESULT_CAP, count_results, is_search_response, page_offset, page_size, page_url, parse_search_response
+from payload_cache import PayloadCache
+from resource_policy import ResourceBlocker, ResourcePolicy
 
 # from camoufox.addons import download_and_extract
 # TAMPER = "https://addons.mozilla.org/firefox/downloads/file/4624137/tampermonkey-5.4.1.xpi"
 load_dotenv()
 
+GOOGLE_MAPS_URL = "https://www.google.com/maps"
+GOOGLE_MAPS_SEARCH_URL = "https://www.google.com/maps/search/"
+
+SEARCH_INPUT_SELECTORS = [
+  'input[id*="searchboxinput"]',
+  'input[aria-label*="Search"]',
+  'input[name="q"]',
+]
+
+
+FEED_SELECTOR = '[role="feed"]'
+
+# Google's "unusual traffic" check (google.com/sorry/... or a reCAPTCHA in the page)
+CAPTCHA_SELECTOR = 'form#captcha-form, iframe[src*="recaptcha"], iframe[title*="reCAPTCHA"]'
+
+# The feed's last child gets a fixed 64px height once Google has no more results
+END_OF_RESULTS_JS = "el => (el.lastElementChild?.getAttribute('style') || '').includes('height: 64px')"
+
+FEED_SIZE_JS = "selector => document.querySelector(selector)?.children.length || 0"
+
+# Requests one tbm=map page from the page itself, so the userscript's XHR hook sees it too
+FETCH_PAGE_JS = """
+url => new Promise((resolve, reject) => {
+  const xhr = new XMLHttpRequest();
+  xhr.open('GET', url);
+  xhr.onload = () => resolve(xhr.status === 200 ? xhr.responseText : '');
+  xhr.onerror = () => reject(new Error(`tbm=map request failed: ${url}`));
+  xhr.send();
+})
+"""
+
+# Resolves with the feed's child count once it exceeds `count`, or after `timeoutMs`
+WAIT_FOR_FEED_GROWTH_JS = """
+([selector, count, timeoutMs]) => new Promise(resolve => {
+  const feed = document.querySelector(selector);
+  if (!feed) return resolve(0);
+  if (feed.children.length > count) return resolve(feed.children.length);
+  const observer = new MutationObserver(() => {
+    if (feed.children.length > count) {
+      clearTimeout(timer);
+      observer.disconnect();
+      resolve(feed.children.length);
+    }
+  });
+  const timer = setTimeout(() => {
+    observer.disconnect();
+    resolve(feed.children.length);
+  }, timeoutMs);
+  observer.observe(feed, { childList: true });
+})
+"""
+
+TAMPERMONKEY_PATH = "extensions/tampermonkey-5.4.1"
+ADDON_PATHS = [
+  TAMPERMONKEY_PATH,
+]
+
+# Firefox pref holding the {addon id: moz-extension:// UUID} mapping of a profile
+EXTENSION_UUIDS_PREF = "extensions.webextensions.uuids"
+# Cache of that mapping inside the profile, valid while extensions.json is unchanged
+EXTENSION_UUIDS_CACHE = "scrapka_extension_uuids.json"
+
+SEARCH_SECONDS = metrics.histogram("scrapka_search_seconds", "Time per search, including scrolling", ["strategy"])
+SEARCHES = metrics.counter("scrapka_searches_total", "Searches by outcome", ["strategy", "status"])
+SCROLL_SECONDS = metrics.histogram("scrapka_scroll_seconds", "Time scrolling one result list", ["mode"])
+SCROLL_STEP_SECONDS = metrics.histogram("scrapka_scroll_step_seconds", "Time per scroll step", ["mode"])
+CAPTURE_PARSE_SECONDS = metrics.histogram("scrapka_capture_parse_seconds", "Time to parse one captured tbm=map response")
+PLACES_CAPTURED = metrics.counter("scrapka_places_captured_total", "Places parsed from captured responses")
+
+# Tag the page with the main.py query ID; the userscript copies it into every item (queryId)
+SET_QUERY_ID_JS = "id => { document.documentElement.dataset.scrapkaQueryId = id || '' }"
+
+# Browser context options for non-persistent mode
+CONTEXT_OPTIONS = {
+  "viewport": {"width": 1920, "height": 1080},
+  "device_scale_factor": 1,
+  "locale": "en-US",
+  "timezone_id": "America/New_York",
+  "permissions": ["geolocation"],
+}
+
+
+def search_url(query: str) -> str:
+  """Direct search URL used by the navigate strategy."""
+  return GOOGLE_MAPS_SEARCH_URL + urllib.parse.quote_plus(query)
+
+
+def addon_gecko_id(addon_path: str) -> str | None:
+  """Gecko add-on ID (e.g. firefox@tampermonkey.net) from an unpacked extension's manifest."""
+  try:
+    manifest = json.loads((Path(addon_path) / "manifest.json").read_text(encoding="utf-8"))
+  except (OSError, ValueError):
+    return None
+  settings = manifest.get("browser_specific_settings") or manifest.get("applications") or {}
+  return settings.get("gecko", {}).get("id")
+
+
+def read_extension_uuids(profile_dir: Path) -> dict[str, str]:
+  """Read the add-on ID -> moz-extension UUID mapping from the profile's prefs.js."""
+  prefix = f'user_pref("{EXTENSION_UUIDS_PREF}",'
+  try:
+    with open(profile_dir / "prefs.js", "r", encoding="utf-8", errors="ignore") as f:
+      for line in f:
+        if line.startswith(prefix):
+          # The value is a JS string literal holding JSON
+          literal = line[len(prefix) : line.rindex(")")].strip()
+          return json.loads(json.loads(literal))
+  except (OSError, ValueError):
+    pass
+  return {}
+
+
+def find_extension_uuid(profile_dir: Path, addon_id: str | None) -> str | None:
+  """moz-extension UUID of an add-on in a profile.
+
+  The mapping is cached in the profile and re-read from prefs.js only when
+  extensions.json (the installed extension set) changes.
+  """
+  if not addon_id or not profile_dir.exists():
+    return None
+
+  extensions_json = profile_dir / "extensions.json"
+  try:
+    stat = extensions_json.stat()
+    version = [stat.st_mtime_ns, stat.st_size]
+  except OSError:
+    version = None
+
+  cache_file = profile_dir / EXTENSION_UUIDS_CACHE
+  try:
+    cache = json.loads(cache_file.read_text(encoding="utf-8"))
+    if cache.get("extensions_json") == version and addon_id in cache.get("uuids", {}):
+      return cache["uuids"][addon_id]
+  except (OSError, ValueError):
+    pass
+
+  uuids = read_extension_uuids(profile_dir)
+  if uuids:
+    try:
+      cache_file.write_text(json.dumps({"extensions_json": version, "uuids": uuids}), encoding="utf-8")
+    except OSError:
+      pass
+  return uuids.get(addon_id)
+
+
+def build_camoufox_kwargs(headless: bool, profile_path: Path | None, addons: bool = True) -> dict:
+  """Build Camoufox launch kwargs shared by the sync and async scrapers."""
+  import os
+
+  camoufox_kwargs = {
+    "addons": [os.path.abspath(path) for path in ADDON_PATHS] if addons else [],
+    "headless": headless,
+    "humanize": True,
+    "os": ["macos", "windows", "linux"],
+  }
+
+  if profile_path:
+    camoufox_kwargs["persistent_context"] = True
+    camoufox_kwargs["user_data_dir"] = str(profile_path.absolute())
+
+  return camoufox_kwargs
+
+
+def typing_delay_ms(char: str) -> float:
+  """Gaussian (Box-Muller) keystroke delay for a single character."""
+  if char == " ":
+    mu = 60
+  elif char in ".!":
+    mu = 200
+  elif char.isupper():
+    mu = 120
+  else:
+    mu = 90
+
+  sigma = 25
+  u1, u2 = random.random(), random.random()
+  z = math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
+  return max(20, mu + sigma * z)
+
 
 @dataclass
 class RateLimitConfig:
@@ -27,6 +219,21 @@ class RateLimitConfig:
   scroll_speed: int = 2000
   scroll_count: int = 15
   auto_scroll_enabled: bool = True
+  # "fixed": sleep scroll_interval_min..max between scrolls
+  # "adaptive": scroll again as soon as new results rendered (+ jitter)
+  # "fetch": no scrolling, the search's tbm=map request is replayed for the next pages (sync scraper)
+  scroll_mode: str = "fixed"
+  # Adaptive / fetch mode never scrolls or requests a page more often than this (rate ceiling)
+  min_scroll_gap: float = 1.0
+  adaptive_jitter_min: float = 0.2
+  adaptive_jitter_max: float = 0.8
+  # Adaptive mode stops after two scrolls that add no results within this time
+  stall_timeout: float = 4.0
+  # "type": type the query into the search box like a user
+  # "navigate": open /maps/search/<query> directly and wait for results instead of fixed sleeps
+  search_strategy: str = "type"
+  # Navigate strategy: max seconds to wait for the feed / first tbm=map response
+  results_timeout: float = 15.0
 
   def get_search_delay(self) -> float:
     return random.uniform(self.min_search_delay, self.max_search_delay)
@@ -34,38 +241,60 @@ class RateLimitConfig:
   def get_scroll_interval(self) -> float:
     return random.uniform(self.scroll_interval_min, self.scroll_interval_max)
 
+  def get_adaptive_jitter(self) -> float:
+    return random.uniform(self.adaptive_jitter_min, self.adaptive_jitter_max)
+
 
 class AutoScrollManager:
   """Auto-scroll manager with end-of-results detection."""
 
-  def __init__(self, config: RateLimitConfig, page):
+  def __init__(
+    self,
+    config: RateLimitConfig,
+    page,
+    on_step: Callable[[], Any] | None = None,
+    governor: RateGovernor | None = None,
+  ):
     self.config = config
     self.page = page
+    self.on_step = on_step
+    # Shared scroll budget of all workers (see governor.py)
+    self.governor = governor
     self.scrolls_done = 0
 
   def _check_end_of_results(self) -> bool:
     """Checks if end of results has been reached."""
     try:
-      feed = self.page.locator('[role="feed"]')
+      feed = self.page.locator(FEED_SELECTOR).first
       if feed.count() == 0:
         return False
 
-      last_child = feed.evaluate("el => el.lastElementChild")
-      if not last_child:
-        return False
-
-      style = last_child.get_attribute("style")
-      if style and "height: 64px" in style:
+      if feed.evaluate(END_OF_RESULTS_JS):
         print("✓ End of results reached")
         return True
     except Exception:
       pass
     return False
 
+  def _feed_size(self) -> int:
+    try:
+      return self.page.evaluate(FEED_SIZE_JS, FEED_SELECTOR)
+    except PlaywrightError:
+      return 0
+
+  def _wait_for_growth(self, count: int, timeout: float) -> int:
+    """Wait until the feed has more than `count` children. Returns the new size."""
+    try:
+      return self.page.evaluate(WAIT_FOR_FEED_GROWTH_JS, [FEED_SELECTOR, count, int(timeout * 1000)])
+    except PlaywrightError:
+      return count
+
   def _scroll_once(self, speed: int):
     """Performs a single scroll."""
+    if self.governor:
+      self.governor.acquire("scroll")
     try:
-      feed = self.page.locator('[role="feed"]').first
+      feed = self.page.locator(FEED_SELECTOR).first
       if feed.count() > 0:
         feed.evaluate(f"el => el.scrollBy({{top: {speed}, behavior: 'smooth'}})")
       else:
@@ -79,12 +308,20 @@ class AutoScrollManager:
       print("Auto-scroll disabled")
       return 0
 
+    with SCROLL_SECONDS.time(mode=self.config.scroll_mode):
+      if self.config.scroll_mode == "adaptive":
+        return self._scroll_adaptive()
+      return self._scroll_fixed()
+
+  def _scroll_fixed(self) -> int:
+    """Scroll with a random sleep between scrolls."""
     scrolls_done = 0
     max_scrolls = self.config.scroll_count
 
     print(f"Starting auto-scroll ({max_scrolls} max scrolls)")
 
     for scroll_num in range(1, max_scrolls + 1):
+      step_started = time.perf_counter()
       # Check end of results
       if self._check_end_of_results():
         break
@@ -98,11 +335,60 @@ class AutoScrollManager:
       time.sleep(delay)
 
       scrolls_done = scroll_num
+      if self.on_step:
+        self.on_step()
+      SCROLL_STEP_SECONDS.observe(time.perf_counter() - step_started, mode="fixed")
 
     print(f"✓ Auto-scroll completed: {scrolls_done} scrolls")
     self.scrolls_done = scrolls_done
     return scrolls_done
 
+  def _scroll_adaptive(self) -> int:
+    """Scroll again as soon as the previous scroll's results rendered, stop when the feed stops growing."""
+    config = self.config
+    max_scrolls = config.scroll_count
+    size = self._feed_size()
+    stalls = 0
+    scrolls_done = 0
+    last_scroll = 0.0
+
+    print(f"Starting adaptive auto-scroll ({max_scrolls} max scrolls, {size} results)")
+
+    for scroll_num in range(1, max_scrolls + 1):
+      step_started = time.perf_counter()
+      if self._check_end_of_results():
+        break
+
+      # Respect the rate ceiling between scrolls
+      gap = config.min_scroll_gap - (time.monotonic() - last_scroll)
+      if gap > 0:
+        time.sleep(gap)
+
+      self._scroll_once(config.scroll_speed)
+      last_scroll = time.monotonic()
+      scrolls_done = scroll_num
+
+      new_size = self._wait_for_growth(size, config.stall_timeout)
+      if self.on_step:
+        self.on_step()
+      SCROLL_STEP_SECONDS.observe(time.perf_counter() - step_started, mode="adaptive")
+      if new_size > size:
+        print(f"↻ Scroll {scroll_num}/{max_scrolls} | {new_size} results (+{new_size - size})")
+        size = new_size
+        stalls = 0
+      else:
+        stalls += 1
+        print(f"↻ Scroll {scroll_num}/{max_scrolls} | no new results ({stalls}/2)")
+        if stalls >= 2:
+          break
+
+      # Humanized pause after results rendered
+      time.sleep(config.get_adaptive_jitter())
+
+    print(f"✓ Adaptive auto-scroll completed: {scrolls_done} scrolls, {size} results")
+    self.scrolls_done = scrolls_done
+    return scrolls_done
+
 
 class GoogleMapsScraper:
   """Simplified Google Maps scraper with auto-scroll only."""
@@ -110,21 +396,57 @@ class GoogleMapsScraper:
   def __init__(
     self,
     headless: bool = False,
-    rate_limit_config: Optional[RateLimitConfig] = None,
-    profile_path: Optional[str] = None,
+    rate_limit_config: RateLimitConfig | None = None,
+    profile_path: str | None = None,
+    capture: bool = False,
+    on_items: Callable[[list[dict]], Any] | None = None,
+    browser_ws: str | None = None,
+    governor: RateGovernor | None = None,
+    resource_policy: ResourcePolicy | None = None,
+    payload_cache: PayloadCache | None = None,
   ):
     self.headless = headless
     self.rate_limit = rate_limit_config or RateLimitConfig()
+    # Searches / scrolls per minute shared with other workers, slowed down on soft blocks
+    self.governor = governor
+    # Skips tiles, photos, fonts and telemetry in every context (see resource_policy.py)
+    self.resource_blocker = ResourceBlocker(resource_policy) if resource_policy else None
     self.profile_path = Path(profile_path) if profile_path else None
     self.browser = None
     self.context = None
     self.page = None
     self.camoufox = None
+    # Websocket endpoint of a running browser_service.py; only contexts are opened and closed
+    self.browser_ws = browser_ws
+    self._playwright = None
+    # Capture mode: parse tbm=map responses in Python instead of the userscript
+    self.capture = capture
+    self.on_items = on_items
+    # Capture mode: raw response bodies are also kept here for reprocessing
+    self.payload_cache = payload_cache
+    self.current_query = None
+    self.current_query_id = None
+    self.captured = 0
+    self._search_responses = 0
+    # Scrolls done by the last search (per-query stats)
+    self.last_scrolls = 0
+    self._search_box_missing = False
+    # Requests blocked / estimated bytes saved during the last search
+    self.last_blocked = (0, 0)
+    # Latest tbm=map request URL of the current search (replayed in fetch mode)
+    self._search_url = None
+    self._captured_responses = []
 
   def start(self):
-    """Start Camoufox browser with persistent profile."""
+    """Start Camoufox browser with persistent profile (or connect to the browser service)."""
     from camoufox.sync_api import Camoufox
 
+    started = time.monotonic()
+    if self.browser_ws:
+      self._connect()
+      print(f"✓ Browser ready! ({time.monotonic() - started:.1f}s)")
+      return
+
     print("Starting Camoufox...")
 
     # Ensure profile directory exists
@@ -132,26 +454,11 @@ class GoogleMapsScraper:
       self.profile_path.mkdir(parents=True, exist_ok=True)
       print(f"Using profile: {self.profile_path.absolute()}")
 
-    # Start Camoufox with addons
-    import os
-
-    addon_paths = [
-      os.path.abspath("extensions/tampermonkey-5.4.1"),
-    ]
-
-    # Build Camoufox kwargs
-    camoufox_kwargs = {
-      "addons": addon_paths,
-      "headless": self.headless,
-      "humanize": True,
-      "os": ["macos", "windows", "linux"],
-    }
+    # Build Camoufox kwargs (addons + persistent profile); capture mode needs no extension
+    camoufox_kwargs = build_camoufox_kwargs(self.headless, self.profile_path, addons=not self.capture)
 
     # Use persistent context if profile path is specified
     if self.profile_path:
-      camoufox_kwargs["persistent_context"] = True
-      camoufox_kwargs["user_data_dir"] = str(self.profile_path.absolute())
-
       # With persistent context, we get context directly
       self.camoufox = Camoufox(**camoufox_kwargs)
       self.context = self.camoufox.__enter__()
@@ -178,21 +485,13 @@ class GoogleMapsScraper:
       storage_state = None
       if self.profile_path and (self.profile_path / "state.json").exists():
         try:
-          import json
-
           storage_state = json.loads((self.profile_path / "state.json").read_text())
           print("Loaded saved session state")
         except Exception as e:
           print(f"Could not load session state: {e}")
 
       # Create browser context
-      context_kwargs = {
-        "viewport": {"width": 1920, "height": 1080},
-        "device_scale_factor": 1,
-        "locale": "en-US",
-        "timezone_id": "America/New_York",
-        "permissions": ["geolocation"],
-      }
+      context_kwargs = dict(CONTEXT_OPTIONS)
 
       if storage_state:
         context_kwargs["storage_state"] = storage_state
@@ -200,16 +499,128 @@ class GoogleMapsScraper:
       self.context = self.browser.new_context(**context_kwargs)
       self.page = self.context.new_page()
 
+    self._setup_context()
+    self._setup_page(self.page)
+    if self.capture:
+      print("✓ Capturing tbm=map responses")
+
+    print(f"✓ Browser ready! ({time.monotonic() - started:.1f}s)")
+
+  def _connect(self):
+    """Open a fresh context in the long-lived browser served by browser_service.py."""
+    from playwright.sync_api import sync_playwright
+
+    print(f"Connecting to browser service {self.browser_ws}...")
+    self._playwright = sync_playwright().start()
+    self.browser = self._playwright.firefox.connect(self.browser_ws)
+    self.context = self.browser.new_context(**CONTEXT_OPTIONS)
+    self.page = self.context.new_page()
+    self._setup_context()
+    self._setup_page(self.page)
+
+  def _setup_context(self):
+    if self.resource_blocker:
+      self.resource_blocker.install(self.context)
+
+  def _setup_page(self, page):
     # Set timeouts
-    self.page.set_default_navigation_timeout(60000)
-    self.page.set_default_timeout(30000)
+    page.set_default_navigation_timeout(60000)
+    page.set_default_timeout(30000)
+    page.on("response", self._on_response)
 
-    print("✓ Browser ready!")
+  def page_alive(self) -> bool:
+    """False if the tab or its context crashed / was closed."""
+    try:
+      return not self.page.is_closed() and self.page.evaluate("1") == 1
+    except PlaywrightError:
+      return False
+
+  def recycle_page(self, open_maps: bool = True):
+    """Replace the current tab with a fresh one in the same context (frees the old tab's memory)."""
+    old_page = self.page
+    self.page = self.context.new_page()
+    self._setup_page(self.page)
+    try:
+      old_page.close()
+    except PlaywrightError:
+      pass
+    if open_maps:
+      self.page.goto(GOOGLE_MAPS_URL, wait_until="domcontentloaded", timeout=30000)
+
+  def restart_context(self, open_maps: bool = True):
+    """Recover from a broken tab/context.
+
+    With a separate browser (browser service or non-persistent mode) only the
+    context is replaced; a persistent profile context is the browser itself,
+    so that restarts Camoufox.
+    """
+    started = time.monotonic()
+    self._captured_responses = []
+    if self.browser:
+      try:
+        self.context.close()
+      except PlaywrightError:
+        pass
+      self.context = self.browser.new_context(**CONTEXT_OPTIONS)
+      self.page = self.context.new_page()
+      self._setup_context()
+      self._setup_page(self.page)
+    else:
+      self.stop()
+      self.start()
+    if open_maps:
+      self.page.goto(GOOGLE_MAPS_URL, wait_until="domcontentloaded", timeout=30000)
+    print(f"♻️  Browser context restarted ({time.monotonic() - started:.1f}s)")
+
+  def _on_response(self, response):
+    if not is_search_response(response.url):
+      return
+    self._search_responses += 1
+    self._search_url = response.url
+    # Bodies are read later in process_captured(), outside the event callback
+    if self.capture:
+      self._captured_responses.append(response)
+
+  def process_captured(self) -> int:
+    """Parse captured search responses and hand the places to on_items. Returns number of places."""
+    responses, self._captured_responses = self._captured_responses, []
+    total = 0
+    for response in responses:
+      try:
+        body = response.text()
+      except PlaywrightError as e:
+        print(f"Could not read search response: {e}")
+        continue
+
+      if self.payload_cache:
+        try:
+          self.payload_cache.store(body, self.current_query_id, self.current_query, response.url)
+        except Exception as e:
+          print(f"Could not cache search response: {e}")
+
+      try:
+        with CAPTURE_PARSE_SECONDS.time():
+          places = parse_search_response(body)
+      except Exception as e:
+        print(f"Could not parse search response: {e}")
+        continue
+
+      for place in places:
+        place["query"] = self.current_query
+        place["queryId"] = self.current_query_id
+      total += len(places)
+      PLACES_CAPTURED.inc(len(places))
+      if places and self.on_items:
+        self.on_items(places)
+
+    if total:
+      self.captured += total
+      print(f"📦 Captured {total} places (total: {self.captured})")
+    return total
 
   def configure_tampermonkey(self):
     """Open Tampermonkey dashboard and wait for configuration."""
     import os
-    import re
 
     # Check if we should skip configuration
     if os.environ.get("SKIP_TM_CONFIG"):
@@ -218,25 +629,9 @@ class GoogleMapsScraper:
 
     print("\n🔄 Opening Tampermonkey preferences...")
 
-    # Find extension ID from profile directory
+    # Find extension ID from the profile's prefs (cached next to it)
     profile_dir = self.profile_path or Path("./camoufox_profile")
-    ext_id = None
-
-    if profile_dir.exists():
-      for json_file in profile_dir.rglob("*.json"):
-        try:
-          with open(json_file, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-            matches = re.findall(r"moz-extension://([0-9a-f-]+)", content)
-            for match in matches:
-              test_dir = profile_dir / "storage" / "default" / f"moz-extension+++{match}"
-              if test_dir.exists() or "tampermonkey" in content.lower():
-                ext_id = match
-                break
-          if ext_id:
-            break
-        except:
-          continue
+    ext_id = find_extension_uuid(profile_dir, addon_gecko_id(TAMPERMONKEY_PATH))
 
     # Fallback to common ID
     if not ext_id:
@@ -270,21 +665,74 @@ class GoogleMapsScraper:
     print("\n⚠️  Configure Tampermonkey in the browser window, then...")
     input("Press ENTER in terminal to continue to scraper... ")
 
-  def search(self, query: str, wait_for_results: bool = True) -> bool:
-    """Search with human-like behavior."""
-    import math
+  def search(self, query: str, wait_for_results: bool = True, query_id: str | None = None, url: str | None = None) -> bool:
+    """Search with human-like behavior. `query_id` is attached to every place this search produces.
+
+    With `url` (e.g. a map tile from planner.py), or with the "navigate" search strategy, the search URL
+    is opened directly instead of typing `query`.
+    """
+    strategy = "url" if url else self.rate_limit.search_strategy
+    if self.governor:
+      wait = self.governor.acquire("search")
+      if wait >= 1:
+        print(f"🚦 Rate governor: waited {wait:.1f}s")
+    responses_before = self._search_responses
+    with SEARCH_SECONDS.time(strategy=strategy):
+      success = self._search(query, wait_for_results, query_id, url)
+    SEARCHES.inc(strategy=strategy, status="ok" if success else "failed")
+
+    if self.resource_blocker:
+      self.last_blocked = self.resource_blocker.take()
+      blocked, saved = self.last_blocked
+      if blocked:
+        print(f"🚫 Blocked {blocked} requests (~{saved / 1e6:.1f} MB saved)")
+
+    if self.governor and wait_for_results:
+      signal = self.soft_block_signal(responses_before)
+      if signal:
+        slowdown = self.governor.report_block(signal)
+        print(f"🚦 Soft block ({signal}): all workers slowed down x{slowdown:.1f}")
+      else:
+        self.governor.report_success()
+    return success
+
+  def soft_block_signal(self, responses_before: int) -> str | None:
+    """Sign that Google throttles us after a search: "captcha", "no search box" or "empty feed", None if none.
 
+    An empty feed means neither a results list nor any tbm=map response since
+    `responses_before`; a search with no matches still gets its (empty) response.
+    """
+    try:
+      if "/sorry/" in self.page.url or self.page.locator(CAPTCHA_SELECTOR).count() > 0:
+        return "captcha"
+      if self._search_box_missing:
+        return "no search box"
+      # A single match opens the place page instead of a list
+      if "/maps/place/" in self.page.url:
+        return None
+      if self._search_responses == responses_before and self.page.locator(FEED_SELECTOR).count() == 0:
+        return "empty feed"
+    except PlaywrightError:
+      pass
+    return None
+
+  def _search(self, query: str, wait_for_results: bool, query_id: str | None, url: str | None) -> bool:
     print(f"Search: {query}")
+    self.current_query = query
+    self.current_query_id = query_id
+    self.last_scrolls = 0
+    self._search_box_missing = False
+    self._search_url = None
+
+    if url is None and self.rate_limit.search_strategy == "navigate":
+      url = search_url(query)
+    if url:
+      return self._open_search_url(url, wait_for_results)
 
     try:
       # Find search input
-      selectors = [
-        'input[id*="searchboxinput"]',
-        'input[aria-label*="Search"]',
-        'input[name="q"]',
-      ]
       search_input = None
-      for selector in selectors:
+      for selector in SEARCH_INPUT_SELECTORS:
         try:
           input_field = self.page.locator(selector).first
           if input_field.count() > 0:
@@ -296,6 +744,7 @@ class GoogleMapsScraper:
 
       if not search_input:
         print("Search field not found")
+        self._search_box_missing = True
         return False
 
       # Click
@@ -307,21 +756,10 @@ class GoogleMapsScraper:
 
       # Gaussian typing
       for char in query:
-        if char == " ":
-          mu = 60
-        elif char in ".!":
-          mu = 200
-        elif char.isupper():
-          mu = 120
-        else:
-          mu = 90
-
-        sigma = 25
-        u1, u2 = random.random(), random.random()
-        z = math.sqrt(-2 * math.log(u1)) * math.cos(2 * math.pi * u2)
-        delay_ms = max(20, mu + sigma * z)
-
-        search_input.type(char, delay=delay_ms)
+        search_input.type(char, delay=typing_delay_ms(char))
+
+      # Tag results of this search before they start arriving
+      self.page.evaluate(SET_QUERY_ID_JS, query_id)
 
       # Press Enter
       time.sleep(random.uniform(0.5, 1.5))
@@ -331,33 +769,128 @@ class GoogleMapsScraper:
         time.sleep(3)
         self.scroll_results()
 
+      if self.capture:
+        self.process_captured()
+
       return True
 
     except Exception as e:
       print(f"Search error: {e}")
       return False
 
-  def scroll_results(self, scroll_count: Optional[int] = None):
-    """Scroll results using AutoScrollManager."""
-    if scroll_count is not None:
-      original_scroll_count = self.rate_limit.scroll_count
-      self.rate_limit.scroll_count = scroll_count
+  def _wait_for_results(self, responses_before: int, timeout: float) -> bool:
+    """Wait until the results feed is rendered or a tbm=map response arrived."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+      if self._search_responses > responses_before:
+        return True
       try:
-        manager = AutoScrollManager(self.rate_limit, self.page)
-        return manager.scroll_with_config()
-      finally:
-        self.rate_limit.scroll_count = original_scroll_count
+        if self.page.locator(FEED_SELECTOR).count() > 0:
+          return True
+      except PlaywrightError:
+        pass
+      # Also lets Playwright dispatch response events
+      self.page.wait_for_timeout(100)
+    print(f"⚠️  No results within {timeout:.0f}s")
+    return False
+
+  def _open_search_url(self, url: str, wait_for_results: bool) -> bool:
+    try:
+      responses_before = self._search_responses
+      self.page.goto(url, wait_until="domcontentloaded", timeout=30000)
+      # Navigation starts a new document, tag it again
+      self.page.evaluate(SET_QUERY_ID_JS, self.current_query_id)
+
+      if wait_for_results:
+        self._wait_for_results(responses_before, self.rate_limit.results_timeout)
+        self.scroll_results()
+
+      if self.capture:
+        self.process_captured()
+
+      return True
+
+    except Exception as e:
+      print(f"Search error: {e}")
+      return False
+
+  def scroll_results(self, scroll_count: int | None = None):
+    """Scroll results using AutoScrollManager (fetch mode requests the next pages instead)."""
+    on_step = self.process_captured if self.capture else None
+    config = self.rate_limit if scroll_count is None else replace(self.rate_limit, scroll_count=scroll_count)
+    manager = AutoScrollManager(config, self.page, on_step=on_step, governor=self.governor)
+    if config.scroll_mode == "fetch" and config.auto_scroll_enabled:
+      self.last_scrolls = self.fetch_pages(manager)
     else:
-      manager = AutoScrollManager(self.rate_limit, self.page)
-      return manager.scroll_with_config()
+      self.last_scrolls = manager.scroll_with_config()
+    return self.last_scrolls
+
+  def _wait_for_search_url(self, timeout: float) -> str | None:
+    deadline = time.monotonic() + timeout
+    while not self._search_url and time.monotonic() < deadline:
+      # Lets Playwright dispatch response events
+      self.page.wait_for_timeout(100)
+    return self._search_url
+
+  def fetch_pages(self, manager: AutoScrollManager) -> int:
+    """Load the rest of the results by replaying the search's tbm=map request with increasing offsets.
+
+    Each page is requested as an XHR from the page, so capture mode and the
+    userscript see it like a scrolled page, just without scroll and render
+    time. Results embedded in the page (no XHR yet) take one scroll to get a
+    request to replay. Stops at an empty page, the result cap or
+    `scroll_count` pages. Returns the number of pages (scrolls) used.
+    """
+    config = manager.config
+    url = self._wait_for_search_url(config.stall_timeout)
+    scrolls = 0
+    if not url:
+      manager._scroll_once(config.scroll_speed)
+      scrolls = 1
+      url = self._wait_for_search_url(config.stall_timeout)
+    if not url or page_url(url, 0) is None:
+      print("⚠️  No tbm=map request to replay, scrolling instead")
+      fallback = AutoScrollManager(replace(config, scroll_mode="adaptive"), self.page, on_step=manager.on_step, governor=self.governor)
+      return scrolls + fallback.scroll_with_config()
+
+    with SCROLL_SECONDS.time(mode="fetch"):
+      size = page_size(url)
+      offsets = range(page_offset(url) + size, RESULT_CAP, size)[: max(config.scroll_count - scrolls, 0)]
+      pages = 0
+      last_request = 0.0
+      print(f"Fetching up to {len(offsets)} result pages")
+      for offset in offsets:
+        step_started = time.perf_counter()
+        gap = config.min_scroll_gap - (time.monotonic() - last_request)
+        if gap > 0:
+          time.sleep(gap)
+        if self.governor:
+          self.governor.acquire("scroll")
+        last_request = time.monotonic()
+        try:
+          body = self.page.evaluate(FETCH_PAGE_JS, page_url(url, offset))
+          # Capture mode parses the page through the response listener; only count it here
+          places = count_results(body) if body else 0
+        except Exception as e:
+          print(f"⚠️  Results page at offset {offset} failed: {e}")
+          break
+        pages += 1
+        if manager.on_step:
+          manager.on_step()
+        SCROLL_STEP_SECONDS.observe(time.perf_counter() - step_started, mode="fetch")
+        print(f"⇣ Page {pages}/{len(offsets)} | {places} results from offset {offset}")
+        if not places:
+          break
+        time.sleep(config.get_adaptive_jitter())
+
+    print(f"✓ Fetched {pages} result pages")
+    return scrolls + pages
 
   def stop(self):
     """Stop Camoufox and save profile."""
     # Save session state (only needed for non-persistent mode)
     if self.context and self.profile_path and not self.browser:
       try:
-        import json
-
         self.profile_path.mkdir(parents=True, exist_ok=True)
         storage = self.context.storage_state()
         (self.profile_path / "state.json").write_text(json.dumps(storage, indent=2))
@@ -374,6 +907,16 @@ class GoogleMapsScraper:
 
     if self.camoufox:
       self.camoufox.__exit__(None, None, None)
+      self.camoufox = None
+    if self._playwright:
+      # Disconnects only, the browser service keeps running
+      try:
+        self.browser.close()
+      except PlaywrightError:
+        pass
+      self._playwright.stop()
+      self._playwright = None
+    self.context = None
     print("Camoufox closed")
 
 
@@ -398,3 +941,325 @@ def scrape_google_maps(
 
   finally:
     scraper.stop()
+
+
+class AsyncAutoScrollManager:
+  """Asyncio auto-scroll manager, waits with asyncio.sleep so other tabs keep running."""
+
+  def __init__(self, config: RateLimitConfig, page):
+    if config.scroll_mode == "fetch":
+      # Page replay lives in the sync scraper's search loop; falling back to fixed scrolling would hide that
+      raise ValueError('scroll_mode "fetch" is only supported by GoogleMapsScraper; use "fixed" or "adaptive"')
+    self.config = config
+    self.page = page
+    self.scrolls_done = 0
+
+  async def _check_end_of_results(self) -> bool:
+    """Checks if end of results has been reached."""
+    try:
+      feed = self.page.locator(FEED_SELECTOR).first
+      if await feed.count() == 0:
+        return False
+
+      if await feed.evaluate(END_OF_RESULTS_JS):
+        print("✓ End of results reached")
+        return True
+    except PlaywrightError:
+      pass
+    return False
+
+  async def _scroll_once(self, speed: int):
+    """Performs a single scroll."""
+    try:
+      feed = self.page.locator(FEED_SELECTOR).first
+      if await feed.count() > 0:
+        await feed.evaluate(f"el => el.scrollBy({{top: {speed}, behavior: 'smooth'}})")
+      else:
+        await self.page.mouse.wheel(0, speed)
+    except PlaywrightError:
+      pass
+
+  async def _feed_size(self) -> int:
+    try:
+      return await self.page.evaluate(FEED_SIZE_JS, FEED_SELECTOR)
+    except PlaywrightError:
+      return 0
+
+  async def _wait_for_growth(self, count: int, timeout: float) -> int:
+    try:
+      return await self.page.evaluate(WAIT_FOR_FEED_GROWTH_JS, [FEED_SELECTOR, count, int(timeout * 1000)])
+    except PlaywrightError:
+      return count
+
+  async def scroll_with_config(self) -> int:
+    """Performs scrolling according to configuration."""
+    if not self.config.auto_scroll_enabled:
+      print("Auto-scroll disabled")
+      return 0
+
+    with SCROLL_SECONDS.time(mode=self.config.scroll_mode):
+      if self.config.scroll_mode == "adaptive":
+        return await self._scroll_adaptive()
+      return await self._scroll_fixed()
+
+  async def _scroll_fixed(self) -> int:
+    scrolls_done = 0
+    max_scrolls = self.config.scroll_count
+
+    for scroll_num in range(1, max_scrolls + 1):
+      step_started = time.perf_counter()
+      if await self._check_end_of_results():
+        break
+
+      await self._scroll_once(self.config.scroll_speed)
+
+      delay = self.config.get_scroll_interval()
+      await asyncio.sleep(delay)
+
+      scrolls_done = scroll_num
+      SCROLL_STEP_SECONDS.observe(time.perf_counter() - step_started, mode="fixed")
+
+    self.scrolls_done = scrolls_done
+    return scrolls_done
+
+  async def _scroll_adaptive(self) -> int:
+    """Async counterpart of AutoScrollManager._scroll_adaptive."""
+    config = self.config
+    size = await self._feed_size()
+    stalls = 0
+    scrolls_done = 0
+    last_scroll = 0.0
+
+    for scroll_num in range(1, config.scroll_count + 1):
+      step_started = time.perf_counter()
+      if await self._check_end_of_results():
+        break
+
+      gap = config.min_scroll_gap - (time.monotonic() - last_scroll)
+      if gap > 0:
+        await asyncio.sleep(gap)
+
+      await self._scroll_once(config.scroll_speed)
+      last_scroll = time.monotonic()
+      scrolls_done = scroll_num
+
+      new_size = await self._wait_for_growth(size, config.stall_timeout)
+      SCROLL_STEP_SECONDS.observe(time.perf_counter() - step_started, mode="adaptive")
+      if new_size > size:
+        size = new_size
+        stalls = 0
+      else:
+        stalls += 1
+        if stalls >= 2:
+          break
+
+      await asyncio.sleep(config.get_adaptive_jitter())
+
+    self.scrolls_done = scrolls_done
+    return scrolls_done
+
+
+def _discard(task: asyncio.Future):
+  """Cancel a wait that is no longer needed, without 'exception never retrieved' warnings."""
+  task.cancel()
+  if task.done() and not task.cancelled():
+    task.exception()
+
+
+class AsyncGoogleMapsScraper:
+  """Asyncio Google Maps scraper: one event loop drives many tabs of one browser."""
+
+  def __init__(
+    self,
+    headless: bool = False,
+    rate_limit_config: RateLimitConfig | None = None,
+    profile_path: str | None = None,
+  ):
+    self.headless = headless
+    self.rate_limit = rate_limit_config or RateLimitConfig()
+    self.profile_path = Path(profile_path) if profile_path else None
+    self.browser = None
+    self.context = None
+    self.page = None
+    self.camoufox = None
+
+  async def start(self):
+    """Start Camoufox browser with persistent profile."""
+    from camoufox.async_api import AsyncCamoufox
+
+    print("Starting Camoufox (async)...")
+
+    if self.profile_path:
+      self.profile_path.mkdir(parents=True, exist_ok=True)
+      print(f"Using profile: {self.profile_path.absolute()}")
+
+    camoufox_kwargs = build_camoufox_kwargs(self.headless, self.profile_path)
+    self.camoufox = AsyncCamoufox(**camoufox_kwargs)
+
+    if self.profile_path:
+      # With persistent context, we get context directly
+      self.context = await self.camoufox.__aenter__()
+      self.browser = None
+      existing_pages = self.context.pages
+      self.page = existing_pages[0] if existing_pages else await self.context.new_page()
+    else:
+      self.browser = await self.camoufox.__aenter__()
+      self.context = await self.browser.new_context(**CONTEXT_OPTIONS)
+      self.page = await self.context.new_page()
+
+    self._set_timeouts(self.page)
+    print("✓ Browser ready!")
+
+  @staticmethod
+  def _set_timeouts(page):
+    page.set_default_navigation_timeout(60000)
+    page.set_default_timeout(30000)
+
+  async def new_page(self, open_maps: bool = True):
+    """Open a new tab in the shared context, optionally on Google Maps."""
+    page = await self.context.new_page()
+    self._set_timeouts(page)
+    if open_maps:
+      await page.goto(GOOGLE_MAPS_URL, wait_until="domcontentloaded", timeout=30000)
+    return page
+
+  async def search(self, query: str, page=None, wait_for_results: bool = True, query_id: str | None = None) -> bool:
+    """Search with human-like behavior in the given tab (default: main page), tagging results with `query_id`."""
+    strategy = self.rate_limit.search_strategy
+    with SEARCH_SECONDS.time(strategy=strategy):
+      success = await self._search(query, page or self.page, wait_for_results, query_id)
+    SEARCHES.inc(strategy=strategy, status="ok" if success else "failed")
+    return success
+
+  async def _search(self, query: str, page, wait_for_results: bool, query_id: str | None) -> bool:
+    print(f"Search: {query}")
+
+    if self.rate_limit.search_strategy == "navigate":
+      return await self._open_search_url(page, search_url(query), query_id, wait_for_results)
+
+    try:
+      search_input = None
+      for selector in SEARCH_INPUT_SELECTORS:
+        try:
+          input_field = page.locator(selector).first
+          if await input_field.count() > 0:
+            await input_field.wait_for(state="visible", timeout=5000)
+            search_input = input_field
+            break
+        except PlaywrightError:
+          continue
+
+      if not search_input:
+        print("Search field not found")
+        return False
+
+      await search_input.click()
+      await search_input.fill("")
+      await asyncio.sleep(random.uniform(0.3, 0.7))
+
+      # Gaussian typing
+      for char in query:
+        await search_input.type(char, delay=typing_delay_ms(char))
+
+      await page.evaluate(SET_QUERY_ID_JS, query_id)
+
+      await asyncio.sleep(random.uniform(0.5, 1.5))
+      await search_input.press("Enter")
+
+      if wait_for_results:
+        await asyncio.sleep(3)
+        await self.scroll_with_config(page)
+
+      return True
+
+    except Exception as e:
+      print(f"Search error: {e}")
+      return False
+
+  async def _open_search_url(self, page, url: str, query_id: str | None, wait_for_results: bool) -> bool:
+    """Open a search URL and wait for the feed or the first tbm=map response instead of a fixed sleep."""
+    timeout_ms = int(self.rate_limit.results_timeout * 1000)
+    # Listen before navigating, the response can arrive before goto() returns
+    response_wait = asyncio.ensure_future(page.wait_for_event("response", lambda r: is_search_response(r.url), timeout=timeout_ms))
+    try:
+      await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+      await page.evaluate(SET_QUERY_ID_JS, query_id)
+
+      if wait_for_results:
+        feed_wait = asyncio.ensure_future(page.wait_for_selector(FEED_SELECTOR, state="attached", timeout=timeout_ms))
+        done, _ = await asyncio.wait({response_wait, feed_wait}, return_when=asyncio.FIRST_COMPLETED)
+        if all(task.exception() for task in done):
+          print(f"⚠️  No results within {self.rate_limit.results_timeout:.0f}s")
+        _discard(feed_wait)
+        await self.scroll_with_config(page)
+
+      return True
+
+    except Exception as e:
+      print(f"Search error: {e}")
+      return False
+    finally:
+      _discard(response_wait)
+
+  async def scroll_with_config(self, page=None, scroll_count: int | None = None) -> int:
+    """Scroll results in the given tab using AsyncAutoScrollManager."""
+    config = self.rate_limit
+    if scroll_count is not None:
+      # Copy instead of mutating: other tabs share self.rate_limit concurrently
+      config = replace(config, scroll_count=scroll_count)
+    manager = AsyncAutoScrollManager(config, page or self.page)
+    return await manager.scroll_with_config()
+
+  async def stop(self):
+    """Stop Camoufox."""
+    if self.context:
+      try:
+        await self.context.close()
+      except PlaywrightError:
+        pass
+
+    if self.camoufox:
+      await self.camoufox.__aexit__(None, None, None)
+    print("Camoufox closed")
+
+
+async def scrape_google_maps_async(
+  search_queries: list[str],
+  headless: bool = False,
+  profile_path: str = "./camoufox_profile",
+  tabs: int = 3,
+  rate_limit_config: RateLimitConfig | None = None,
+) -> dict[str, bool]:
+  """Async interface for scraping: keeps up to `tabs` searches in flight at once.
+
+  Returns a mapping of query -> success.
+  """
+  scraper = AsyncGoogleMapsScraper(headless=headless, rate_limit_config=rate_limit_config, profile_path=profile_path)
+  results: dict[str, bool] = {}
+
+  try:
+    await scraper.start()
+
+    pages = asyncio.Queue()
+    await scraper.page.goto(GOOGLE_MAPS_URL, wait_until="domcontentloaded", timeout=30000)
+    pages.put_nowait(scraper.page)
+    for _ in range(max(1, min(tabs, len(search_queries))) - 1):
+      pages.put_nowait(await scraper.new_page())
+
+    async def run_query(i: int, query: str):
+      page = await pages.get()
+      try:
+        print(f"[{i}/{len(search_queries)}] {query}")
+        results[query] = await scraper.search(query, page=page)
+        # Per-tab delay before this tab takes the next query
+        await asyncio.sleep(scraper.rate_limit.get_search_delay())
+      finally:
+        pages.put_nowait(page)
+
+    await asyncio.gather(*(run_query(i, query) for i, query in enumerate(search_queries, 1)))
+    print("\nDone!")
+
+  finally:
+    await scraper.stop()
+
+  return results
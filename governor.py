@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate governor shared by all scraper processes.
+
+Searches and scrolls each draw from a token bucket kept in a small SQLite
+file, so every main.py worker, run and profile pointed at the same file
+shares one budget of searches / scrolls per minute instead of each picking
+its own random delay. The governor also adapts: a soft-block signal after a
+search (captcha, missing search box, empty feed) multiplies a shared
+slowdown factor that divides every rate, and each successful search eases
+it back towards 1.
+
+Usage:
+    uv run python main.py queries.csv --workers 4 --governor scrapka_governor.db --searches-per-minute 8
+
+    # Current slowdown and buckets
+    uv run python governor.py status scrapka_governor.db
+
+    # Back to full speed (e.g. after solving a captcha by hand)
+    uv run python governor.py reset scrapka_governor.db
+"""
+
+import argparse
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import metrics
+
+SLOWDOWN = metrics.gauge("scrapka_governor_slowdown", "Rate governor slowdown factor (1 = full speed)")
+SOFT_BLOCKS = metrics.counter("scrapka_soft_blocks_total", "Soft-block signals seen after searches", ["signal"])
+GOVERNOR_WAIT_SECONDS = metrics.histogram("scrapka_governor_wait_seconds", "Time waiting for a rate governor token", ["bucket"])
+
+
+class RateGovernor:
+  """Token buckets plus an adaptive slowdown factor in a SQLite file shared by processes.
+
+  `rates` is tokens per second per bucket at full speed. A token is reserved
+  inside one write transaction and the caller then sleeps until it is due, so
+  concurrent workers queue up instead of polling.
+  """
+
+  def __init__(
+    self,
+    path: str,
+    rates: dict[str, float],
+    burst: float = 1.0,
+    backoff: float = 2.0,
+    recovery: float = 0.9,
+    max_slowdown: float = 16.0,
+  ):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self.rates = rates
+    # Tokens a bucket can save up while idle
+    self.burst = burst
+    # Slowdown multiplier per soft block / per successful search
+    self.backoff = backoff
+    self.recovery = recovery
+    self.max_slowdown = max_slowdown
+    # Transactions are managed explicitly (BEGIN IMMEDIATE)
+    self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+    self._conn.row_factory = sqlite3.Row
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(
+      """
+      CREATE TABLE IF NOT EXISTS buckets (
+        name TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL
+      );
+      CREATE TABLE IF NOT EXISTS health (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        slowdown REAL NOT NULL,
+        blocks INTEGER NOT NULL DEFAULT 0,
+        last_signal TEXT,
+        last_block_at REAL
+      );
+      INSERT OR IGNORE INTO health (id, slowdown) VALUES (1, 1.0);
+      """
+    )
+
+  def close(self):
+    self._conn.close()
+
+  @contextmanager
+  def _transaction(self):
+    """Write transaction; other processes wait on the SQLite lock."""
+    self._conn.execute("BEGIN IMMEDIATE")
+    try:
+      yield
+    except BaseException:
+      self._conn.execute("ROLLBACK")
+      raise
+    self._conn.execute("COMMIT")
+
+  def _slowdown(self) -> float:
+    return self._conn.execute("SELECT slowdown FROM health WHERE id = 1").fetchone()["slowdown"]
+
+  def reserve(self, bucket: str) -> float:
+    """Take one token from `bucket`. Returns seconds to wait before using it."""
+    with self._transaction():
+      now = time.time()
+      slowdown = self._slowdown()
+      rate = self.rates[bucket] / slowdown
+      row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (bucket,)).fetchone()
+      tokens = min(self.burst, row["tokens"] + (now - row["updated"]) * rate) if row else self.burst
+      # May go negative: later callers queue behind the tokens already promised
+      tokens -= 1
+      self._conn.execute(
+        """
+        INSERT INTO buckets (name, tokens, updated) VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated
+        """,
+        (bucket, tokens, now),
+      )
+    SLOWDOWN.set(slowdown)
+    return -tokens / rate if tokens < 0 else 0.0
+
+  def acquire(self, bucket: str) -> float:
+    """Wait for a token from `bucket`. Returns the seconds waited."""
+    wait = self.reserve(bucket)
+    if wait > 0:
+      time.sleep(wait)
+    GOVERNOR_WAIT_SECONDS.observe(wait, bucket=bucket)
+    return wait
+
+  def report_block(self, signal: str) -> float:
+    """Slow every worker down after a soft-block signal. Returns the new slowdown."""
+    with self._transaction():
+      slowdown = min(self.max_slowdown, self._slowdown() * self.backoff)
+      self._conn.execute(
+        "UPDATE health SET slowdown = ?, blocks = blocks + 1, last_signal = ?, last_block_at = ? WHERE id = 1",
+        (slowdown, signal, time.time()),
+      )
+      # Saved-up tokens are spent, refill time included: the next request waits a full (slower) interval
+      self._conn.execute("UPDATE buckets SET tokens = MIN(tokens, 0), updated = ?", (time.time(),))
+    SLOWDOWN.set(slowdown)
+    SOFT_BLOCKS.inc(signal=signal)
+    return slowdown
+
+  def report_success(self) -> float:
+    """Speed back up a little after a search without soft-block signals. Returns the new slowdown."""
+    with self._transaction():
+      slowdown = max(1.0, self._slowdown() * self.recovery)
+      self._conn.execute("UPDATE health SET slowdown = ? WHERE id = 1", (slowdown,))
+    SLOWDOWN.set(slowdown)
+    return slowdown
+
+  def reset(self):
+    """Full speed and full buckets."""
+    with self._transaction():
+      self._conn.execute("UPDATE health SET slowdown = 1.0")
+      self._conn.execute("DELETE FROM buckets")
+    SLOWDOWN.set(1.0)
+
+  def status(self) -> dict:
+    health = dict(self._conn.execute("SELECT slowdown, blocks, last_signal, last_block_at FROM health WHERE id = 1").fetchone())
+    now = time.time()
+    buckets = {}
+    for row in self._conn.execute("SELECT name, tokens, updated FROM buckets ORDER BY name"):
+      buckets[row["name"]] = {"tokens": round(row["tokens"], 2), "idle": round(now - row["updated"], 1)}
+    return {**health, "buckets": buckets}
+
+
+def per_minute(searches: float, scrolls: float) -> dict[str, float]:
+  """Bucket rates (per second) from searches / scrolls per minute."""
+  return {"search": searches / 60, "scroll": scrolls / 60}
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description="Shared rate governor of main.py workers (--governor)",
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  # Slowdown factor, soft blocks seen and bucket levels
+  uv run python governor.py status scrapka_governor.db
+
+  # Clear the slowdown after solving a captcha
+  uv run python governor.py reset scrapka_governor.db
+        """,
+  )
+  commands = parser.add_subparsers(dest="command", required=True)
+  for command, description in (("status", "Show slowdown and buckets"), ("reset", "Back to full speed")):
+    command_parser = commands.add_parser(command, help=description)
+    command_parser.add_argument("path", help="Governor database (main.py --governor)")
+
+  args = parser.parse_args()
+
+  governor = RateGovernor(args.path, rates={})
+  try:
+    if args.command == "reset":
+      governor.reset()
+      print(f"✓ {args.path}: back to full speed")
+      return
+
+    status = governor.status()
+    print(f"🚦 Slowdown: x{status['slowdown']:.2f} ({status['blocks']} soft blocks)")
+    if status["last_signal"]:
+      ago = time.time() - status["last_block_at"]
+      print(f"   Last signal: {status['last_signal']} ({ago / 60:.0f} min ago)")
+    for name, bucket in status["buckets"].items():
+      print(f"   {name}: {bucket['tokens']} tokens, last used {bucket['idle']}s ago")
+  finally:
+    governor.close()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,204 @@
+"""
+Lease-based work queue of main.py queries, served by server.py (--jobs).
+
+The coordinator loads the query grid once into a SQLite file; scraper nodes
+(`main.py --coordinator URL`) lease one query at a time, scrape it and report
+it complete or failed. A lease that isn't reported within `lease_seconds`
+(node crashed, lost its network, ...) expires and the query goes back to the
+queue. Each lease counts as an attempt: failed and expired queries are retried
+after a backoff until `max_attempts`, then stay failed.
+
+Every lease carries a random token, so a late report from a node whose lease
+already expired is ignored instead of finishing a query another node holds.
+The queue file survives restarts: loading the same grid again only adds
+queries it doesn't have, so completed ones are not scraped twice.
+
+Usage:
+    # Coordinator
+    uv run python server.py --host 0.0.0.0 --jobs queries.csv
+
+    # On every scraper node
+    uv run python main.py --coordinator http://coordinator:8080 --capture --headless
+
+    # Queue depth and progress
+    curl http://coordinator:8080/api/jobs
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from journal import query_id, retry_backoff
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+  """Queries handed out to scraper nodes under time-limited leases."""
+
+  def __init__(self, path: str, lease_seconds: float = 600.0, max_attempts: int = 3, retry_base: float = 30.0):
+    self.lease_seconds = lease_seconds
+    self.max_attempts = max_attempts
+    self.retry_base = retry_base
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    # Shared by the processes of server.py --workers
+    self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    self._conn.row_factory = sqlite3.Row
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute(
+      """
+      CREATE TABLE IF NOT EXISTS jobs (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT NOT NULL UNIQUE,
+        query TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        not_before REAL NOT NULL DEFAULT 0,
+        worker TEXT,
+        lease TEXT,
+        lease_expires REAL,
+        error TEXT,
+        result TEXT,
+        updated_at REAL NOT NULL
+      )
+      """
+    )
+    self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, not_before)")
+    # One connection for the server's request threads
+    self._lock = threading.Lock()
+
+  def close(self):
+    self._conn.close()
+
+  @contextmanager
+  def _transaction(self):
+    # BEGIN IMMEDIATE: two processes never lease the same job
+    with self._lock:
+      self._conn.execute("BEGIN IMMEDIATE")
+      try:
+        yield self._conn
+      except BaseException:
+        self._conn.execute("ROLLBACK")
+        raise
+      self._conn.execute("COMMIT")
+
+  def load(self, queries: list[dict]) -> int:
+    """Add queries not in the queue yet (by query ID). Returns how many were added."""
+    now = time.time()
+    with self._transaction() as conn:
+      before = conn.total_changes
+      conn.executemany(
+        "INSERT OR IGNORE INTO jobs (job_id, query, payload, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+        [(query_id(q), q["query"], json.dumps(q, ensure_ascii=False), PENDING, now) for q in queries],
+      )
+      return conn.total_changes - before
+
+  def _retry_or_fail(self, conn: sqlite3.Connection, row: sqlite3.Row, error: str, now: float) -> str:
+    """Put a job whose attempt ended without success back in the queue, or fail it for good."""
+    if row["attempts"] >= self.max_attempts:
+      status, not_before = FAILED, 0.0
+    else:
+      status, not_before = PENDING, now + retry_backoff(row["attempts"], base=self.retry_base)
+    conn.execute(
+      "UPDATE jobs SET status = ?, not_before = ?, lease = NULL, lease_expires = NULL, error = ?, updated_at = ? WHERE job_id = ?",
+      (status, not_before, error, now, row["job_id"]),
+    )
+    return status
+
+  def _expire(self, conn: sqlite3.Connection, now: float) -> int:
+    expired = conn.execute("SELECT job_id, attempts FROM jobs WHERE status = ? AND lease_expires <= ?", (LEASED, now)).fetchall()
+    for row in expired:
+      self._retry_or_fail(conn, row, "lease expired", now)
+    return len(expired)
+
+  def lease(self, worker: str) -> dict | None:
+    """Lease the oldest ready job to `worker`. None if no job is ready right now."""
+    now = time.time()
+    with self._transaction() as conn:
+      self._expire(conn, now)
+      row = conn.execute(
+        "SELECT job_id, payload, attempts FROM jobs WHERE status = ? AND not_before <= ? ORDER BY seq LIMIT 1",
+        (PENDING, now),
+      ).fetchone()
+      if row is None:
+        return None
+      lease = secrets.token_hex(8)
+      conn.execute(
+        "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, lease = ?, lease_expires = ?, updated_at = ? WHERE job_id = ?",
+        (LEASED, worker, lease, now + self.lease_seconds, now, row["job_id"]),
+      )
+    return {
+      "job_id": row["job_id"],
+      "lease": lease,
+      "lease_seconds": self.lease_seconds,
+      "attempt": row["attempts"] + 1,
+      "q": json.loads(row["payload"]),
+    }
+
+  def _finish(self, job_id: str, lease: str, finish) -> str | None:
+    """Run `finish(conn, row, now)` if `lease` still holds the job. Returns its status, None for a stale lease."""
+    now = time.time()
+    with self._transaction() as conn:
+      row = conn.execute(
+        "SELECT job_id, attempts FROM jobs WHERE job_id = ? AND status = ? AND lease = ? AND lease_expires > ?",
+        (job_id, LEASED, lease, now),
+      ).fetchone()
+      return finish(conn, row, now) if row is not None else None
+
+  def complete(self, job_id: str, lease: str, result: dict | None = None) -> str | None:
+    """Mark a leased job done, with the node's stats. None if the lease expired or was replaced."""
+
+    def finish(conn, row, now):
+      conn.execute(
+        "UPDATE jobs SET status = ?, lease = NULL, lease_expires = NULL, error = NULL, result = ?, updated_at = ? WHERE job_id = ?",
+        (DONE, json.dumps(result or {}), now, job_id),
+      )
+      return DONE
+
+    return self._finish(job_id, lease, finish)
+
+  def fail(self, job_id: str, lease: str, error: str = "search failed") -> str | None:
+    """Report a failed attempt: back to the queue after a backoff, or failed after max_attempts."""
+    return self._finish(job_id, lease, lambda conn, row, now: self._retry_or_fail(conn, row, error, now))
+
+  def progress(self) -> dict:
+    """Queue depth, counts per status and the leases currently out."""
+    now = time.time()
+    with self._transaction() as conn:
+      self._expire(conn, now)
+      counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+      counts.update({row["status"]: row["count"] for row in conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status")})
+      ready = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ? AND not_before <= ?", (PENDING, now)).fetchone()[0]
+      leases = [
+        {
+          "job_id": row["job_id"],
+          "query": row["query"],
+          "worker": row["worker"],
+          "attempt": row["attempts"],
+          "expires_in": round(row["lease_expires"] - now, 1),
+        }
+        for row in conn.execute("SELECT job_id, query, worker, attempts, lease_expires FROM jobs WHERE status = ? ORDER BY lease_expires", (LEASED,))
+      ]
+      completed_by = {
+        row["worker"]: row["count"] for row in conn.execute("SELECT worker, COUNT(*) AS count FROM jobs WHERE status = ? GROUP BY worker", (DONE,))
+      }
+    total = sum(counts.values())
+    return {
+      "total": total,
+      **counts,
+      # Still to scrape: waiting (some in retry backoff) or out on a lease
+      "depth": counts[PENDING] + counts[LEASED],
+      "ready": ready,
+      "progress": round((counts[DONE] + counts[FAILED]) / total, 4) if total else 1.0,
+      "finished": counts[PENDING] + counts[LEASED] == 0,
+      "leases": leases,
+      "completed_by": completed_by,
+    }
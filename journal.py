@@ -0,0 +1,152 @@
+"""
+Persistent journal of query progress for resumable main.py runs.
+
+Each query from parse_csv is keyed by its (search, city, country) tuple and
+moves through in_progress -> completed / failed. The journal is a small
+SQLite file so several worker processes can update it at once. It also keeps
+per-query coverage stats (results, new places, scrolls, wall time) under the
+query ID that is attached to every stored row.
+"""
+
+import hashlib
+import random
+import sqlite3
+import time
+from pathlib import Path
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def query_key(q: dict) -> tuple[str, str, str]:
+  """Journal key of a query dict produced by parse_csv (tile queries from planner.py include their tile)."""
+  city = f"{q['city']} @{q['tile']}" if q.get("tile") else q["city"]
+  return (q["search"], city, q.get("country", "") or "")
+
+
+def query_id(q: dict) -> str:
+  """Short stable ID of a query, stored with every place it produced (queryId column)."""
+  return hashlib.sha1("|".join(query_key(q)).encode("utf-8")).hexdigest()[:12]
+
+
+def retry_backoff(attempt: int, base: float = 30.0, cap: float = 600.0) -> float:
+  """Exponential backoff with jitter before retry number `attempt` (1-based)."""
+  delay = min(cap, base * 2 ** (attempt - 1))
+  return delay * random.uniform(0.75, 1.25)
+
+
+# Coverage stats columns added to the queries table
+STATS_COLUMNS = {
+  "query_id": "TEXT",
+  "results": "INTEGER",
+  "new_places": "INTEGER",
+  "scrolls": "INTEGER",
+  "wall_time": "REAL",
+}
+
+
+class QueryJournal:
+  """SQLite-backed record of completed, failed and in-progress queries."""
+
+  def __init__(self, path: str):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._conn = sqlite3.connect(self.path, timeout=30)
+    self._conn.row_factory = sqlite3.Row
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(
+      """
+      CREATE TABLE IF NOT EXISTS queries (
+        search TEXT NOT NULL,
+        city TEXT NOT NULL,
+        country TEXT NOT NULL,
+        query TEXT,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        started_at REAL,
+        finished_at REAL,
+        PRIMARY KEY (search, city, country)
+      );
+      """
+    )
+    # Journals from before coverage stats get the new columns
+    existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(queries)")}
+    for col, col_type in STATS_COLUMNS.items():
+      if col not in existing:
+        self._conn.execute(f"ALTER TABLE queries ADD COLUMN {col} {col_type}")
+    self._conn.execute("CREATE INDEX IF NOT EXISTS idx_queries_query_id ON queries(query_id)")
+    self._conn.commit()
+
+  def close(self):
+    self._conn.close()
+
+  def _set(self, q: dict, status: str, **fields):
+    search, city, country = query_key(q)
+    columns = ["status", *fields]
+    with self._conn:
+      self._conn.execute(
+        f"""
+        INSERT INTO queries (search, city, country, query, {", ".join(columns)})
+        VALUES (?, ?, ?, ?, {", ".join("?" for _ in columns)})
+        ON CONFLICT (search, city, country) DO UPDATE SET
+          {", ".join(f"{col} = excluded.{col}" for col in columns)}
+        """,
+        (search, city, country, q.get("query"), status, *fields.values()),
+      )
+
+  def start(self, q: dict):
+    """Mark a query as in progress and count the attempt."""
+    self._set(q, IN_PROGRESS, started_at=time.time(), query_id=query_id(q))
+    search, city, country = query_key(q)
+    with self._conn:
+      self._conn.execute(
+        "UPDATE queries SET attempts = attempts + 1 WHERE search = ? AND city = ? AND country = ?",
+        (search, city, country),
+      )
+
+  def complete(self, q: dict):
+    self._set(q, COMPLETED, finished_at=time.time(), last_error=None)
+
+  def fail(self, q: dict, error: str = ""):
+    self._set(q, FAILED, finished_at=time.time(), last_error=error)
+
+  def record_stats(self, query_id: str, **stats):
+    """Store coverage stats of a query (keys from STATS_COLUMNS); None values are left unchanged."""
+    stats = {col: value for col, value in stats.items() if value is not None}
+    unknown = set(stats) - set(STATS_COLUMNS)
+    if unknown:
+      raise ValueError(f"Unknown stats: {', '.join(sorted(unknown))}")
+    if not stats:
+      return
+    with self._conn:
+      self._conn.execute(
+        f"UPDATE queries SET {', '.join(f'{col} = ?' for col in stats)} WHERE query_id = ?",
+        (*stats.values(), query_id),
+      )
+
+  def coverage(self, query_ids: list[str] | None = None) -> list[dict]:
+    """Stats of completed queries (optionally only the given IDs), lowest yield first."""
+    rows = self._conn.execute(
+      """
+      SELECT search, city, query, query_id, results, new_places, scrolls, wall_time FROM queries
+      WHERE status = ? ORDER BY COALESCE(new_places, results, 0), search, city
+      """,
+      (COMPLETED,),
+    )
+    wanted = set(query_ids) if query_ids is not None else None
+    return [dict(row) for row in rows if wanted is None or row["query_id"] in wanted]
+
+  def statuses(self) -> dict[tuple[str, str, str], str]:
+    rows = self._conn.execute("SELECT search, city, country, status FROM queries")
+    return {(row["search"], row["city"], row["country"]): row["status"] for row in rows}
+
+  def pending(self, queries: list[dict]) -> list[dict]:
+    """Queries not completed yet: new, failed, or interrupted while in progress."""
+    statuses = self.statuses()
+    return [q for q in queries if statuses.get(query_key(q)) != COMPLETED]
+
+  def summary(self) -> dict[str, int]:
+    rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM queries GROUP BY status")
+    return {row["status"]: row["n"] for row in rows}
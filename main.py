@@ -3,7 +3,8 @@
 Scrapka - Google Maps Scraper (Camoufox + Auto-scroll)
 
 Opens Google Maps and auto-scrolls through search results.
-Data is captured by the Tampermonkey script and sent to the local server.
+Data is captured by the Tampermonkey script and sent to the local server,
+or with --capture parsed from the network responses and saved directly.
 
 Generates ALL COMBINATIONS of search terms × cities (many-to-many).
 
@@ -14,6 +15,9 @@ Usage:
     # Run scraper with CSV file
     uv run python main.py queries.csv
 
+    # Or as one of several nodes taking queries from server.py --jobs
+    uv run python main.py --coordinator http://coordinator:8080 --capture --headless
+
 CSV Format:
     search,city,country
     медичний центр,київ,ua
@@ -24,108 +28,689 @@ Example: 3 search terms × 3 cities = 9 total queries
 """
 
 import argparse
-import csv
+import itertools
+import multiprocessing
+import os
+import queue
 import random
+import shutil
+import socket
 import time
+from collections import Counter, deque
 from pathlib import Path
 
+import metrics
+from browser_service import TabRecycler, camoufox_rss_mb
 from google_maps_scraper import GoogleMapsScraper, RateLimitConfig
+from governor import RateGovernor, per_minute
+from journal import QueryJournal, query_id, query_key, retry_backoff
+from maps_parser import RESULT_CAP
+from payload_cache import PayloadCache
+from planner import BboxResolver, TilePlanner
+from queries import parse_csv
+from resource_policy import POLICIES
+from scheduler import RefreshScheduler, describe
+from server_client import ServerClient
+from shards import SQLITE_SUFFIXES
+from storage import open_writer
+
+
+def build_rate_config(args) -> RateLimitConfig:
+  """Build rate limit config from CLI arguments."""
+  return RateLimitConfig(
+    min_search_delay=args.min_delay,
+    max_search_delay=args.max_delay,
+    scroll_count=args.scrolls,
+    scroll_speed=args.scroll_speed,
+    scroll_interval_min=args.scroll_interval_min,
+    scroll_interval_max=args.scroll_interval_max,
+    auto_scroll_enabled=not args.no_auto_scroll,
+    scroll_mode=args.scroll_mode,
+    min_scroll_gap=args.min_scroll_gap,
+    search_strategy=args.search_strategy,
+    results_timeout=args.results_timeout,
+  )
+
+
+def build_governor(args) -> RateGovernor | None:
+  """Rate governor shared by all workers and runs using the same --governor file (None unless set)."""
+  if not args.governor:
+    return None
+  return RateGovernor(args.governor, per_minute(args.searches_per_minute, args.scrolls_per_minute))
+
+
+def search_delay(rate_config: RateLimitConfig, governor: RateGovernor | None) -> float:
+  """Pause after a search. With a governor it sets the pace, only --min-delay is kept for the userscript's last batch."""
+  return rate_config.min_search_delay if governor else rate_config.get_search_delay()
+
+
+def open_payload_cache(args) -> PayloadCache | None:
+  """Cache of raw tbm=map bodies that capture mode keeps next to the output (None unless --payload-cache)."""
+  if not (args.capture and args.payload_cache):
+    return None
+  print(f"📦 Raw responses cached in {args.payload_cache}")
+  return PayloadCache(args.payload_cache)
+
+
+def open_capture_writer(args):
+  """Open the storage that capture mode writes to (None when not capturing).
+
+  Workers share it, so it's SQLite with --workers: new vs duplicate places are
+  decided over all workers' rows, which the tile planner and refresh scheduler rely on.
+  """
+  if not args.capture:
+    return None
+  print(f"💾 Capture output: {args.output}")
+  return open_writer(args.output)
+
+
+WORKER_BROWSER_MEMORY_MB = metrics.gauge("scrapka_worker_browser_memory_mb", "Resident memory of this scraper's Camoufox processes")
+QUERY_SECONDS = metrics.histogram("scrapka_query_seconds", "Wall time per query, from search to stats")
+
+
+def push_metrics(client: ServerClient | None, worker: str):
+  """Send this process's metrics to the server (shown on its /metrics with a worker label)."""
+  if not client:
+    return
+  WORKER_BROWSER_MEMORY_MB.set(camoufox_rss_mb(os.getpid()))
+  client.push_metrics(worker, metrics.REGISTRY.snapshot())
+
+
+def maintain_browser(scraper: GoogleMapsScraper, recycler: TabRecycler, success: bool):
+  """Between queries: restart a broken context, or recycle a tab that did enough queries / uses too much memory."""
+  recycler.record_query()
+  try:
+    if not success and not scraper.page_alive():
+      print("⚠️  Tab is broken, restarting its context")
+      scraper.restart_context()
+      recycler.reset()
+    else:
+      reason = recycler.should_recycle()
+      if reason:
+        print(f"♻️  Recycling tab after {reason}")
+        scraper.recycle_page()
+        recycler.reset()
+  except Exception as e:
+    print(f"⚠️  Could not recycle browser tab: {e}")
+
+
+def build_planner(args) -> TilePlanner | None:
+  """Tile planner from CLI arguments (None unless --tiles)."""
+  if not args.tiles:
+    return None
+  return TilePlanner(
+    BboxResolver(args.bbox_cache),
+    grid=args.tile_grid,
+    max_depth=args.tile_depth,
+    min_new=args.tile_min_new,
+  )
 
 
-def parse_csv(csv_file: str) -> list[dict]:
-  """Parse CSV and generate all combinations of search terms × cities."""
-  csv_path = Path(csv_file)
-  if not csv_path.exists():
-    raise FileNotFoundError(f"CSV not found: {csv_file}")
-
-  # Collect unique search terms and cities
-  search_terms = set()
-  cities = {}  # city -> country mapping
-
-  with open(csv_path, "r", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-      search = row.get("search", "").strip()
-      city = row.get("city", "").strip()
-      country = row.get("country", "").strip()
-
-      if search:
-        search_terms.add(search)
-      if city:
-        # Store city with its country (first occurrence wins if duplicates)
-        if city not in cities:
-          cities[city] = country
-
-  if not search_terms:
-    raise ValueError("No search terms found in CSV")
-  if not cities:
-    raise ValueError("No cities found in CSV")
-
-  # Generate all combinations: search × city
-  queries = []
-  for search in sorted(search_terms):
-    for city, country in sorted(cities.items()):
-      query = f"{search} {city}"
-      queries.append(
+def describe_query(q: dict) -> str:
+  location = f" ({q['city']}, {q['country']})" if q["city"] or q["country"] else ""
+  if q.get("tile"):
+    location += f" [tile {q['tile']}, depth {q['depth']}]"
+  return f"{q['query']}{location}"
+
+
+def record_query_stats(journal: QueryJournal, scraper: GoogleMapsScraper, writer, client, q: dict, elapsed: float, places: int) -> dict:
+  """Store coverage stats of a finished query and return them.
+
+  Capture mode counts results / new places from the local writer; otherwise
+  the server counts them and scrolls and wall time are reported to it.
+  Call this a few seconds after the search so the userscript's last batch
+  has reached the server.
+  """
+  qid = query_id(q)
+  stats = {"scrolls": scraper.last_scrolls, "wall_time": round(elapsed, 1)}
+  if writer:
+    # SQLite decides new vs duplicate when rows are written
+    writer.flush()
+    stats["results"] = places
+    stats["new_places"] = writer.query_stats.get(qid, {}).get("new", 0)
+  elif client:
+    # Counts only need the rows written, not an fsync of every shard per query
+    client.flush(sync=False)
+    summary = client.report_query(qid, query=q["query"], **stats)
+    if summary:
+      stats["results"] = summary["received"]
+      stats["new_places"] = summary["new"]
+  journal.record_stats(qid, **stats)
+  return stats
+
+
+def sync_server_stats(journal: QueryJournal, client: ServerClient | None):
+  """Copy per-query received / new counts from the server into the journal."""
+  if not client:
+    return
+  for entry in client.query_stats():
+    journal.record_stats(entry["queryId"], results=entry["received"], new_places=entry["new"])
+
+
+def print_coverage(journal: QueryJournal, results: list[dict], planner: TilePlanner | None = None):
+  """List queries that found nothing or hit the result cap (candidates to drop or split)."""
+  coverage = journal.coverage(list({r["query_id"] for r in results}))
+  if not coverage:
+    return
+  zero = [row for row in coverage if not row["results"]]
+  capped = [row for row in coverage if (row["results"] or 0) >= RESULT_CAP]
+
+  new_places = sum(row["new_places"] or 0 for row in coverage)
+  browser_minutes = sum(row["wall_time"] or 0 for row in coverage) / 60
+  print(f"New places: {new_places} from {len(coverage)} completed queries")
+  if browser_minutes > 0:
+    print(f"Yield:      {new_places / browser_minutes:.1f} new places per browser-minute")
+  if planner:
+    print(f"Tiles:      {planner.split} split, {planner.pruned} capped but pruned (few new places)")
+  if zero:
+    print(f"No results ({len(zero)}): " + ", ".join(f"{row['search']} {row['city']}" for row in zero[:10]) + (" ..." if len(zero) > 10 else ""))
+  if capped:
+    print(f"Hit the {RESULT_CAP}-result cap ({len(capped)}):")
+    for row in capped[:10]:
+      print(f"  {row['search']} {row['city']}: {row['results']} results, {row['new_places'] or 0} new")
+
+
+# Seconds between asking the coordinator again when no query is ready (others are leased or backing off)
+JOB_POLL_SECONDS = 15.0
+# Give up on a coordinator that stays unreachable this long
+COORDINATOR_TIMEOUT = 300.0
+
+
+def lease_next(coordinator: ServerClient, worker: str, tag: str) -> dict | None:
+  """Next leased job from the coordinator; waits while none is ready. None once the queue is finished."""
+  unreachable_since = None
+  while True:
+    response = coordinator.next_job(worker)
+    if response is None:
+      unreachable_since = unreachable_since or time.monotonic()
+      if time.monotonic() - unreachable_since > COORDINATOR_TIMEOUT:
+        print(f"{tag} ❌ Coordinator unreachable for {COORDINATOR_TIMEOUT:.0f}s, stopping")
+        return None
+    elif response["job"] is not None:
+      return response["job"]
+    elif response["finished"]:
+      return None
+    else:
+      unreachable_since = None
+      print(f"{tag} ⏳ No query ready ({response['depth']} leased or backing off), asking again in {JOB_POLL_SECONDS:.0f}s")
+    time.sleep(JOB_POLL_SECONDS)
+
+
+def report_job(coordinator: ServerClient, job: dict, success: bool, result: dict, tag: str):
+  """Tell the coordinator how a leased query went."""
+  status = coordinator.complete_job(job, result) if success else coordinator.fail_job(job, "search failed")
+  if status == "stale":
+    print(f"{tag} ⚠️  Lease on {job['q']['query']} expired before the report; the coordinator re-queued it (raise --lease-seconds)")
+  elif status == "pending":
+    print(f"{tag} ↻ Coordinator will retry {job['q']['query']} (attempt {job['attempt']} failed)")
+
+
+# Firefox lock files that must not be copied into worker profiles
+PROFILE_LOCK_FILES = ("lock", ".parentlock", "parent.lock")
+
+
+def prepare_worker_profiles(template: str, workers: int) -> list[Path]:
+  """Copy the template profile into one profile directory per worker.
+
+  Existing worker profiles are kept as-is so they stay warm between runs.
+  """
+  template_path = Path(template)
+  workers_root = template_path.parent / f"{template_path.name}_workers"
+  workers_root.mkdir(parents=True, exist_ok=True)
+
+  profiles = []
+  for worker_id in range(1, workers + 1):
+    profile = workers_root / f"worker-{worker_id}"
+    if not profile.exists():
+      if template_path.exists():
+        shutil.copytree(template_path, profile, ignore=shutil.ignore_patterns(*PROFILE_LOCK_FILES))
+        print(f"📁 Worker {worker_id}: copied profile from {template_path}")
+      else:
+        profile.mkdir(parents=True)
+        print(f"📁 Worker {worker_id}: template {template_path} not found, using empty profile")
+    profiles.append(profile)
+
+  return profiles
+
+
+def _worker_main(worker_id: int, profile: str, args, work_queue, result_queue, taken=None):
+  """Worker process: runs its own browser and pulls queries from the shared queue (or the --coordinator)."""
+  # Workers can't prompt for Tampermonkey setup, it must already be configured in the template
+  os.environ["SKIP_TM_CONFIG"] = "1"
+
+  rate_config = build_rate_config(args)
+  governor = build_governor(args)
+  writer = open_capture_writer(args)
+  payload_cache = open_payload_cache(args)
+  client = None if args.capture else ServerClient(args.server)
+  metrics_client = client or (ServerClient(args.server) if args.push_metrics else None)
+  journal = QueryJournal(args.journal)
+  scraper = GoogleMapsScraper(
+    headless=args.headless,
+    rate_limit_config=rate_config,
+    profile_path=profile,
+    capture=args.capture,
+    on_items=writer.enqueue if writer else None,
+    browser_ws=args.browser_ws,
+    governor=governor,
+    resource_policy=POLICIES[args.block_resources],
+    payload_cache=payload_cache,
+  )
+  recycler = TabRecycler(args.recycle_after, args.max_browser_mb)
+  tag = f"[W{worker_id}]"
+  coordinator = ServerClient(args.coordinator) if args.coordinator else None
+  node = f"{socket.gethostname()}-W{worker_id}"
+
+  try:
+    # Stagger startup so workers don't hit Google at the same moment
+    time.sleep((worker_id - 1) * random.uniform(2.0, 4.0))
+    scraper.start()
+    scraper.page.goto(
+      "https://www.google.com/maps",
+      wait_until="domcontentloaded",
+      timeout=30000,
+    )
+    time.sleep(3)
+    print(f"{tag} ✓ Google Maps loaded")
+
+    while True:
+      if coordinator:
+        job = lease_next(coordinator, node, tag)
+        if job is None:
+          break
+        seq, q = None, job["q"]
+      else:
+        item = work_queue.get()
+        if item is None:
+          break
+        # Shared memory, not the result queue: still visible to the parent if this process is killed right away
+        seq, q = item
+        taken[worker_id - 1] = seq
+
+      print(f"\n{tag} Searching: {describe_query(q)}")
+      started = time.monotonic()
+      captured_before = scraper.captured
+      journal.start(q)
+      try:
+        success = scraper.search(q["query"], wait_for_results=True, query_id=query_id(q), url=q.get("url"))
+      except Exception as e:
+        print(f"{tag} Search error: {e}")
+        success = False
+
+      elapsed = time.monotonic() - started
+      places = scraper.captured - captured_before
+      if success:
+        journal.complete(q)
+      else:
+        journal.fail(q, "search failed")
+      maintain_browser(scraper, recycler, success)
+
+      # Per-worker delay between searches
+      delay = search_delay(rate_config, governor)
+      print(f"{tag} ⏱️  Waiting {delay:.1f}s before next search...")
+      time.sleep(delay)
+
+      # Stats after the delay, once the server has the userscript's last batch
+      stats = record_query_stats(journal, scraper, writer, client, q, elapsed, places) if success else {}
+      if coordinator:
+        report_job(coordinator, job, success, {"places": places, **stats}, tag)
+      QUERY_SECONDS.observe(elapsed)
+      push_metrics(metrics_client, f"worker-{worker_id}")
+      result_queue.put(
         {
-          "search": search,
-          "city": city,
-          "country": country,
-          "query": query,
+          "worker": worker_id,
+          "seq": seq,
+          "q": q,
+          "query": q["query"],
+          "query_id": query_id(q),
+          "success": success,
+          "elapsed": elapsed,
+          "places": places,
+          "results": stats.get("results"),
+          "new_places": stats.get("new_places"),
         }
       )
 
-  return queries
+  except Exception as e:
+    print(f"{tag} ❌ Worker crashed: {e}")
+  finally:
+    try:
+      scraper.stop()
+    except Exception as e:
+      print(f"{tag} ⚠️  Could not stop the browser: {e}")
+    if writer:
+      writer.close()
+    if governor:
+      governor.close()
+    if payload_cache:
+      payload_cache.close()
+    journal.close()
+    result_queue.put({"worker": worker_id, "done": True})
+
+
+def print_summary(results: list[dict], total: int, elapsed: float, workers: int):
+  """Print merged summary of a run."""
+  # Last attempt of each query decides its outcome
+  final = {r["query_id"]: r for r in results}
+  succeeded = sum(1 for r in final.values() if r["success"])
+  failed = len(final) - succeeded
+  retries = len(results) - len(final)
+
+  print(f"\n{'=' * 60}")
+  print("RUN SUMMARY")
+  print(f"{'=' * 60}")
+  print(f"Queries:    {len(final)}/{total} processed ({succeeded} ok, {failed} failed, {retries} retries)")
+  places = sum(r.get("places", 0) for r in results)
+  if places:
+    print(f"Captured:   {places} places")
+  print(f"Wall time:  {elapsed / 60:.1f} min")
+  if elapsed > 0:
+    print(f"Throughput: {len(results) / (elapsed / 60):.2f} queries/min")
+
+  if workers > 1:
+    print("Per worker:")
+    for worker_id in range(1, workers + 1):
+      own = [r for r in results if r["worker"] == worker_id]
+      ok = sum(1 for r in own if r["success"])
+      avg = sum(r["elapsed"] for r in own) / len(own) if own else 0.0
+      print(f"  W{worker_id}: {len(own)} queries ({ok} ok), avg {avg:.1f}s/query")
+
+  print(f"{'=' * 60}")
+
+
+def run_parallel(queries: list[dict], args, planner: TilePlanner | None = None):
+  """Run queries across several browser workers sharing one work queue."""
+  profiles = prepare_worker_profiles(args.profile, args.workers)
+
+  ctx = multiprocessing.get_context("spawn")
+  work_queue = ctx.Queue()
+  result_queue = ctx.Queue()
+  # Sequence number of the query each worker took off the queue last
+  taken = ctx.Array("q", args.workers)
+  # Queued or taken queries without a result yet, by sequence number
+  pending = {}
+  sequence = itertools.count(1)
+
+  def submit(q: dict):
+    seq = next(sequence)
+    pending[seq] = q
+    work_queue.put((seq, q))
+
+  for q in queries:
+    submit(q)
+  # Before any worker completes a query, so the journal still holds the previous runs
+  scheduler = RefreshScheduler(args.journal)
+
+  print(f"\n🚀 Starting {args.workers} workers...")
+  started = time.monotonic()
+  processes = []
+  for worker_id, profile in enumerate(profiles, 1):
+    process = ctx.Process(
+      target=_worker_main,
+      args=(worker_id, str(profile), args, work_queue, result_queue, taken),
+      name=f"scrapka-worker-{worker_id}",
+    )
+    process.start()
+    processes.append(process)
+
+  results = []
+  finished = set()
+  # Queries that still need a final outcome; workers stop once it drops to 0
+  outstanding = len(queries)
+  planned = len(queries)
+  attempts = Counter()
+  retries = []  # (not_before, query)
+  stopping = False
+  try:
+    while len(finished) < len(processes):
+      # Release retries whose backoff has passed
+      now = time.monotonic()
+      for item in [r for r in retries if r[0] <= now]:
+        retries.remove(item)
+        submit(item[1])
+
+      if outstanding == 0 and not stopping:
+        for _ in profiles:
+          work_queue.put(None)
+        stopping = True
+
+      # Dead before the wait: everything they sent is already in the queue
+      dead = [worker_id for worker_id, process in enumerate(processes, 1) if worker_id not in finished and not process.is_alive()]
+      try:
+        message = result_queue.get(timeout=1)
+      except queue.Empty:
+        # Killed without a "done" (SIGKILL, OOM killer)
+        messages = [{"worker": worker_id, "done": True} for worker_id in dead]
+      else:
+        messages = [message]
+
+      for message in messages:
+        worker_id = message["worker"]
+        if message.get("done"):
+          finished.add(worker_id)
+          if taken[worker_id - 1] not in pending:
+            continue
+          # Crashed between taking a query and reporting it: count it as a failed attempt
+          q = pending.pop(taken[worker_id - 1])
+          print(f"⚠️  W{worker_id} stopped while running {describe_query(q)}")
+          message = {
+            "worker": worker_id,
+            "q": q,
+            "query": q["query"],
+            "query_id": query_id(q),
+            "success": False,
+            "elapsed": 0.0,
+            "places": 0,
+            "results": None,
+            "new_places": None,
+          }
+        else:
+          pending.pop(message["seq"], None)
+
+        results.append(message)
+        q = message["q"]
+        status = "✓" if message["success"] else "✗"
+        print(f"[{len(results)}] {status} W{message['worker']}: {describe_query(q)}")
+
+        if message["success"]:
+          scheduler.record(q, message["new_places"])
+
+        if planner and message["success"]:
+          children = planner.refine(q, message["results"], message["new_places"])
+          if children:
+            print(f"   🔍 Hit the result cap, split into {len(children)} tiles")
+          for child in children:
+            submit(child)
+          outstanding += len(children)
+          planned += len(children)
+
+        attempts[query_key(q)] += 1
+        if not message["success"] and attempts[query_key(q)] < args.max_attempts:
+          backoff = retry_backoff(attempts[query_key(q)], base=args.retry_backoff)
+          print(f"   ↻ Retrying in {backoff:.0f}s (attempt {attempts[query_key(q)] + 1}/{args.max_attempts})")
+          retries.append((time.monotonic() + backoff, q))
+        else:
+          outstanding -= 1
+  finally:
+    scheduler.close()
+    for process in processes:
+      process.join(timeout=30)
+      if process.is_alive():
+        process.terminate()
+
+  print_summary(results, planned, time.monotonic() - started, args.workers)
+
+  journal = QueryJournal(args.journal)
+  try:
+    sync_server_stats(journal, None if args.capture else ServerClient(args.server))
+    print_coverage(journal, results, planner)
+  finally:
+    journal.close()
+
+
+def run_node(args):
+  """Scrape queries leased from a coordinator (server.py --jobs) until its queue is finished."""
+  coordinator = ServerClient(args.coordinator)
+  progress = coordinator.jobs_progress()
+  if progress is None:
+    print(f"❌ No job queue at {args.coordinator} (start it with: uv run python server.py --jobs queries.csv)")
+    return
+  print(f"\n📋 Coordinator {args.coordinator}: {progress['depth']} of {progress['total']} queries left")
+  if not args.capture:
+    print(f"⚠️  Tampermonkey must already be configured in {args.profile}, and send to {args.server}")
+
+  profiles = prepare_worker_profiles(args.profile, args.workers)
+  ctx = multiprocessing.get_context("spawn")
+  result_queue = ctx.Queue()
+  started = time.monotonic()
+  processes = []
+  for worker_id, profile in enumerate(profiles, 1):
+    process = ctx.Process(
+      target=_worker_main,
+      args=(worker_id, str(profile), args, None, result_queue),
+      name=f"scrapka-worker-{worker_id}",
+    )
+    process.start()
+    processes.append(process)
+
+  results = []
+  finished = set()
+  try:
+    while len(finished) < len(processes):
+      # Dead before the wait: everything they sent is already in the queue
+      dead = [worker_id for worker_id, process in enumerate(processes, 1) if worker_id not in finished and not process.is_alive()]
+      try:
+        message = result_queue.get(timeout=1)
+      except queue.Empty:
+        # Killed without a "done"; the coordinator re-queues its query when the lease expires
+        finished.update(dead)
+        continue
+      if message.get("done"):
+        finished.add(message["worker"])
+        continue
+      results.append(message)
+      status = "✓" if message["success"] else "✗"
+      print(f"[{len(results)}] {status} W{message['worker']}: {describe_query(message['q'])}")
+  finally:
+    for process in processes:
+      process.join(timeout=30)
+      if process.is_alive():
+        process.terminate()
+
+  print_summary(results, len(results), time.monotonic() - started, args.workers)
+  progress = coordinator.jobs_progress()
+  if progress:
+    print(f"📋 Coordinator: {progress['done']} done, {progress['failed']} failed, {progress['depth']} left of {progress['total']}")
 
 
 def run_scraper(args):
   """Run scraper from CSV file."""
+  if args.coordinator:
+    run_node(args)
+    return
+
   queries = parse_csv(args.csv_file)
 
   if not queries:
     print("❌ No queries found in CSV file")
     return
 
+  # Split each search × city into map tiles
+  planner = build_planner(args)
+  if planner:
+    total = len(queries)
+    queries = planner.plan(queries)
+    print(f"\n🗺️  Tile planner: {total} queries -> {len(queries)} tiles ({args.tile_grid}x{args.tile_grid} grid per city)")
+
+  if args.resume:
+    journal = QueryJournal(args.journal)
+    total = len(queries)
+    if planner:
+      # Completed tiles may have been split; re-plan their children
+      coverage = {row["query_id"]: row for row in journal.coverage()}
+      queries = planner.resume(queries, coverage)
+    else:
+      queries = journal.pending(queries)
+    journal.close()
+    print(f"\n↻ Resuming from {args.journal}: {len(queries)} queries left of {total} planned")
+    if not queries:
+      print("✓ Nothing left to do")
+      return
+
+  # Refresh run: only the queries most likely to have new places, within the budget
+  if args.refresh:
+    scheduler = RefreshScheduler(args.journal)
+    try:
+      max_seconds = args.max_minutes * 60 if args.max_minutes else None
+      overhead = args.min_delay if args.governor else (args.min_delay + args.max_delay) / 2
+      selected = scheduler.select(queries, args.max_queries, max_seconds, overhead=overhead)
+    finally:
+      scheduler.close()
+    print(f"\n🗓️  Refresh: {len(selected)} of {len(queries)} queries selected by staleness")
+    for item in selected[:5]:
+      print(f"  {describe(item)}")
+    queries = [item["q"] for item in selected]
+    if not queries:
+      print("✓ Nothing to refresh")
+      return
+
   print(f"\n{'=' * 60}")
   print("SCRAPKA - Google Maps Scraper")
   print(f"{'=' * 60}")
   print(f"Search terms × Cities = {len(queries)} total queries:")
   for i, q in enumerate(queries[:5], 1):
-    location = f" ({q['city']}, {q['country']})" if q["city"] or q["country"] else ""
-    print(f"  {i}. {q['query']}{location}")
+    print(f"  {i}. {describe_query(q)}")
   if len(queries) > 5:
     print(f"  ... and {len(queries) - 5} more")
   print(f"{'=' * 60}\n")
 
-  print("⚠️  Make sure:")
-  print("   1. Server is running: uv run python server.py")
-  print("   2. Tampermonkey script is installed and active")
-  print()
-  input("Press ENTER to start browser... ")
+  if args.browser_ws and not args.capture:
+    print("⚠️  Browser service contexts have no profile, so no configured Tampermonkey userscript: use --capture")
+  if args.capture:
+    print(f"📦 Capture mode: results are parsed in Python and saved to {args.output}\n")
+  else:
+    print("⚠️  Make sure:")
+    print("   1. Server is running: uv run python server.py")
+    print("   2. Tampermonkey script is installed and active")
+    if args.workers > 1:
+      print(f"   3. Tampermonkey is configured in the template profile ({args.profile})")
+    print()
+    input("Press ENTER to start browser... ")
+
+  if args.workers > 1:
+    run_parallel(queries, args, planner)
+    return
 
   # Create rate limit config
-  rate_config = RateLimitConfig(
-    min_search_delay=args.min_delay,
-    max_search_delay=args.max_delay,
-    scroll_count=args.scrolls,
-    scroll_speed=args.scroll_speed,
-    scroll_interval_min=args.scroll_interval_min,
-    scroll_interval_max=args.scroll_interval_max,
-    auto_scroll_enabled=not args.no_auto_scroll,
-  )
+  rate_config = build_rate_config(args)
+  governor = build_governor(args)
 
   # Create scraper
+  writer = open_capture_writer(args)
+  payload_cache = open_payload_cache(args)
+  client = None if args.capture else ServerClient(args.server)
+  metrics_client = client or (ServerClient(args.server) if args.push_metrics else None)
+  journal = QueryJournal(args.journal)
+  scheduler = RefreshScheduler(args.journal)
   scraper = GoogleMapsScraper(
     headless=args.headless,
     rate_limit_config=rate_config,
     profile_path=args.profile,
+    capture=args.capture,
+    on_items=writer.enqueue if writer else None,
+    browser_ws=args.browser_ws,
+    governor=governor,
+    resource_policy=POLICIES[args.block_resources],
+    payload_cache=payload_cache,
   )
+  recycler = TabRecycler(args.recycle_after, args.max_browser_mb)
 
   try:
     scraper.start()
 
-    # Configure Tampermonkey before starting
-    scraper.configure_tampermonkey()
+    # Configure Tampermonkey before starting (not used in capture mode / shared browser)
+    if not args.capture and not args.browser_ws:
+      scraper.configure_tampermonkey()
 
     # Navigate to Google Maps
     print("\n🔄 Navigating to Google Maps...")
@@ -137,37 +722,101 @@ def run_scraper(args):
     time.sleep(3)
     print("✓ Google Maps loaded")
 
-    input("\n🔄 Press ENTER when ready to start searching... ")
+    if not args.capture:
+      input("\n🔄 Press ENTER when ready to start searching... ")
 
     print(f"\n{'=' * 60}")
     print("STARTING SEARCHES")
     print(f"{'=' * 60}\n")
 
-    for i, q in enumerate(queries, 1):
-      location = f" ({q['city']}, {q['country']})" if q["city"] or q["country"] else ""
-      print(f"\n[{i}/{len(queries)}] Searching: {q['query']}{location}")
+    started = time.monotonic()
+    results = []
+    attempts = Counter()
+    # (query, earliest start) - failed queries come back after a backoff
+    pending = deque((q, 0.0) for q in queries)
+    total = len(queries)
+    i = 0
+    while pending:
+      q, not_before = pending.popleft()
+      i += 1
+      print(f"\n[{i}] Searching: {describe_query(q)} ({len(pending)} queued)")
       print("-" * 40)
 
-      success = scraper.search(q["query"], wait_for_results=True)
+      wait = not_before - time.monotonic()
+      if wait > 0:
+        print(f"⏱️  Retry backoff: waiting {wait:.0f}s...")
+        time.sleep(wait)
+
+      query_started = time.monotonic()
+      captured_before = scraper.captured
+      journal.start(q)
+      success = scraper.search(q["query"], wait_for_results=True, query_id=query_id(q), url=q.get("url"))
+      elapsed = time.monotonic() - query_started
+      places = scraper.captured - captured_before
+      results.append(
+        {
+          "worker": 1,
+          "query": q["query"],
+          "query_id": query_id(q),
+          "success": success,
+          "elapsed": elapsed,
+          "places": places,
+        }
+      )
 
       if success:
+        journal.complete(q)
         print("✓ Search completed")
       else:
-        print("✗ Search failed")
+        journal.fail(q, "search failed")
+        attempts[query_key(q)] += 1
+        if attempts[query_key(q)] < args.max_attempts:
+          backoff = retry_backoff(attempts[query_key(q)], base=args.retry_backoff)
+          pending.append((q, time.monotonic() + backoff))
+          print(f"✗ Search failed, retrying later (attempt {attempts[query_key(q)] + 1}/{args.max_attempts})")
+        else:
+          print("✗ Search failed")
+      maintain_browser(scraper, recycler, success)
 
-      # Delay between searches
-      if i < len(queries):
-        delay = rate_config.get_search_delay()
+      # Delay between searches (a capped tile may still add more)
+      if pending or (planner and success):
+        delay = search_delay(rate_config, governor)
         print(f"\n⏱️  Waiting {delay:.1f}s before next search...")
         time.sleep(delay)
 
+      # Stats after the delay, once the server has the userscript's last batch
+      if success:
+        stats = record_query_stats(journal, scraper, writer, client, q, elapsed, places)
+        scheduler.record(q, stats.get("new_places"))
+        children = planner.refine(q, stats.get("results"), stats.get("new_places")) if planner else []
+        if children:
+          print(f"🔍 Tile hit the result cap, split into {len(children)} tiles")
+          pending.extend((child, 0.0) for child in children)
+          total += len(children)
+      QUERY_SECONDS.observe(elapsed)
+      push_metrics(metrics_client, "main")
+
     print(f"\n{'=' * 60}")
     print("ALL SEARCHES COMPLETED")
     print(f"{'=' * 60}")
-    print("\nCheck the server for saved data.")
+    print_summary(results, total, time.monotonic() - started, 1)
+    sync_server_stats(journal, client)
+    print_coverage(journal, results, planner)
+    if args.capture:
+      print(f"\nSaved to {args.output}")
+    else:
+      print("\nCheck the server for saved data.")
 
   finally:
     scraper.stop()
+    if writer:
+      writer.close()
+    if governor:
+      governor.close()
+    if payload_cache:
+      payload_cache.close()
+    scheduler.close()
+    journal.close()
 
 
 def main():
@@ -185,6 +834,45 @@ Examples:
   # Headless mode
   uv run python main.py queries.csv --headless
 
+  # 4 parallel browsers, each with its own copy of the profile
+  uv run python main.py queries.csv --workers 4
+
+  # Scroll as soon as results render, stop when the list stops growing
+  uv run python main.py queries.csv --scroll-mode adaptive
+
+  # Skip simulated typing: open search URLs directly and scroll as soon as results load
+  uv run python main.py queries.csv --search-strategy navigate --scroll-mode adaptive
+
+  # No scrolling: replay the search's tbm=map request for the next pages of results
+  uv run python main.py queries.csv --capture --scroll-mode fetch
+
+  # Capture results directly in Python, no server or Tampermonkey
+  uv run python main.py queries.csv --capture --headless --output places.db
+
+  # Also keep every raw tbm=map response, to re-extract fields later with payload_cache.py reprocess
+  uv run python main.py queries.csv --capture --output places.db --payload-cache payloads/
+
+  # Split big cities into map tiles to get past the ~120 results per search cap
+  uv run python main.py queries.csv --capture --tiles --tile-grid 3
+
+  # Don't download map tiles, photos, fonts or telemetry (more tabs per box)
+  uv run python main.py queries.csv --capture --headless --block-resources lean
+
+  # Reuse a warm browser kept by `uv run python browser_service.py serve --headless`
+  uv run python main.py queries.csv --capture --browser-ws ws://localhost:9377/scrapka
+
+  # One searches/scrolls-per-minute budget for all workers, slowed down on captchas / empty results
+  uv run python main.py queries.csv --workers 4 --governor scrapka_governor.db --searches-per-minute 8 --min-delay 1
+
+  # One node of a multi-machine run: queries come from `server.py --jobs queries.csv` on the coordinator
+  uv run python main.py --coordinator http://coordinator:8080 --capture --headless --workers 2
+
+  # Continue an interrupted run, skipping completed queries
+  uv run python main.py queries.csv --resume
+
+  # Recurring refresh: only the 50 queries with the most new places expected (by age and past change rate)
+  uv run python main.py queries.csv --capture --refresh --max-queries 50
+
   # Even more aggressive scrolling
   uv run python main.py queries.csv --scrolls 20 --scroll-speed 3000 --scroll-interval-min 1
 
@@ -194,11 +882,13 @@ CSV Format:
   гінеколог,харків,
   косметолог,одеса,
 
+  Optional bbox column (south,west,north,east) for --tiles, otherwise looked up on OpenStreetMap
+
 Note: All search terms will be combined with all cities (many-to-many)
         """,
   )
 
-  parser.add_argument("csv_file", help="CSV file with search queries")
+  parser.add_argument("csv_file", nargs="?", help="CSV file with search queries (not with --coordinator)")
   parser.add_argument(
     "--headless",
     action="store_true",
@@ -222,6 +912,25 @@ Note: All search terms will be combined with all cities (many-to-many)
     default=15.0,
     help="Max delay between searches (default: 15)",
   )
+  parser.add_argument(
+    "--governor",
+    type=str,
+    default=None,
+    help="Shared rate governor file: workers and runs using it split --searches/--scrolls-per-minute, "
+    "slowing down on soft blocks (instead of the random --min/--max-delay wait, only --min-delay is kept)",
+  )
+  parser.add_argument(
+    "--searches-per-minute",
+    type=float,
+    default=6.0,
+    help="With --governor: searches per minute across all workers at full speed (default: 6)",
+  )
+  parser.add_argument(
+    "--scrolls-per-minute",
+    type=float,
+    default=60.0,
+    help="With --governor: result list scrolls per minute across all workers at full speed (default: 60)",
+  )
   parser.add_argument(
     "--scrolls",
     type=int,
@@ -246,13 +955,177 @@ Note: All search terms will be combined with all cities (many-to-many)
     default=3.0,
     help="Max seconds between scrolls (default: 3)",
   )
+  parser.add_argument(
+    "--scroll-mode",
+    choices=["fixed", "adaptive", "fetch"],
+    default="fixed",
+    help="fixed: sleep between scrolls; adaptive: scroll as soon as new results render; "
+    "fetch: request the next result pages directly, no scrolling (default: fixed)",
+  )
+  parser.add_argument(
+    "--min-scroll-gap",
+    type=float,
+    default=1.0,
+    help="Adaptive / fetch mode: never scroll or request a page more often than this many seconds (default: 1)",
+  )
+  parser.add_argument(
+    "--search-strategy",
+    choices=["type", "navigate"],
+    default="type",
+    help="type: type queries like a user; navigate: open /maps/search/<query> directly, faster (default: type)",
+  )
+  parser.add_argument(
+    "--results-timeout",
+    type=float,
+    default=15.0,
+    help="Navigate strategy: max seconds to wait for the first results (default: 15)",
+  )
   parser.add_argument(
     "--no-auto-scroll",
     action="store_true",
     help="Disable auto-scroll",
   )
+  parser.add_argument(
+    "--capture",
+    action="store_true",
+    help="Parse tbm=map responses in Python and save them directly (no server / Tampermonkey needed)",
+  )
+  parser.add_argument(
+    "--output",
+    type=str,
+    default="output.csv",
+    help="Capture mode output: .csv or SQLite .db, which --workers need (default: output.csv)",
+  )
+  parser.add_argument(
+    "--payload-cache",
+    type=str,
+    default=None,
+    help="Capture mode: also store every raw tbm=map response (compressed) in this directory for payload_cache.py reprocess",
+  )
+  parser.add_argument(
+    "--tiles",
+    action="store_true",
+    help="Split each city's bounding box into map tiles, subdividing tiles that hit the result cap",
+  )
+  parser.add_argument(
+    "--tile-grid",
+    type=int,
+    default=2,
+    help="Initial tiles per side of a city (default: 2, i.e. 2x2)",
+  )
+  parser.add_argument(
+    "--tile-depth",
+    type=int,
+    default=3,
+    help="Max times a capped tile is split into 4 (default: 3)",
+  )
+  parser.add_argument(
+    "--tile-min-new",
+    type=int,
+    default=5,
+    help="Don't split a capped tile that found fewer new places than this (default: 5)",
+  )
+  parser.add_argument(
+    "--bbox-cache",
+    type=str,
+    default="city_bboxes.json",
+    help="Cache of city bounding boxes looked up on OpenStreetMap (default: city_bboxes.json)",
+  )
+  parser.add_argument(
+    "--browser-ws",
+    type=str,
+    default=None,
+    help="Connect to a running browser_service.py (e.g. ws://localhost:9377/scrapka) instead of launching Camoufox",
+  )
+  parser.add_argument(
+    "--block-resources",
+    choices=list(POLICIES),
+    default="off",
+    help="lean: block map tiles, photos, images, fonts and telemetry; strict: stylesheets too (default: off)",
+  )
+  parser.add_argument(
+    "--recycle-after",
+    type=int,
+    default=25,
+    help="Replace the browser tab with a fresh one after this many queries, 0 to disable (default: 25)",
+  )
+  parser.add_argument(
+    "--max-browser-mb",
+    type=float,
+    default=0,
+    help="Also recycle the tab when Camoufox processes use more memory than this, in MB (default: off)",
+  )
+  parser.add_argument(
+    "--server",
+    type=str,
+    default="http://localhost:8080",
+    help="Server URL for per-query stats when not in capture mode (default: http://localhost:8080)",
+  )
+  parser.add_argument(
+    "--coordinator",
+    type=str,
+    default=None,
+    help="Take queries from this server's job queue (server.py --jobs) instead of a CSV file",
+  )
+  parser.add_argument(
+    "--push-metrics",
+    action="store_true",
+    help="Push timing metrics to --server's /metrics in capture mode too (always on with the server)",
+  )
+  parser.add_argument(
+    "--journal",
+    type=str,
+    default="scrapka_journal.db",
+    help="Progress journal of completed/failed queries (default: scrapka_journal.db)",
+  )
+  parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Skip queries the journal marks completed, retry failed/interrupted ones",
+  )
+  parser.add_argument(
+    "--refresh",
+    action="store_true",
+    help="Only run the queries most likely to have new places (age × past change rate, from the journal) within the budget",
+  )
+  parser.add_argument(
+    "--max-queries",
+    type=int,
+    default=None,
+    help="With --refresh: run at most this many queries",
+  )
+  parser.add_argument(
+    "--max-minutes",
+    type=float,
+    default=None,
+    help="With --refresh: stop adding queries once their expected run time exceeds this many minutes",
+  )
+  parser.add_argument(
+    "--max-attempts",
+    type=int,
+    default=3,
+    help="Attempts per query within a run before giving up (default: 3)",
+  )
+  parser.add_argument(
+    "--retry-backoff",
+    type=float,
+    default=30.0,
+    help="Base seconds before retrying a failed query, doubled per attempt (default: 30)",
+  )
+  parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Number of parallel browsers, each with a profile copied from --profile (default: 1)",
+  )
 
   args = parser.parse_args()
+  if args.coordinator and (args.csv_file or args.resume or args.refresh or args.tiles):
+    parser.error("--coordinator takes its queries from the server's job queue: drop csv_file, --resume, --refresh and --tiles")
+  if not args.coordinator and not args.csv_file:
+    parser.error("csv_file is required (or --coordinator URL)")
+  if args.capture and args.workers > 1 and Path(args.output).suffix not in SQLITE_SUFFIXES:
+    parser.error("--workers with --capture needs a SQLite --output (e.g. output.db) that all workers share")
 
   try:
     run_scraper(args)
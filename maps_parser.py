@@ -0,0 +1,160 @@
+"""
+Parser for Google Maps `/search?tbm=map` responses.
+
+Python port of the userscript's XHR hook and `formatDataItem` (script.js):
+same payload unwrapping, same field paths, same output fields, so records
+captured in Python match the ones the server receives from Tampermonkey.
+"""
+
+import json
+import re
+from datetime import UTC, datetime
+from typing import Any
+
+XSSI_PREFIX = ")]}'"
+
+# Google Maps stops listing results after about this many places per search
+RESULT_CAP = 120
+
+# Field -> index path inside a place entry (see fieldConfig in script.js)
+FIELD_PATHS = {
+  "fullAddress": [39],
+  "placeId": [78],
+  "kgmid": [89],
+  "categories": [13],
+  "cid": [10],
+  "featuredImage": [37, 0, 0, 6, 0],
+  "name": [11],
+  "latitude": [9, 2],
+  "longitude": [9, 3],
+  "reviewCount": [4, 8],
+  "averageRating": [4, 7],
+  "website": [7, 0],
+  "domain": [7, 1],
+}
+
+# Paging inside the request's pb parameter: !7i<page size>!8i<offset> ("!" may be URL-encoded)
+PB_PAGE_SIZE = re.compile(r"(!|%21)7i(\d+)")
+PB_OFFSET = re.compile(r"(!|%21)8i(\d+)")
+
+PHONES_PATH = [178, 0, 1]
+OPENING_HOURS_PATH = [34, 1]
+
+
+def is_search_response(url: str) -> bool:
+  """True for the XHR that carries search results."""
+  return "/search?tbm=map" in url
+
+
+def page_size(url: str, default: int = 20) -> int:
+  """Results per page requested by a tbm=map URL."""
+  match = PB_PAGE_SIZE.search(url)
+  return int(match.group(2)) if match else default
+
+
+def page_offset(url: str) -> int:
+  """Offset of the first result a tbm=map URL asks for (0 when left out)."""
+  match = PB_OFFSET.search(url)
+  return int(match.group(2)) if match else 0
+
+
+def page_url(url: str, offset: int) -> str | None:
+  """The same tbm=map request for the results page starting at `offset`; None if the URL has no paging."""
+  if PB_OFFSET.search(url):
+    return PB_OFFSET.sub(lambda m: f"{m.group(1)}8i{offset}", url, count=1)
+  # The first page leaves the offset out: add it after the page size
+  if PB_PAGE_SIZE.search(url):
+    return PB_PAGE_SIZE.sub(lambda m: f"{m.group(0)}{m.group(1)}8i{offset}", url, count=1)
+  return None
+
+
+def get_path(data: Any, path: list[int]) -> Any:
+  """Follow an index path like JS optional chaining; None if any step is missing."""
+  for key in path:
+    if isinstance(data, list) and 0 <= key < len(data):
+      data = data[key]
+    else:
+      return None
+  return data
+
+
+def js_str(value: Any) -> str:
+  """String conversion matching JS template literals / Array.toString."""
+  if value is None:
+    return ""
+  if isinstance(value, bool):
+    return "true" if value else "false"
+  if isinstance(value, list):
+    return ",".join(js_str(v) for v in value)
+  if isinstance(value, float) and value.is_integer():
+    return str(int(value))
+  return str(value)
+
+
+def now_iso() -> str:
+  """Timestamp in the same format as JS Date.toISOString()."""
+  now = datetime.now(UTC)
+  return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+def format_item(item: list, scraped_at: str | None = None) -> dict[str, Any]:
+  """Format one place entry, like formatDataItem in script.js."""
+  data = get_path(item, [1])
+  result = {key: get_path(data, path) if data else None for key, path in FIELD_PATHS.items()}
+
+  phones = get_path(data, PHONES_PATH)
+  result["phones"] = ", ".join(js_str(get_path(p, [0])) for p in phones) if isinstance(phones, list) else ""
+
+  opening_hours = get_path(data, OPENING_HOURS_PATH)
+  if isinstance(opening_hours, list):
+    result["openingHours"] = ", ".join(f"{js_str(get_path(d, [0]))}:[{js_str(get_path(d, [1]))}]" for d in opening_hours)
+  else:
+    result["openingHours"] = ""
+
+  result["googleMapsURL"] = f"https://www.google.com/maps?cid={result['cid']}" if result["cid"] else ""
+  result["googleKnowledgeURL"] = f"https://www.google.com/maps/search/*?kgmid={result['kgmid']}&kponly" if result["kgmid"] else ""
+  categories = result["categories"]
+  result["categories"] = ", ".join(js_str(c) for c in categories) if isinstance(categories, list) else ""
+
+  result["scrapedAt"] = scraped_at or now_iso()
+  return result
+
+
+def unwrap_payload(text: str) -> Any:
+  """Decode a tbm=map response body into the results array.
+
+  The XHR body is `{"c":..,"d":")]}'\\n[...]"}/*""*/`; plain `)]}'` bodies are
+  accepted too.
+  """
+  text = text.strip()
+  if text.startswith(XSSI_PREFIX):
+    return json.loads(text[len(XSSI_PREFIX) :])
+
+  wrapper = json.loads(text.replace('/*""*/', ""))
+  return json.loads(wrapper["d"].replace(XSSI_PREFIX, "", 1))
+
+
+def _entries(parsed: Any) -> list:
+  """Place entries of a decoded results array."""
+  data_list = get_path(parsed, [0, 1]) or []
+  # JS keeps entries whose [14] is present, even if it is null
+  entries = [item for item in data_list if isinstance(item, list) and len(item) > 14]
+  return entries or get_path(parsed, [64]) or []
+
+
+def count_results(text: str) -> int:
+  """Number of place entries in a tbm=map response body, without formatting them."""
+  return len(_entries(unwrap_payload(text)))
+
+
+def parse_search_response(text: str, scraped_at: str | None = None) -> list[dict[str, Any]]:
+  """Extract formatted places from a tbm=map response body (items without a name are dropped)."""
+  entries = _entries(unwrap_payload(text))
+
+  scraped_at = scraped_at or now_iso()
+  places = []
+  for entry in entries:
+    place = format_item(entry, scraped_at)
+    if place["name"]:
+      places.append(place)
+  return places
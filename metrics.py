@@ -0,0 +1,220 @@
+"""
+Minimal Prometheus-style metrics without extra dependencies.
+
+Counters, gauges and histograms live in a Registry that renders the
+Prometheus text exposition format (server.py serves it at /metrics).
+Scraper processes have their own registry and push a JSON snapshot of it to
+the server, which renders it with a `worker` label next to its own metrics.
+
+Usage:
+    SEARCH_SECONDS = metrics.histogram("scrapka_search_seconds", "Time per search", ["strategy"])
+
+    with SEARCH_SECONDS.time(strategy="type"):
+        ...
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# Default histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# (name suffix, labels, value)
+Sample = tuple[str, dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+  if value == float("inf"):
+    return "+Inf"
+  if float(value).is_integer():
+    return str(int(value))
+  return repr(float(value))
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+  if not labels:
+    return ""
+  escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in labels.values())
+  return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+class Metric:
+  """Base class: one named metric with optional label dimensions."""
+
+  type = "untyped"
+
+  def __init__(self, name: str, help: str, labels: list[str] | None = None):
+    self.name = name
+    self.help = help
+    self.label_names = tuple(labels or ())
+    self._values: dict[tuple[str, ...], Any] = {}
+    self._lock = threading.Lock()
+
+  def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+    if set(labels) != set(self.label_names):
+      raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in self.label_names)
+
+  def samples(self) -> Iterator[Sample]:
+    with self._lock:
+      items = list(self._values.items())
+    for key, value in items:
+      yield "", dict(zip(self.label_names, key)), value
+
+
+class Counter(Metric):
+  type = "counter"
+
+  def inc(self, amount: float = 1, **labels):
+    key = self._key(labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+  type = "gauge"
+
+  def set(self, value: float, **labels):
+    key = self._key(labels)
+    with self._lock:
+      self._values[key] = value
+
+  def inc(self, amount: float = 1, **labels):
+    key = self._key(labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+  type = "histogram"
+
+  def __init__(self, name: str, help: str, labels: list[str] | None = None, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+    super().__init__(name, help, labels)
+    self.buckets = tuple(sorted(buckets))
+
+  def observe(self, value: float, **labels):
+    key = self._key(labels)
+    with self._lock:
+      # [per-bucket cumulative counts, sum, count]
+      entry = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+      for i, bound in enumerate(self.buckets):
+        if value <= bound:
+          entry[0][i] += 1
+      entry[1] += value
+      entry[2] += 1
+
+  @contextmanager
+  def time(self, **labels):
+    """Observe the duration of the `with` block, in seconds."""
+    started = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.observe(time.perf_counter() - started, **labels)
+
+  def samples(self) -> Iterator[Sample]:
+    with self._lock:
+      items = [(key, list(counts), total, n) for key, (counts, total, n) in self._values.items()]
+    for key, counts, total, n in items:
+      labels = dict(zip(self.label_names, key))
+      for bound, count in zip(self.buckets, counts):
+        yield "_bucket", {**labels, "le": _format_value(bound)}, count
+      yield "_bucket", {**labels, "le": "+Inf"}, n
+      yield "_sum", labels, total
+      yield "_count", labels, n
+
+
+class RateMeter:
+  """Events per second over a sliding window (e.g. items per second right now)."""
+
+  def __init__(self, window: float = 60.0):
+    self.window = window
+    self._events: deque[tuple[float, float]] = deque()
+    self._lock = threading.Lock()
+
+  def add(self, amount: float = 1):
+    now = time.monotonic()
+    with self._lock:
+      self._events.append((now, amount))
+      self._trim(now)
+
+  def rate(self) -> float:
+    now = time.monotonic()
+    with self._lock:
+      self._trim(now)
+      return sum(amount for _, amount in self._events) / self.window
+
+  def _trim(self, now: float):
+    while self._events and self._events[0][0] < now - self.window:
+      self._events.popleft()
+
+
+class Registry:
+  """Set of metrics, plus snapshots pushed by other processes."""
+
+  def __init__(self):
+    self._metrics: dict[str, Metric] = {}
+    self._pushed: dict[str, dict[str, dict]] = {}
+    self._lock = threading.Lock()
+
+  def register(self, metric: Metric) -> Metric:
+    with self._lock:
+      existing = self._metrics.get(metric.name)
+      if existing is not None:
+        if type(existing) is not type(metric):
+          raise ValueError(f"Metric {metric.name} already registered as {existing.type}")
+        return existing
+      self._metrics[metric.name] = metric
+      return metric
+
+  def snapshot(self) -> dict[str, dict]:
+    """JSON-serializable samples of all local metrics (for pushing)."""
+    with self._lock:
+      metrics = list(self._metrics.values())
+    return {metric.name: {"type": metric.type, "help": metric.help, "samples": [list(sample) for sample in metric.samples()]} for metric in metrics}
+
+  def push(self, source: str, snapshot: dict[str, dict]):
+    """Store the latest snapshot of another process, rendered with a `worker` label."""
+    with self._lock:
+      self._pushed[source] = snapshot
+
+  def render(self) -> str:
+    """Prometheus text exposition format of local and pushed metrics."""
+    families: dict[str, tuple[str, str, list[Sample]]] = {}
+    for name, family in self.snapshot().items():
+      families[name] = (family["type"], family["help"], [tuple(sample) for sample in family["samples"]])
+
+    with self._lock:
+      pushed = list(self._pushed.items())
+    for source, snapshot in pushed:
+      for name, family in snapshot.items():
+        _, _, samples = families.setdefault(name, (family["type"], family["help"], []))
+        samples.extend((suffix, {"worker": source, **labels}, value) for suffix, labels, value in family["samples"])
+
+    lines = []
+    for name, (metric_type, help_text, samples) in families.items():
+      lines.append(f"# HELP {name} {help_text}")
+      lines.append(f"# TYPE {name} {metric_type}")
+      for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by the helpers below
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labels: list[str] | None = None) -> Counter:
+  return REGISTRY.register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, labels: list[str] | None = None) -> Gauge:
+  return REGISTRY.register(Gauge(name, help, labels))
+
+
+def histogram(name: str, help: str, labels: list[str] | None = None, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+  return REGISTRY.register(Histogram(name, help, labels, buckets))
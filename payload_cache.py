@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Compressed on-disk cache of raw `/search?tbm=map` response bodies.
+
+Capture mode only keeps the fields maps_parser extracts; with a payload cache
+every intercepted response body is kept as well, so a new field (price level,
+plus code, ...) can be added to FIELD_PATHS and derived from pages already
+scraped instead of scraping everything again.
+
+Bodies are content addressed (`objects/<sha256[:2]>/<sha256>.zst`), so a page
+seen twice is stored once. They are zstd compressed (Python 3.14's
+compression.zstd or the zstandard package), gzip when neither is available.
+`index.db` maps every (queryId, page offset) to its body, with the query
+text, request URL and capture time; scraping a query again replaces its pages.
+
+`reprocess` parses the whole cache again on all cores and writes a fresh
+output, without a browser.
+
+Usage:
+    uv run python main.py queries.csv --capture --payload-cache payloads/
+
+    # Pages, bodies and compression ratio
+    uv run python payload_cache.py stats payloads/
+
+    # Rebuild the output from the cache (e.g. after adding a field to maps_parser.FIELD_PATHS)
+    uv run python payload_cache.py reprocess payloads/ --output rebuilt.csv
+"""
+
+import argparse
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from maps_parser import now_iso, page_offset, parse_search_response
+from storage import open_writer
+
+ZSTD_LEVEL = 9
+
+
+def _codecs() -> dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+  """Available encodings -> (compress, decompress)."""
+  codecs = {"gz": (gzip.compress, gzip.decompress)}
+  try:
+    from compression import zstd  # Python 3.14+
+
+    codecs["zst"] = (lambda data: zstd.compress(data, level=ZSTD_LEVEL), zstd.decompress)
+  except ImportError:
+    try:
+      import zstandard
+    except ImportError:
+      pass
+    else:
+      compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+      codecs["zst"] = (compressor.compress, lambda data: zstandard.ZstdDecompressor().decompress(data))
+  return codecs
+
+
+CODECS = _codecs()
+# New bodies are written with the best available encoding
+ENCODING = "zst" if "zst" in CODECS else "gz"
+
+
+def object_path(root: str | Path, digest: str, encoding: str) -> Path:
+  return Path(root) / "objects" / digest[:2] / f"{digest}.{encoding}"
+
+
+class PayloadCache:
+  """Content-addressed store of compressed response bodies plus a SQLite index by query and page offset."""
+
+  def __init__(self, root: str):
+    self.root = Path(root)
+    (self.root / "objects").mkdir(parents=True, exist_ok=True)
+    self._conn = sqlite3.connect(self.root / "index.db", timeout=30)
+    self._conn.row_factory = sqlite3.Row
+    # Several capture workers write to one cache
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.executescript(
+      """
+      CREATE TABLE IF NOT EXISTS pages (
+        query_id TEXT NOT NULL,
+        page_offset INTEGER NOT NULL,
+        digest TEXT NOT NULL,
+        encoding TEXT NOT NULL,
+        raw_size INTEGER NOT NULL,
+        query TEXT,
+        url TEXT,
+        captured_at TEXT NOT NULL,
+        PRIMARY KEY (query_id, page_offset)
+      );
+      CREATE INDEX IF NOT EXISTS idx_pages_digest ON pages(digest);
+      """
+    )
+
+  def close(self):
+    self._conn.close()
+
+  def store(self, body: str, query_id: str | None, query: str | None, url: str) -> str:
+    """Keep one response body under its query and page offset. Returns the body's digest."""
+    data = body.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(self.root, digest, ENCODING)
+    if not path.exists():
+      path.parent.mkdir(exist_ok=True)
+      compress, _ = CODECS[ENCODING]
+      # Unique temp name: other workers may store the same body at the same time
+      tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+      tmp_path.write_bytes(compress(data))
+      os.replace(tmp_path, path)
+    with self._conn:
+      self._conn.execute(
+        """
+        INSERT INTO pages (query_id, page_offset, digest, encoding, raw_size, query, url, captured_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (query_id, page_offset) DO UPDATE SET
+          digest = excluded.digest, encoding = excluded.encoding, raw_size = excluded.raw_size,
+          query = excluded.query, url = excluded.url, captured_at = excluded.captured_at
+        """,
+        (query_id or "", page_offset(url), digest, ENCODING, len(data), query, url, now_iso()),
+      )
+    return digest
+
+  def pages(self) -> list[dict[str, Any]]:
+    """Index entries in capture order."""
+    rows = self._conn.execute("SELECT * FROM pages ORDER BY captured_at, query_id, page_offset")
+    return [dict(row) for row in rows]
+
+  def stats(self) -> dict[str, int]:
+    row = self._conn.execute("SELECT COUNT(*) AS pages, COUNT(DISTINCT query_id) AS queries FROM pages").fetchone()
+    objects = raw = stored = 0
+    for digest, encoding, raw_size in self._conn.execute("SELECT DISTINCT digest, encoding, raw_size FROM pages"):
+      path = object_path(self.root, digest, encoding)
+      if path.exists():
+        objects += 1
+        raw += raw_size
+        stored += path.stat().st_size
+    return {"pages": row["pages"], "queries": row["queries"], "objects": objects, "raw_bytes": raw, "stored_bytes": stored}
+
+
+def read_body(root: str | Path, digest: str, encoding: str) -> str:
+  if encoding not in CODECS:
+    raise RuntimeError(f"{encoding} bodies need Python 3.14+ or: uv pip install zstandard")
+  _, decompress = CODECS[encoding]
+  return decompress(object_path(root, digest, encoding).read_bytes()).decode("utf-8")
+
+
+def _parse_page(root: str, page: dict[str, Any]) -> tuple[list[dict[str, Any]], str | None]:
+  """Places of one cached page, as capture mode stored them (reprocess worker). Returns (places, error)."""
+  try:
+    places = parse_search_response(read_body(root, page["digest"], page["encoding"]), scraped_at=page["captured_at"])
+  except Exception as e:
+    return [], f"{page['query_id']}@{page['page_offset']}: {e}"
+  for place in places:
+    place["query"] = page["query"]
+    place["queryId"] = page["query_id"] or None
+  return places, None
+
+
+def reprocess(root: str, output: str, workers: int | None = None) -> dict[str, int]:
+  """Parse every cached page again, in parallel, into a new output (deduplicated like capture mode)."""
+  cache = PayloadCache(root)
+  try:
+    pages = cache.pages()
+  finally:
+    cache.close()
+
+  writer = open_writer(output, flush_size=5000)
+  places = failed = 0
+  try:
+    with ProcessPoolExecutor(workers) as pool:
+      # Results come back in capture order, so rows are deduplicated in the order of the original run
+      for page_places, error in pool.map(partial(_parse_page, root), pages, chunksize=32):
+        if error:
+          failed += 1
+          print(f"⚠️  {error}")
+          continue
+        places += len(page_places)
+        if page_places:
+          writer.enqueue(page_places)
+  finally:
+    writer.close()
+  return {"pages": len(pages), "failed": failed, "places": places, "written": writer.written}
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description="Cache of raw tbm=map responses (main.py --capture --payload-cache)",
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  # Pages, bodies and compression ratio
+  uv run python payload_cache.py stats payloads/
+
+  # Rebuild an output from the cached pages on all cores
+  uv run python payload_cache.py reprocess payloads/ --output rebuilt.csv
+
+  # Into SQLite, with 4 parser processes
+  uv run python payload_cache.py reprocess payloads/ --output rebuilt.db --workers 4
+        """,
+  )
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  stats_parser = commands.add_parser("stats", help="Show what the cache holds")
+  stats_parser.add_argument("cache", help="Payload cache directory")
+
+  reprocess_parser = commands.add_parser("reprocess", help="Parse all cached pages again into a new output")
+  reprocess_parser.add_argument("cache", help="Payload cache directory")
+  reprocess_parser.add_argument("--output", required=True, help="Output .csv or SQLite .db (rows are deduplicated against it)")
+  reprocess_parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: one per CPU)")
+
+  args = parser.parse_args()
+
+  if not (Path(args.cache) / "index.db").exists():
+    print(f"❌ No payload cache in {args.cache}")
+    raise SystemExit(1)
+
+  if args.command == "stats":
+    cache = PayloadCache(args.cache)
+    try:
+      stats = cache.stats()
+    finally:
+      cache.close()
+    ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+    print(f"📦 {stats['pages']} pages of {stats['queries']} queries, {stats['objects']} distinct bodies")
+    print(f"   {stats['raw_bytes'] / 1e6:.1f} MB raw, {stats['stored_bytes'] / 1e6:.1f} MB stored ({ratio:.1f}x, {ENCODING})")
+    return
+
+  started = time.monotonic()
+  print(f"🔁 Reprocessing {args.cache} into {args.output}")
+  result = reprocess(args.cache, args.output, args.workers)
+  elapsed = time.monotonic() - started
+  print(f"✓ {result['pages']} pages, {result['places']} places, {result['written']} rows written in {elapsed:.1f}s")
+  if result["failed"]:
+    print(f"⚠️  {result['failed']} pages could not be parsed")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,219 @@
+"""
+Geographic tile planner: splits search × city queries into map tiles.
+
+A Google Maps search stops listing results after about RESULT_CAP places,
+so one `"<term> <city>"` query can't cover a large city. The planner sits
+between parse_csv and the search loop: it cuts each city's bounding box into
+a grid of tiles and turns every tile into a `/maps/search/<term>/@lat,lng,zoomz`
+URL. After a tile has been searched, `refine` splits it into four smaller
+tiles if it hit the cap and still produced enough new places; tiles that
+mostly return already-known places are pruned.
+
+City bounding boxes come from an optional `bbox` CSV column
+(`south,west,north,east`) or from OpenStreetMap Nominatim, cached in a JSON
+file so each city is looked up once.
+"""
+
+import json
+import math
+import time
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+
+from journal import query_id
+from maps_parser import RESULT_CAP
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_USER_AGENT = "scrapka/0.1 (Google Maps tile planner)"
+# Nominatim usage policy: at most one request per second
+NOMINATIM_INTERVAL = 1.0
+
+# Browser viewport the zoom level is fitted to (see CONTEXT_OPTIONS)
+VIEWPORT_WIDTH = 1920
+VIEWPORT_HEIGHT = 1080
+TILE_SIZE = 256
+MIN_ZOOM = 3
+MAX_ZOOM = 21
+
+
+@dataclass(frozen=True)
+class Tile:
+  """Bounding box of a map area, in degrees."""
+
+  south: float
+  west: float
+  north: float
+  east: float
+
+  @classmethod
+  def parse(cls, text: str) -> "Tile":
+    """Parse `south,west,north,east`."""
+    try:
+      south, west, north, east = (float(part) for part in text.split(","))
+    except ValueError as e:
+      raise ValueError(f"Invalid bbox {text!r}, expected south,west,north,east") from e
+    if south >= north or west >= east:
+      raise ValueError(f"Invalid bbox {text!r}, expected south < north and west < east")
+    return cls(south, west, north, east)
+
+  def __str__(self) -> str:
+    return f"{self.south:.5f},{self.west:.5f},{self.north:.5f},{self.east:.5f}"
+
+  @property
+  def center(self) -> tuple[float, float]:
+    return (self.south + self.north) / 2, (self.west + self.east) / 2
+
+  @property
+  def zoom(self) -> float:
+    """Largest zoom (0.5 steps) at which the whole tile fits in the viewport."""
+    lng_zoom = math.log2(VIEWPORT_WIDTH * 360 / (TILE_SIZE * (self.east - self.west)))
+    mercator_span = abs(_mercator_y(self.north) - _mercator_y(self.south))
+    lat_zoom = math.log2(VIEWPORT_HEIGHT * 2 * math.pi / (TILE_SIZE * mercator_span))
+    zoom = math.floor(min(lng_zoom, lat_zoom) * 2) / 2
+    return max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+
+  def grid(self, size: int) -> list["Tile"]:
+    """Split into size × size tiles (row by row, south to north)."""
+    lat_step = (self.north - self.south) / size
+    lng_step = (self.east - self.west) / size
+    return [
+      Tile(
+        self.south + row * lat_step,
+        self.west + col * lng_step,
+        self.south + (row + 1) * lat_step,
+        self.west + (col + 1) * lng_step,
+      )
+      for row in range(size)
+      for col in range(size)
+    ]
+
+
+def _mercator_y(lat: float) -> float:
+  lat = max(-85.0, min(85.0, lat))
+  return math.log(math.tan(math.pi / 4 + math.radians(lat) / 2))
+
+
+def tile_url(term: str, tile: Tile) -> str:
+  """Google Maps search URL for `term` centered on the tile."""
+  lat, lng = tile.center
+  return f"https://www.google.com/maps/search/{urllib.parse.quote_plus(term)}/@{lat:.6f},{lng:.6f},{tile.zoom:g}z"
+
+
+class BboxResolver:
+  """City bounding boxes from Nominatim, cached in a JSON file."""
+
+  def __init__(self, cache_file: str = "city_bboxes.json"):
+    self.cache_file = Path(cache_file)
+    self.cache: dict[str, str] = {}
+    self._last_request = 0.0
+    if self.cache_file.exists():
+      self.cache = json.loads(self.cache_file.read_text(encoding="utf-8"))
+
+  def resolve(self, city: str, country: str = "") -> Tile | None:
+    key = f"{city}|{country}"
+    if key not in self.cache:
+      bbox = self._lookup(city, country)
+      if bbox is None:
+        return None
+      self.cache[key] = str(bbox)
+      self.cache_file.write_text(json.dumps(self.cache, ensure_ascii=False, indent=2), encoding="utf-8")
+    return Tile.parse(self.cache[key])
+
+  def _lookup(self, city: str, country: str) -> Tile | None:
+    params = {"city": city, "format": "jsonv2", "limit": 1}
+    if country:
+      params["countrycodes" if len(country) == 2 else "country"] = country
+
+    wait = NOMINATIM_INTERVAL - (time.monotonic() - self._last_request)
+    if wait > 0:
+      time.sleep(wait)
+    self._last_request = time.monotonic()
+
+    request = urllib.request.Request(
+      f"{NOMINATIM_URL}?{urllib.parse.urlencode(params)}",
+      headers={"User-Agent": NOMINATIM_USER_AGENT},
+    )
+    try:
+      with urllib.request.urlopen(request, timeout=15) as response:
+        results = json.loads(response.read())
+    except (OSError, ValueError) as e:
+      print(f"⚠️  Nominatim lookup failed for {city}: {e}")
+      return None
+
+    if not results:
+      print(f"⚠️  Nominatim found no bounding box for {city} {country}".rstrip())
+      return None
+    # Nominatim order: [south, north, west, east]
+    south, north, west, east = (float(v) for v in results[0]["boundingbox"])
+    return Tile(south, west, north, east)
+
+
+class TilePlanner:
+  """Turns text queries into tile queries and refines them from their results."""
+
+  def __init__(
+    self,
+    resolver: BboxResolver | None = None,
+    grid: int = 2,
+    max_depth: int = 3,
+    min_new: int = 5,
+    result_cap: int = RESULT_CAP,
+  ):
+    self.resolver = resolver or BboxResolver()
+    self.grid = grid
+    self.max_depth = max_depth
+    self.min_new = min_new
+    self.result_cap = result_cap
+    self.split = 0
+    self.pruned = 0
+
+  def tile_query(self, q: dict, tile: Tile, depth: int) -> dict:
+    """Copy of a parse_csv query restricted to one tile."""
+    return {
+      **q,
+      "tile": str(tile),
+      "depth": depth,
+      "url": tile_url(q["search"], tile),
+    }
+
+  def plan(self, queries: list[dict]) -> list[dict]:
+    """Initial grid of tile queries; queries whose city has no bbox are kept as text searches."""
+    planned = []
+    for q in queries:
+      bbox = Tile.parse(q["bbox"]) if q.get("bbox") else self.resolver.resolve(q["city"], q.get("country", ""))
+      if bbox is None:
+        planned.append(q)
+        continue
+      planned.extend(self.tile_query(q, tile, 0) for tile in bbox.grid(self.grid))
+    return planned
+
+  def refine(self, q: dict, results: int | None, new_places: int | None) -> list[dict]:
+    """Follow-up tiles for a finished tile query (empty if it needs none)."""
+    if "tile" not in q or results is None or results < self.result_cap:
+      return []
+    if (new_places or 0) < self.min_new or q["depth"] >= self.max_depth:
+      self.pruned += 1
+      return []
+    self.split += 1
+    return [self.tile_query(q, tile, q["depth"] + 1) for tile in Tile.parse(q["tile"]).grid(2)]
+
+  def resume(self, queries: list[dict], coverage: dict[str, dict]) -> list[dict]:
+    """Replay refinement over tiles completed in an earlier run; returns the tiles still to search.
+
+    `coverage` maps query IDs of completed queries to their journal stats.
+    """
+    remaining = []
+    frontier = list(queries)
+    while frontier:
+      q = frontier.pop()
+      done = coverage.get(query_id(q))
+      if done is None:
+        remaining.append(q)
+      else:
+        frontier.extend(self.refine(q, done["results"], done["new_places"]))
+    remaining.reverse()
+    # Only count decisions made during this run
+    self.split = self.pruned = 0
+    return remaining
@@ -0,0 +1,65 @@
+"""
+Query grid of main.py: every search term × every city of a CSV file.
+
+Kept free of browser and server dependencies, so the coordinator
+(server.py --jobs) and scheduler.py can read the grid without them.
+
+CSV Format:
+    search,city,country[,bbox]
+    медичний центр,київ,ua
+    гінеколог,харків,
+"""
+
+import csv
+from pathlib import Path
+
+
+def parse_csv(csv_file: str) -> list[dict]:
+  """Parse CSV and generate all combinations of search terms × cities."""
+  csv_path = Path(csv_file)
+  if not csv_path.exists():
+    raise FileNotFoundError(f"CSV not found: {csv_file}")
+
+  # Collect unique search terms and cities
+  search_terms = set()
+  cities = {}  # city -> country mapping
+  bboxes = {}  # city -> optional "south,west,north,east" for the tile planner
+
+  with open(csv_path, "r", encoding="utf-8") as f:
+    reader = csv.DictReader(f)
+    for row in reader:
+      search = row.get("search", "").strip()
+      city = row.get("city", "").strip()
+      country = row.get("country", "").strip()
+      bbox = (row.get("bbox") or "").strip()
+
+      if search:
+        search_terms.add(search)
+      if city:
+        # Store city with its country (first occurrence wins if duplicates)
+        if city not in cities:
+          cities[city] = country
+        if bbox and city not in bboxes:
+          bboxes[city] = bbox
+
+  if not search_terms:
+    raise ValueError("No search terms found in CSV")
+  if not cities:
+    raise ValueError("No cities found in CSV")
+
+  # Generate all combinations: search × city
+  queries = []
+  for search in sorted(search_terms):
+    for city, country in sorted(cities.items()):
+      query = f"{search} {city}"
+      q = {
+        "search": search,
+        "city": city,
+        "country": country,
+        "query": query,
+      }
+      if city in bboxes:
+        q["bbox"] = bboxes[city]
+      queries.append(q)
+
+  return queries
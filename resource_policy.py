@@ -0,0 +1,145 @@
+"""
+Resource policy for scraper tabs: skip what the results feed doesn't need.
+
+A Maps tab downloads map tiles, place photos, fonts and telemetry, while the
+scraper only needs the page scripts and the `tbm=map` JSON. The policy is
+applied with `context.route`: unneeded requests are aborted (or answered
+with a tiny stub where Maps would otherwise retry), everything else falls
+through to the network or to other route handlers.
+
+Aborted requests have no size, so bytes saved are estimated per kind of
+resource (ESTIMATED_BYTES, rough averages of a Maps session).
+
+Usage:
+    uv run python main.py queries.csv --capture --block-resources lean
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field, replace
+
+from playwright.sync_api import Error as PlaywrightError
+
+import metrics
+
+RESOURCES_BLOCKED = metrics.counter("scrapka_resources_blocked_total", "Requests blocked by the resource policy", ["kind"])
+RESOURCE_BYTES_SAVED = metrics.counter("scrapka_resource_bytes_saved_total", "Estimated bytes not downloaded thanks to the resource policy")
+
+# Rough average transfer size per blocked request
+ESTIMATED_BYTES = {
+  "tile": 20_000,
+  "photo": 30_000,
+  "image": 8_000,
+  "font": 35_000,
+  "media": 100_000,
+  "stylesheet": 15_000,
+  "telemetry": 500,
+}
+
+# 1x1 transparent GIF: blocked images load instead of erroring (telemetry gets an empty 204, so no retries)
+BLANK_GIF = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b")
+
+# (kind, URL pattern) checked in order, the first match decides the kind
+DEFAULT_BLOCK_URLS = (
+  ("tile", r"^https://www\.google\.com/maps/vt[/?]"),
+  ("tile", r"^https://khms?\d*\.google(apis)?\.com/"),
+  ("tile", r"^https://streetviewpixels-pa\.googleapis\.com/"),
+  ("photo", r"^https://lh\d\.(googleusercontent|ggpht)\.com/"),
+  ("font", r"^https://fonts\.(gstatic|googleapis)\.com/"),
+  ("telemetry", r"/gen_204|/log\?|^https://play\.google\.com/log|^https://csp\.withgoogle\.com/"),
+)
+
+# Always passed through: search responses and the Maps app itself
+DEFAULT_ALLOW_URLS = (
+  r"tbm=map",
+  r"^https://www\.google\.com/maps/_/js/",
+  r"^https://www\.google\.com/maps/preview/",
+  r"^https://maps\.googleapis\.com/maps/api/js",
+)
+
+# Playwright resource types that are never needed to read the feed
+DEFAULT_BLOCK_TYPES = frozenset({"image", "font", "media"})
+
+
+@dataclass(frozen=True)
+class ResourcePolicy:
+  """Which requests a scraper tab skips. Allow patterns win over block patterns and types."""
+
+  block_types: frozenset[str] = DEFAULT_BLOCK_TYPES
+  block_urls: tuple[tuple[str, str], ...] = DEFAULT_BLOCK_URLS
+  allow_urls: tuple[str, ...] = DEFAULT_ALLOW_URLS
+  _block: list[tuple[str, re.Pattern]] = field(init=False, repr=False, compare=False)
+  _allow: re.Pattern | None = field(init=False, repr=False, compare=False)
+
+  def __post_init__(self):
+    object.__setattr__(self, "_block", [(kind, re.compile(pattern)) for kind, pattern in self.block_urls])
+    object.__setattr__(self, "_allow", re.compile("|".join(f"(?:{p})" for p in self.allow_urls)) if self.allow_urls else None)
+
+  def classify(self, url: str, resource_type: str) -> str | None:
+    """Kind of resource to block ("tile", "photo", "font", ...), None to let the request through."""
+    if self._allow and self._allow.search(url):
+      return None
+    for kind, pattern in self._block:
+      if pattern.search(url):
+        return kind
+    if resource_type in self.block_types:
+      return resource_type
+    return None
+
+
+# --block-resources presets
+POLICIES = {
+  "off": None,
+  "lean": ResourcePolicy(),
+  # Also unstyled: Maps still builds the feed, but screenshots / headful runs look broken
+  "strict": replace(ResourcePolicy(), block_types=DEFAULT_BLOCK_TYPES | {"stylesheet"}),
+}
+
+
+class ResourceBlocker:
+  """Applies a ResourcePolicy to browser contexts and counts what it blocked."""
+
+  def __init__(self, policy: ResourcePolicy):
+    self.policy = policy
+    self.blocked: Counter[str] = Counter()
+    self.bytes_saved = 0
+    self._taken = (0, 0)
+    # Route handlers of several contexts may run on different threads
+    self._lock = threading.Lock()
+
+  def install(self, context):
+    context.route("**/*", self._handle)
+
+  def _handle(self, route):
+    request = route.request
+    kind = self.policy.classify(request.url, request.resource_type)
+    try:
+      if kind is None:
+        # Not ours: the network, or another route handler (e.g. the benchmarks' fake Maps)
+        route.fallback()
+        return
+      if request.resource_type == "image":
+        route.fulfill(status=200, content_type="image/gif", body=BLANK_GIF)
+      elif kind == "telemetry":
+        route.fulfill(status=204, body="")
+      else:
+        route.abort()
+    except PlaywrightError:
+      # Page closed while the request was pending
+      return
+
+    saved = ESTIMATED_BYTES.get(kind, 0)
+    with self._lock:
+      self.blocked[kind] += 1
+      self.bytes_saved += saved
+    RESOURCES_BLOCKED.inc(kind=kind)
+    RESOURCE_BYTES_SAVED.inc(saved)
+
+  def take(self) -> tuple[int, int]:
+    """(requests blocked, estimated bytes saved) since the previous call."""
+    with self._lock:
+      totals = (sum(self.blocked.values()), self.bytes_saved)
+    requests, saved = totals[0] - self._taken[0], totals[1] - self._taken[1]
+    self._taken = totals
+    return requests, saved
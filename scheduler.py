@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Staleness-driven re-scrape scheduling on top of the query journal.
+
+The journal file also keeps a refresh history per query (`refreshes` table):
+when it last ran and how many new places it turns up per day, an exponential
+moving average over re-runs (a first run only sets the baseline, everything
+is new then). A query's priority is the number of new places expected to be
+waiting for it, change rate × days since its last run; queries that never ran
+come first. `select` keeps the top queries that fit a query and/or time
+budget, timing each by its last wall time.
+
+Usage:
+    # Refresh job: the 50 most promising queries, or what fits in 2 hours
+    uv run python main.py queries.csv --capture --refresh --max-queries 50 --max-minutes 120
+
+    # Show the ranking without scraping
+    uv run python scheduler.py queries.csv --max-queries 50
+"""
+
+import argparse
+import math
+import sqlite3
+import statistics
+import time
+from pathlib import Path
+
+from journal import COMPLETED, query_id
+from queries import parse_csv
+
+DAY = 86400.0
+
+
+class RefreshScheduler:
+  """Ranks queries by expected new places since their last run."""
+
+  def __init__(
+    self,
+    path: str,
+    smoothing: float = 0.5,
+    default_rate: float = 1.0,
+    min_rate: float = 0.05,
+    default_seconds: float = 60.0,
+  ):
+    # Weight of the latest run in the change rate average
+    self.smoothing = smoothing
+    # New places per day assumed for queries with only one run, when no query has a rate yet
+    self.default_rate = default_rate
+    # Floor so queries that never change still come back eventually
+    self.min_rate = min_rate
+    # Wall time assumed for queries that never ran
+    self.default_seconds = default_seconds
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    self._conn = sqlite3.connect(path, timeout=30)
+    self._conn.row_factory = sqlite3.Row
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute(
+      """
+      CREATE TABLE IF NOT EXISTS refreshes (
+        query_id TEXT PRIMARY KEY,
+        runs INTEGER NOT NULL,
+        last_run REAL NOT NULL,
+        change_rate REAL
+      )
+      """
+    )
+    self._conn.commit()
+    self._seed()
+
+  def close(self):
+    self._conn.close()
+
+  def _seed(self):
+    """Give completed journal queries without history their last run, before this run's completions overwrite it.
+
+    Their first recorded re-run then yields a change rate instead of only a baseline.
+    """
+    try:
+      with self._conn:
+        self._conn.execute(
+          """
+          INSERT OR IGNORE INTO refreshes (query_id, runs, last_run, change_rate)
+          SELECT query_id, 1, finished_at, NULL FROM queries
+          WHERE status = ? AND query_id IS NOT NULL AND finished_at IS NOT NULL
+          """,
+          (COMPLETED,),
+        )
+    except sqlite3.OperationalError:
+      # No journal table yet: nothing ran
+      pass
+
+  def record(self, q: dict, new_places: int | None, finished_at: float | None = None):
+    """Update a query's refresh history after it completed (new_places None: only the run time)."""
+    qid = query_id(q)
+    finished_at = finished_at or time.time()
+    row = self._conn.execute("SELECT runs, last_run, change_rate FROM refreshes WHERE query_id = ?", (qid,)).fetchone()
+    if row is None:
+      runs, rate = 1, None
+    else:
+      runs, rate = row["runs"] + 1, row["change_rate"]
+      if new_places is not None:
+        # At least an hour, so back-to-back retries don't look like a burst of changes
+        observed = new_places / max((finished_at - row["last_run"]) / DAY, 1 / 24)
+        rate = observed if rate is None else self.smoothing * observed + (1 - self.smoothing) * rate
+    with self._conn:
+      self._conn.execute(
+        """
+        INSERT INTO refreshes (query_id, runs, last_run, change_rate) VALUES (?, ?, ?, ?)
+        ON CONFLICT (query_id) DO UPDATE SET
+          runs = excluded.runs, last_run = excluded.last_run, change_rate = excluded.change_rate
+        """,
+        (qid, runs, finished_at, rate),
+      )
+
+  def _history(self) -> dict[str, dict]:
+    """query_id -> last_run, change_rate and wall_time; completed journal queries without history count as one run."""
+    history = {}
+    # The journal's own table: seeds queries completed before the scheduler kept history
+    for row in self._conn.execute("SELECT query_id, finished_at, wall_time FROM queries WHERE status = ? AND query_id IS NOT NULL", (COMPLETED,)):
+      history[row["query_id"]] = {"last_run": row["finished_at"], "change_rate": None, "wall_time": row["wall_time"]}
+    for row in self._conn.execute("SELECT query_id, last_run, change_rate FROM refreshes"):
+      entry = history.setdefault(row["query_id"], {"wall_time": None})
+      entry.update(last_run=row["last_run"], change_rate=row["change_rate"])
+    return history
+
+  def rank(self, queries: list[dict], now: float | None = None) -> list[dict]:
+    """Queries with their priority, expected new places and estimated seconds, most urgent first."""
+    now = now or time.time()
+    try:
+      history = self._history()
+    except sqlite3.OperationalError:
+      # No journal table yet: nothing ran
+      history = {}
+    known_rates = [entry["change_rate"] for entry in history.values() if entry.get("change_rate") is not None]
+    prior_rate = statistics.median(known_rates) if known_rates else self.default_rate
+    known_times = [entry["wall_time"] for entry in history.values() if entry.get("wall_time")]
+    typical_seconds = statistics.median(known_times) if known_times else self.default_seconds
+
+    ranked = []
+    for q in queries:
+      entry = history.get(query_id(q))
+      if entry is None or entry.get("last_run") is None:
+        ranked.append({"q": q, "priority": math.inf, "age_days": None, "rate": None, "seconds": typical_seconds})
+        continue
+      rate = entry["change_rate"] if entry["change_rate"] is not None else prior_rate
+      rate = max(rate, self.min_rate)
+      age_days = max(now - entry["last_run"], 0) / DAY
+      ranked.append({"q": q, "priority": rate * age_days, "age_days": age_days, "rate": rate, "seconds": entry["wall_time"] or typical_seconds})
+    ranked.sort(key=lambda item: item["priority"], reverse=True)
+    return ranked
+
+  def select(self, queries: list[dict], max_queries: int | None = None, max_seconds: float | None = None, overhead: float = 0.0) -> list[dict]:
+    """Top queries by priority within the budgets (`overhead`: seconds added per query, e.g. the search delay)."""
+    selected = []
+    spent = 0.0
+    for item in self.rank(queries):
+      if max_queries is not None and len(selected) >= max_queries:
+        break
+      cost = item["seconds"] + overhead
+      if max_seconds is not None and selected and spent + cost > max_seconds:
+        break
+      selected.append(item)
+      spent += cost
+    return selected
+
+
+def describe(item: dict) -> str:
+  q = item["q"]
+  if item["age_days"] is None:
+    return f"{q['query']}: never ran"
+  return f"{q['query']}: {item['priority']:.1f} expected new ({item['rate']:.2f}/day, last run {item['age_days']:.1f} days ago)"
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description="Rank queries for a refresh run (main.py --refresh) without scraping",
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  # Top 20 queries by expected new places
+  uv run python scheduler.py queries.csv --max-queries 20
+
+  # What fits into one hour, with another journal
+  uv run python scheduler.py queries.csv --max-minutes 60 --journal refresh_journal.db
+        """,
+  )
+  parser.add_argument("csv_file", help="CSV file with search queries")
+  parser.add_argument("--journal", type=str, default="scrapka_journal.db", help="Progress journal (default: scrapka_journal.db)")
+  parser.add_argument("--max-queries", type=int, default=None, help="Query budget")
+  parser.add_argument("--max-minutes", type=float, default=None, help="Time budget in minutes")
+  args = parser.parse_args()
+
+  queries = parse_csv(args.csv_file)
+  scheduler = RefreshScheduler(args.journal)
+  try:
+    max_seconds = args.max_minutes * 60 if args.max_minutes else None
+    selected = scheduler.select(queries, args.max_queries, max_seconds)
+  finally:
+    scheduler.close()
+
+  minutes = sum(item["seconds"] for item in selected) / 60
+  print(f"🗓️  {len(selected)} of {len(queries)} queries (~{minutes:.0f} min of scraping):")
+  for i, item in enumerate(selected, 1):
+    print(f"  {i}. {describe(item)}")
+
+
+if __name__ == "__main__":
+  main()
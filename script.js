@@ -1,7 +1,7 @@
 // ==UserScript==
 // @name         Google Maps Scraper - Server Sender
 // @namespace    http://google.com/
-// @version      2.0.0
+// @version      2.1.0
 // @description  Sends Google Maps data to local server (localhost:8080)
 // @author       Web Automation Lover
 // @match        *://*.google.com/maps/search/*/*
@@ -213,19 +213,41 @@
 
     // Configuration
     const SERVER_URL = 'http://localhost:8080';
-    const BATCH_SIZE = 10;
-    const BATCH_TIMEOUT = 5000; // Send batch after 5 seconds
-
-    // Stats
+    const MIN_BATCH_SIZE = 10;
+    const MAX_BATCH_SIZE = 500;
+    const BATCH_TIMEOUT = 5000; // Send a partial batch after 5 seconds
+    // Batches grow while the server answers faster than this, and shrink when it is much slower
+    const TARGET_LATENCY = 1000;
+    // Retry delay: exponential from 1s up to 60s, with full jitter
+    const RETRY_BASE_DELAY = 1000;
+    const RETRY_MAX_DELAY = 60000;
+    // Pending items survive navigation and crashes in IndexedDB (per google domain)
+    const DB_NAME = 'scrapka-sender';
+    const DB_STORE = 'pending';
+    // Tabs share that store: a tab's records are only taken over by another tab once its
+    // heartbeat (in localStorage) is older than STALE_OWNER_AFTER (long enough for throttled background tabs)
+    const HEARTBEAT_PREFIX = 'scrapka-sender-heartbeat:';
+    const HEARTBEAT_INTERVAL = 5000;
+    const STALE_OWNER_AFTER = 120000;
+    const TAB_ID = newBatchKey();
+
+    // Stats (in items; errors are items the server rejected and that were dropped)
     let stats = {
         sent: 0,
         errors: 0,
         pending: 0
     };
 
-    // Batch queue
+    // Pending items as {id, item, batchKey, owner}; id is the IndexedDB key (null without IndexedDB), owner the TAB_ID
     let batchQueue = [];
     let batchTimer = null;
+    let batchSize = MIN_BATCH_SIZE;
+    // Batch being sent or retried: {key, records}; its key stays the same across retries
+    let currentBatch = null;
+    let sending = false;
+    let failures = 0;
+    let retryTimer = null;
+    let dbPromise = null;
 
     // Create status indicator
     function createStatusIndicator() {
@@ -294,62 +316,290 @@
         return false;
     }
 
-    // Send batch to server
+    // IndexedDB store of pending items (null if IndexedDB is unavailable)
+    function openDb() {
+        if (!dbPromise) {
+            dbPromise = new Promise(resolve => {
+                if (typeof indexedDB === 'undefined') return resolve(null);
+                const request = indexedDB.open(DB_NAME, 1);
+                request.onupgradeneeded = () => {
+                    request.result.createObjectStore(DB_STORE, { keyPath: 'id', autoIncrement: true });
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => {
+                    console.error('⚠️ IndexedDB unavailable, pending items are kept in memory only:', request.error);
+                    resolve(null);
+                };
+            });
+        }
+        return dbPromise;
+    }
+
+    // Run `action(store)` in one transaction; resolves with its result once committed
+    async function withStore(mode, action) {
+        const db = await openDb();
+        if (!db) return null;
+        return new Promise((resolve, reject) => {
+            const tx = db.transaction(DB_STORE, mode);
+            const result = action(tx.objectStore(DB_STORE));
+            tx.oncomplete = () => resolve(result);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error);
+        });
+    }
+
+    // Store new records and fill in their ids (all set once this resolves: onsuccess fires before the commit)
+    async function persistRecords(records) {
+        try {
+            await withStore('readwrite', store => {
+                records.forEach(record => {
+                    store.add({ item: record.item, owner: record.owner }).onsuccess = event => {
+                        record.id = event.target.result;
+                    };
+                });
+            });
+        } catch (error) {
+            console.error('⚠️ Could not persist pending items:', error);
+        }
+    }
+
+    async function updateRecords(records) {
+        const stored = records.filter(record => record.id != null);
+        if (!stored.length) return;
+        try {
+            await withStore('readwrite', store => stored.forEach(record => store.put(record)));
+        } catch (error) {
+            console.error('⚠️ Could not update pending items:', error);
+        }
+    }
+
+    async function deleteRecords(records) {
+        const stored = records.filter(record => record.id != null);
+        if (!stored.length) return;
+        try {
+            await withStore('readwrite', store => stored.forEach(record => store.delete(record.id)));
+        } catch (error) {
+            console.error('⚠️ Could not delete sent items:', error);
+        }
+    }
+
+    function beat() {
+        try {
+            localStorage.setItem(HEARTBEAT_PREFIX + TAB_ID, String(Date.now()));
+        } catch (e) {
+            // Storage disabled or full: other tabs take this tab's items over after STALE_OWNER_AFTER
+        }
+    }
+
+    function lastHeartbeat(owner) {
+        try {
+            return Number(localStorage.getItem(HEARTBEAT_PREFIX + owner)) || 0;
+        } catch (e) {
+            return 0;
+        }
+    }
+
+    function ownerAlive(owner) {
+        return owner === TAB_ID || (!!owner && Date.now() - lastHeartbeat(owner) < STALE_OWNER_AFTER);
+    }
+
+    // Forget heartbeats of tabs that are gone
+    function sweepHeartbeats() {
+        try {
+            Object.keys(localStorage)
+                .filter(key => key.startsWith(HEARTBEAT_PREFIX) && !ownerAlive(key.slice(HEARTBEAT_PREFIX.length)))
+                .forEach(key => localStorage.removeItem(key));
+        } catch (e) {
+            // No localStorage: nothing to sweep
+        }
+    }
+
+    // Take over the items of tabs that are gone (navigation, crash, server outage) in one transaction,
+    // so two tabs never both claim them. `others` counts items still held by live tabs.
+    async function claimStaleRecords() {
+        try {
+            const result = await withStore('readwrite', store => {
+                const claim = { records: [], others: 0 };
+                store.getAll().onsuccess = event => {
+                    event.target.result.forEach(record => {
+                        if (record.owner === TAB_ID) return;
+                        if (ownerAlive(record.owner)) {
+                            claim.others += 1;
+                            return;
+                        }
+                        record.owner = TAB_ID;
+                        store.put(record);
+                        claim.records.push(record);
+                    });
+                };
+                return claim;
+            });
+            return result || { records: [], others: 0 };
+        } catch (error) {
+            console.error('⚠️ Could not load pending items:', error);
+            return { records: [], others: 0 };
+        }
+    }
+
+    function newBatchKey() {
+        if (typeof crypto !== 'undefined' && crypto.randomUUID) return crypto.randomUUID();
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    }
+
+    // Next batch: records already assigned to a batch go first, under the same key
+    function takeBatch() {
+        const key = batchQueue[0].batchKey;
+        if (key) {
+            const records = batchQueue.filter(record => record.batchKey === key);
+            batchQueue = batchQueue.filter(record => record.batchKey !== key);
+            return { key, records };
+        }
+        const records = batchQueue.splice(0, batchSize);
+        const batch = { key: newBatchKey(), records };
+        records.forEach(record => { record.batchKey = batch.key; });
+        return batch;
+    }
+
+    // Grow batches while the server keeps up and items pile up; shrink when it is slow
+    function adaptBatchSize(latency) {
+        if (latency < TARGET_LATENCY && batchQueue.length >= batchSize) {
+            batchSize = Math.min(MAX_BATCH_SIZE, batchSize * 2);
+        } else if (latency > 2 * TARGET_LATENCY) {
+            batchSize = Math.max(MIN_BATCH_SIZE, Math.floor(batchSize / 2));
+        }
+    }
+
+    function scheduleRetry(retryAfter) {
+        failures += 1;
+        batchSize = Math.max(MIN_BATCH_SIZE, Math.floor(batchSize / 2));
+        const backoff = Math.min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (failures - 1));
+        // Full jitter, but never earlier than the server asked for
+        const delay = Math.max(retryAfter || 0, Math.random() * backoff);
+        retryTimer = setTimeout(() => {
+            retryTimer = null;
+            sendBatch();
+        }, delay);
+        return delay;
+    }
+
+    // Seconds of a Retry-After header in ms (0 if absent or a date)
+    function retryAfterMs(response) {
+        const seconds = Number(response.headers.get('Retry-After'));
+        return Number.isFinite(seconds) ? seconds * 1000 : 0;
+    }
+
+    // Send the next batch to the server (one request at a time)
     async function sendBatch() {
-        if (batchQueue.length === 0) return;
+        if (sending || retryTimer) return;
+        if (!currentBatch) {
+            if (batchQueue.length === 0) return;
+            currentBatch = takeBatch();
+            await updateRecords(currentBatch.records);
+        }
 
-        const batch = [...batchQueue];
-        batchQueue = [];
-        stats.pending += batch.length;
-        updateStatus('sending', `Sending ${batch.length} items...`);
+        const batch = currentBatch;
+        sending = true;
+        stats.pending = batchQueue.length + batch.records.length;
+        updateStatus('sending', `Sending ${batch.records.length} items...`);
+        const started = performance.now();
 
         try {
             const response = await fetch(`${SERVER_URL}/api/data`, {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'Idempotency-Key': batch.key
                 },
                 mode: 'cors',
-                body: JSON.stringify({ items: batch })
+                body: JSON.stringify({ items: batch.records.map(record => record.item) })
             });
 
-            if (response.ok) {
-                const result = await response.json();
-                stats.sent += batch.length;
-                stats.pending -= batch.length;
-                updateStatus('connected', `Last batch: ${result.saved || batch.length} saved`);
-                console.log(`✅ Sent ${batch.length} items to server`);
+            if (response.status >= 400 && response.status < 500 && response.status !== 408 && response.status !== 429) {
+                // The server will never accept this batch; retrying would block the queue
+                stats.errors += batch.records.length;
+                console.error(`❌ Server rejected ${batch.records.length} items (HTTP ${response.status}), dropping them`);
+            } else if (!response.ok) {
+                const error = new Error(`HTTP ${response.status}`);
+                error.retryAfter = retryAfterMs(response);
+                throw error;
             } else {
-                throw new Error(`HTTP ${response.status}`);
+                const result = await response.json();
+                stats.sent += batch.records.length;
+                adaptBatchSize(performance.now() - started);
+                updateStatus('connected', `Last batch: ${result.saved ?? batch.records.length} saved (batch size ${batchSize})`);
+                console.log(`✅ Sent ${batch.records.length} items to server`);
             }
+            failures = 0;
+            currentBatch = null;
+            await deleteRecords(batch.records);
         } catch (error) {
-            stats.errors += batch.length;
-            stats.pending -= batch.length;
-            updateStatus('error', `Error: ${error.message}`);
+            // Not counted in stats.errors: the items are retried, errors only counts items dropped
+            const delay = scheduleRetry(error.retryAfter);
+            updateStatus('error', `Error: ${error.message}, retry in ${(delay / 1000).toFixed(1)}s`);
             console.error('❌ Failed to send batch:', error);
-            // Put items back in queue for retry
-            batchQueue.unshift(...batch);
+        } finally {
+            sending = false;
+            stats.pending = batchQueue.length + (currentBatch ? currentBatch.records.length : 0);
         }
-    }
 
-    // Add item to batch queue
-    function queueItem(item) {
-        batchQueue.push(item);
+        if (!retryTimer) scheduleSend();
+    }
 
-        // Reset timer
+    // Send now if a full batch is waiting, otherwise within BATCH_TIMEOUT
+    function scheduleSend() {
         if (batchTimer) {
             clearTimeout(batchTimer);
+            batchTimer = null;
         }
-
-        // Send immediately if batch is full
-        if (batchQueue.length >= BATCH_SIZE) {
+        if (batchQueue.length >= batchSize) {
             sendBatch();
-        } else {
-            // Otherwise schedule send
-            batchTimer = setTimeout(sendBatch, BATCH_TIMEOUT);
+        } else if (batchQueue.length > 0) {
+            batchTimer = setTimeout(() => {
+                batchTimer = null;
+                sendBatch();
+            }, BATCH_TIMEOUT);
         }
+    }
 
+    // Add items to the batch queue (persisted before they are sent)
+    async function queueItems(items) {
+        const records = items.map(item => ({ id: null, item, batchKey: null, owner: TAB_ID }));
+        // Queued only once their ids are known: a record sent before that would never be deleted from IndexedDB
+        await persistRecords(records);
+        batchQueue.push(...records);
+        stats.pending += records.length;
         updateStatus('connected', `Queued: ${batchQueue.length} items`);
+        scheduleSend();
+    }
+
+    // Requeue items a previous page (or another tab that is gone) didn't get to send
+    async function restorePending() {
+        sweepHeartbeats();
+        const { records, others } = await claimStaleRecords();
+        // Look again later in case those tabs die with items still pending
+        if (others) setTimeout(restorePending, STALE_OWNER_AFTER);
+        if (!records.length) return;
+        // Unsent batches keep their idempotency keys, so a replay is ignored by the server
+        batchQueue.unshift(...records);
+        stats.pending += records.length;
+        console.log(`♻️ Restored ${records.length} pending items`);
+        scheduleSend();
+    }
+
+    // Search text from the URL (/maps/search/<query>/...)
+    function currentSearchQuery() {
+        const match = location.pathname.match(/\/maps\/search\/([^/]+)/);
+        if (!match) return '';
+        try {
+            return decodeURIComponent(match[1].replace(/\+/g, ' '));
+        } catch (e) {
+            return match[1];
+        }
+    }
+
+    // main.py query ID, set on <html data-scrapka-query-id> before each search
+    function currentQueryId() {
+        return document.documentElement.dataset.scrapkaQueryId || '';
     }
 
     // Format individual data item
@@ -386,8 +636,10 @@
         resultData.googleKnowledgeURL = resultData.kgmid ? `https://www.google.com/maps/search/*?kgmid=${resultData.kgmid}&kponly` : '';
         resultData.categories = resultData.categories?.join?.(', ') || '';
 
-        // Add timestamp
+        // Add timestamp and the search that produced this item
         resultData.scrapedAt = new Date().toISOString();
+        resultData.query = currentSearchQuery();
+        resultData.queryId = currentQueryId();
 
         function handleSingleField(itemData, config) {
             if (!itemData || !config || !config.length) return null;
@@ -411,7 +663,20 @@
 
         console.log('🚀 Google Maps Server Sender initialized');
         console.log('   Server URL:', SERVER_URL);
-        console.log('   Batch size:', BATCH_SIZE);
+        console.log('   Batch size:', `${MIN_BATCH_SIZE}-${MAX_BATCH_SIZE} (adaptive)`);
+
+        // A reload or navigation ends this tab: its items are taken over right away, not after STALE_OWNER_AFTER
+        beat();
+        setInterval(beat, HEARTBEAT_INTERVAL);
+        window.addEventListener('pagehide', () => {
+            try {
+                localStorage.removeItem(HEARTBEAT_PREFIX + TAB_ID);
+            } catch (e) {
+                // No localStorage: other tabs wait for STALE_OWNER_AFTER
+            }
+        });
+
+        restorePending();
     }
 
     // Modify XHR to capture data
@@ -450,12 +715,12 @@
                         if (filteredData) {
                             console.log(`📦 Captured ${filteredData.length} items from Google Maps`);
 
-                            filteredData.forEach(item => {
-                                const formatted = formatDataItem(item);
-                                if (formatted.name) {
-                                    queueItem(formatted);
-                                }
-                            });
+                            const items = filteredData
+                                .map(item => formatDataItem(item))
+                                .filter(formatted => formatted.name);
+                            if (items.length) {
+                                queueItems(items);
+                            }
                         }
                     } catch (error) {
                         console.error('Error parsing data:', error);
@@ -2,7 +2,10 @@
 """
 Google Maps Scraper Server
 
-Receives data from Tampermonkey script and saves to CSV.
+Receives data from Tampermonkey script and saves to CSV (or SQLite with
+--storage sqlite, which also serves /api/places queries).
+Items whose placeId/cid is already in the output file are skipped
+(index kept in <output>.keys).
 
 Usage:
     # Install dependencies
@@ -13,52 +16,69 @@ Usage:
 
     # Or with custom port/output file
     uv run python server.py --port 8080 --output data.csv
+
+    # Several processes, each writing its own shard (merge with shards.py)
+    uv run python server.py --workers 4
+
+    # Coordinator: hand out the query grid to main.py --coordinator nodes
+    uv run python server.py --host 0.0.0.0 --jobs queries.csv
 """
 
 import argparse
-import csv
+import asyncio
 import json
+import multiprocessing
 import os
+import signal
+import socket
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
 from datetime import datetime
+from multiprocessing.managers import SyncManager
 from pathlib import Path
-from typing import Any
+from typing import Any, TypedDict
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from uvicorn import run
-
-# CSV columns order
-CSV_COLUMNS = [
-  "name",
-  "fullAddress",
-  "phones",
-  "website",
-  "domain",
-  "averageRating",
-  "reviewCount",
-  "categories",
-  "openingHours",
-  "placeId",
-  "kgmid",
-  "cid",
-  "latitude",
-  "longitude",
-  "googleMapsURL",
-  "googleKnowledgeURL",
-  "featuredImage",
-  "scrapedAt",
-]
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from uvicorn import Config, Server, run
+
+import metrics
+from browser_service import camoufox_rss_mb
+from jobs import JobQueue
+from queries import parse_csv
+from shards import COUNTERS, ShardReporter, merge_query_stats, shard_path
+from storage import BufferedCsvWriter, DedupIndex, SqliteWriter
 
 # Stats
 stats = {
   "received": 0,
   "saved": 0,
   "errors": 0,
+  "replayed": 0,
   "start_time": datetime.now(),
 }
 
 
+ITEMS_RECEIVED = metrics.counter("scrapka_items_received_total", "Items received from scrapers")
+ITEMS_SAVED = metrics.counter("scrapka_items_saved_total", "Received items queued for writing (not duplicates)")
+BATCHES_REPLAYED = metrics.counter("scrapka_batches_replayed_total", "Batches ignored because their Idempotency-Key was already ingested")
+INGEST_ERRORS = metrics.counter("scrapka_ingest_errors_total", "Failed /api/data requests")
+INGEST_SECONDS = metrics.histogram("scrapka_ingest_seconds", "Time to parse, validate and queue one /api/data request", ["path"])
+ITEMS_PER_SECOND = metrics.gauge("scrapka_items_per_second", "Items received per second over the last minute")
+WRITER_PENDING = metrics.gauge("scrapka_writer_pending", "Rows buffered and not yet written")
+UPTIME_SECONDS = metrics.gauge("scrapka_uptime_seconds", "Seconds since the server started")
+BROWSER_MEMORY_MB = metrics.gauge("scrapka_browser_memory_mb", "Resident memory of Camoufox processes on this host")
+JOBS = metrics.gauge("scrapka_jobs", "Queries in the coordinator's job queue", ["status"])
+LEASES_GRANTED = metrics.counter("scrapka_job_leases_total", "Job leases handed out to scraper nodes")
+
+# Items per second over a sliding window
+ingest_rate = metrics.RateMeter(window=60.0)
+
+
 class DataItem(BaseModel):
   """Single data item from Google Maps."""
 
@@ -80,6 +100,27 @@ class DataItem(BaseModel):
   googleKnowledgeURL: str | None = None
   featuredImage: str | None = None
   scrapedAt: str | None = None
+  query: str | None = None
+  queryId: str | None = None
+
+
+# Same fields as a plain dict: bulk ingest validates raw JSON straight into the rows it stores
+PlaceRecord = TypedDict("PlaceRecord", {name: field.annotation for name, field in DataItem.model_fields.items()}, total=False)
+PLACE_RECORD = TypeAdapter(PlaceRecord)
+PLACE_RECORDS = TypeAdapter(list[PlaceRecord])
+
+# /api/data/stream validates and queues this many NDJSON lines at a time
+STREAM_CHUNK_LINES = 1000
+# A small gzip/zstd body can expand to gigabytes: its output is handled this many bytes at a time,
+# and a body bigger than STREAM_MAX_BYTES (or a line longer than STREAM_MAX_LINE_BYTES) gets a 413
+STREAM_PIECE_BYTES = 1 << 20
+STREAM_MAX_BYTES = 4 << 30
+STREAM_MAX_LINE_BYTES = 1 << 20
+# zstandard's decompressobj has no max_length; fed this many bytes at a time, it writes at most ~1 MB (128 KB per 4-byte block)
+ZSTD_INPUT_SLICE = 32
+
+# Idempotency-Keys of this many recent batches are remembered
+IDEMPOTENCY_CACHE_SIZE = 10_000
 
 
 class DataBatch(BaseModel):
@@ -88,6 +129,28 @@ class DataBatch(BaseModel):
   items: list[DataItem]
 
 
+class QueryReport(BaseModel):
+  """Per-query run stats reported by main.py."""
+
+  query: str | None = None
+  scrolls: int | None = None
+  wall_time: float | None = None
+
+
+class JobRequest(BaseModel):
+  """Scraper node asking for its next query."""
+
+  worker: str
+
+
+class JobReport(BaseModel):
+  """Outcome of a leased query, reported by the node holding the lease."""
+
+  lease: str
+  error: str | None = None
+  result: dict | None = None
+
+
 class ServerResponse(BaseModel):
   """Server response."""
 
@@ -97,8 +160,172 @@ class ServerResponse(BaseModel):
   message: str | None = None
 
 
-def create_app(output_file: str) -> FastAPI:
-  """Create FastAPI application."""
+class StreamResponse(ServerResponse):
+  """Bulk ingest response."""
+
+  rejected: int = 0
+
+
+class IdempotencyCache:
+  """Responses of recently ingested batches by Idempotency-Key (LRU), so a replayed batch isn't ingested twice."""
+
+  def __init__(self, size: int = IDEMPOTENCY_CACHE_SIZE):
+    self.size = size
+    self._responses: OrderedDict[str, ServerResponse] = OrderedDict()
+    # Keys of requests still being ingested
+    self._in_flight: set[str] = set()
+
+  def replay(self, key: str | None) -> ServerResponse | None:
+    """Response to send instead of ingesting, if `key` was already ingested."""
+    response = self._responses.get(key) if key else None
+    if response is None:
+      return None
+    self._responses.move_to_end(key)
+    stats["replayed"] += 1
+    BATCHES_REPLAYED.inc()
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] 🔁 Ignored replayed batch {key}")
+    return response.model_copy(update={"status": "duplicate", "message": "Batch already received"})
+
+  def reserve(self, key: str | None) -> ServerResponse | None:
+    """Like `replay`, but also marks `key` as in flight until `release`: a concurrent request with it gets a 409."""
+    response = self.replay(key)
+    if response is not None or not key:
+      return response
+    if key in self._in_flight:
+      raise HTTPException(status_code=409, detail=f"Batch {key} is still being received")
+    self._in_flight.add(key)
+    return None
+
+  def release(self, key: str | None):
+    self._in_flight.discard(key)
+
+  def remember(self, key: str | None, response: ServerResponse):
+    if not key:
+      return
+    self._responses[key] = response
+    self._responses.move_to_end(key)
+    while len(self._responses) > self.size:
+      self._responses.popitem(last=False)
+
+
+class StreamTooLarge(ValueError):
+  """A streamed body went over STREAM_MAX_BYTES or STREAM_MAX_LINE_BYTES."""
+
+
+class FrameDecompressor:
+  """Incremental decompressor of a body made of one or more frames (gzip members, zstd frames).
+
+  `eof` is True only when the last frame ended, so a body cut off mid-frame can be told apart
+  from a complete one. `decompress` yields the output in pieces of about `max_length` bytes, so
+  the caller can stop a body that expands too much before it is all in memory.
+  `bounded` is False for decompressors without a max_length argument (zstandard).
+  """
+
+  def __init__(self, factory: Callable[[], Any], bounded: bool = True):
+    self._factory = factory
+    self._bounded = bounded
+    self._current = factory()
+
+  @property
+  def eof(self) -> bool:
+    return self._current.eof
+
+  def decompress(self, data: bytes, max_length: int) -> Iterator[bytes]:
+    while data:
+      if self._current.eof:
+        # Next frame
+        self._current = self._factory()
+      if self._bounded:
+        data = yield from self._decompress_bounded(data, max_length)
+      else:
+        data = yield from self._decompress_sliced(data, max_length)
+
+  def _decompress_bounded(self, data: bytes, max_length: int):
+    """zlib / compression.zstd: every call writes at most max_length. Returns the input after the frame."""
+    current = self._current
+    yield current.decompress(data, max_length)
+    while not current.eof:
+      if getattr(current, "unconsumed_tail", b""):
+        yield current.decompress(current.unconsumed_tail, max_length)
+      elif not getattr(current, "needs_input", True):
+        yield current.decompress(b"", max_length)
+      else:
+        break
+    return current.unused_data if current.eof else b""
+
+  def _decompress_sliced(self, data: bytes, max_length: int):
+    """zstandard: input goes in ZSTD_INPUT_SLICE bytes at a time. Returns the input after the frame."""
+    current = self._current
+    pieces, size = [], 0
+    for start in range(0, len(data), ZSTD_INPUT_SLICE):
+      piece = current.decompress(data[start : start + ZSTD_INPUT_SLICE])
+      pieces.append(piece)
+      size += len(piece)
+      if current.eof:
+        yield b"".join(pieces)
+        return current.unused_data + data[start + ZSTD_INPUT_SLICE :]
+      if size >= max_length:
+        yield b"".join(pieces)
+        pieces, size = [], 0
+    yield b"".join(pieces)
+    return b""
+
+
+def stream_decompressor(content_encoding: str) -> FrameDecompressor | None:
+  """Incremental decompressor for a request's Content-Encoding (None for identity)."""
+  encoding = content_encoding.strip().lower()
+  if encoding in ("", "identity"):
+    return None
+  if encoding in ("gzip", "x-gzip"):
+    return FrameDecompressor(lambda: zlib.decompressobj(wbits=zlib.MAX_WBITS | 16))
+  if encoding == "deflate":
+    return FrameDecompressor(zlib.decompressobj)
+  if encoding == "zstd":
+    try:
+      from compression import zstd  # Python 3.14+
+
+      return FrameDecompressor(zstd.ZstdDecompressor)
+    except ImportError:
+      pass
+    try:
+      import zstandard
+    except ImportError:
+      raise HTTPException(status_code=415, detail="zstd needs Python 3.14+ or: uv pip install zstandard") from None
+    return FrameDecompressor(lambda: zstandard.ZstdDecompressor().decompressobj(read_across_frames=False), bounded=False)
+  raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {content_encoding}")
+
+
+def validate_records(lines: list[bytes]) -> tuple[list[dict], int]:
+  """Validate NDJSON lines into place dicts in one pass. Returns (records, rejected lines)."""
+  try:
+    return PLACE_RECORDS.validate_json(b"[" + b",".join(lines) + b"]"), 0
+  except ValidationError:
+    pass
+  # Some line is broken: keep the valid ones
+  records = []
+  for line in lines:
+    try:
+      records.append(PLACE_RECORD.validate_json(line))
+    except ValidationError:
+      pass
+  return records, len(lines) - len(records)
+
+
+def create_app(
+  output_file: str,
+  dedup: bool = True,
+  flush_size: int = 500,
+  flush_interval: float = 2.0,
+  storage: str = "csv",
+  reporter: ShardReporter | None = None,
+  jobs: JobQueue | None = None,
+) -> FastAPI:
+  """Create FastAPI application.
+
+  With a `reporter` the app is one worker of `--workers N`: `output_file` is its shard, and /stats,
+  /api/queries and /flush cover all workers. With `jobs` it also hands out queries to main.py
+  --coordinator nodes (/api/jobs); workers share the queue through its SQLite file.
+  """
   app = FastAPI(
     title="Google Maps Scraper Server",
     description="Receives data from Tampermonkey script and saves to CSV",
@@ -114,37 +341,92 @@ def create_app(output_file: str) -> FastAPI:
     allow_headers=["*"],
   )
 
-  # Ensure output file exists with headers
-  def init_csv():
-    output_path = Path(output_file)
-    if not output_path.exists():
-      output_path.parent.mkdir(parents=True, exist_ok=True)
-      with open(output_file, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
-        writer.writeheader()
-      print(f"📄 Created new CSV file: {output_file}")
-
-  def append_to_csv(items: list[dict[str, Any]]) -> int:
-    """Append items to CSV file. Returns number of saved items."""
-    saved = 0
-    with open(output_file, "a", newline="", encoding="utf-8") as f:
-      writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
-      for item in items:
-        # Filter only defined columns
-        row = {col: item.get(col, "") for col in CSV_COLUMNS}
-        writer.writerow(row)
-        saved += 1
-    return saved
+  # Single output shared by all requests, flushed from a background thread
+  if storage == "sqlite":
+    writer = SqliteWriter(output_file, flush_size=flush_size, flush_interval=flush_interval)
+  else:
+    writer = BufferedCsvWriter(
+      output_file,
+      dedup=DedupIndex(output_file) if dedup else None,
+      flush_size=flush_size,
+      flush_interval=flush_interval,
+    )
+
+  @app.middleware("http")
+  async def time_ingest(request: Request, call_next):
+    """Time /api/data requests, including body parsing and validation."""
+    if not request.url.path.startswith("/api/data"):
+      return await call_next(request)
+    with INGEST_SECONDS.time(path=request.url.path):
+      return await call_next(request)
+
+  # Batches are answered once per Idempotency-Key header (script.js retries reuse their key)
+  idempotency = IdempotencyCache()
+
+  # queryId -> latest QueryReport fields from main.py
+  query_reports: dict[str, dict] = {}
+
+  def snapshot() -> dict:
+    """This worker's counters, published to the coordinator."""
+    return {
+      "worker": reporter.index,
+      "output_file": os.path.abspath(output_file),
+      "received": stats["received"],
+      "saved": stats["saved"],
+      "errors": stats["errors"],
+      "replayed": stats["replayed"],
+      "duplicates": writer.duplicates,
+      "merged": writer.merged,
+      "pending": writer.pending,
+      "written": writer.written,
+      "write_errors": writer.write_errors,
+      "queries": writer.query_stats_snapshot(),
+      "reports": dict(query_reports),
+    }
+
+  def all_query_stats() -> dict[str, dict]:
+    """queryId -> counts and report, over all workers."""
+    if reporter is not None:
+      return merge_query_stats(reporter.all_snapshots())
+    merged = {query_id: {"received": 0, "new": 0, "duplicates": 0, **report} for query_id, report in query_reports.items()}
+    for query_id, counts in writer.query_stats_snapshot().items():
+      merged.setdefault(query_id, {}).update(counts)
+    return merged
+
+  def query_summary(query_id: str, query_stats: dict[str, dict] | None = None) -> dict:
+    query_stats = all_query_stats() if query_stats is None else query_stats
+    return {"queryId": query_id, "received": 0, "new": 0, "duplicates": 0, **query_stats.get(query_id, {})}
 
   @app.on_event("startup")
   async def startup():
-    init_csv()
+    if not Path(output_file).exists():
+      print(f"📄 Created new {storage} output: {output_file}")
+    started = datetime.now()
+    writer.open()
+    if getattr(writer, "dedup", None) is not None:
+      elapsed = (datetime.now() - started).total_seconds()
+      print(f"🔑 Dedup index: {len(writer.dedup)} known places ({elapsed:.2f}s)")
     print(f"\n{'=' * 60}")
     print("🚀 Google Maps Scraper Server")
     print(f"{'=' * 60}")
-    print(f"📁 Output file: {os.path.abspath(output_file)}")
+    print(f"📁 Output file: {os.path.abspath(output_file)} ({storage})")
+    if reporter is not None:
+      print(f"👷 Worker {reporter.index + 1}/{reporter.workers}")
     print(f"🌐 Server: http://localhost:{args.port}")
     print(f"{'=' * 60}\n")
+    if reporter is not None:
+      reporter.start(snapshot, writer.flush)
+
+  @app.on_event("shutdown")
+  async def shutdown():
+    if reporter is not None:
+      await asyncio.to_thread(reporter.stop)
+    await asyncio.to_thread(writer.close)
+    if reporter is not None:
+      reporter.publish()
+    if jobs is not None:
+      jobs.close()
+    print(f"💾 Flushed and closed {output_file}")
 
   @app.get("/")
   async def root():
@@ -155,7 +437,13 @@ def create_app(output_file: str) -> FastAPI:
       "endpoints": {
         "health": "/health",
         "data": "/api/data (POST)",
+        "stream": "/api/data/stream (POST, NDJSON, gzip/zstd)",
         "stats": "/stats",
+        "flush": "/flush (POST, ?sync=false to skip the fsync)",
+        "places": "/api/places (sqlite storage)",
+        "queries": "/api/queries",
+        "metrics": "/metrics",
+        "jobs": "/api/jobs (with --jobs)",
       },
     }
 
@@ -169,40 +457,292 @@ def create_app(output_file: str) -> FastAPI:
 
   @app.get("/stats")
   async def get_stats():
-    """Get server statistics."""
+    """Get server statistics (summed over all workers with --workers)."""
     uptime = datetime.now() - stats["start_time"]
+    if reporter is not None:
+      snapshots = await asyncio.to_thread(reporter.all_snapshots)
+      return {
+        **{counter: sum(shard[counter] for shard in snapshots) for counter in COUNTERS},
+        "uptime_seconds": uptime.total_seconds(),
+        "workers": [{key: value for key, value in shard.items() if key not in ("queries", "reports")} for shard in snapshots],
+      }
     return {
       "received": stats["received"],
       "saved": stats["saved"],
       "errors": stats["errors"],
+      "replayed": stats["replayed"],
+      "duplicates": writer.duplicates,
+      "merged": writer.merged,
+      "pending": writer.pending,
+      "written": writer.written,
+      "write_errors": writer.write_errors,
       "uptime_seconds": uptime.total_seconds(),
       "output_file": os.path.abspath(output_file),
     }
 
+  @app.post("/flush")
+  async def flush(sync: bool = True):
+    """Write buffered rows to disk and fsync (checkpoint). With --workers, every worker flushes.
+
+    main.py calls it with sync=false after every query: rows are written (so per-query counts are final)
+    without an fsync of every shard.
+    """
+    if reporter is not None:
+      done = await asyncio.to_thread(reporter.request_flush, sync=sync)
+      snapshots = await asyncio.to_thread(reporter.all_snapshots)
+      return {"status": "ok" if done else "timeout", "total_written": sum(shard["written"] for shard in snapshots)}
+    written = await asyncio.to_thread(writer.flush, sync)
+    return {"status": "ok", "written": written, "total_written": writer.written}
+
+  @app.get("/metrics", response_class=PlainTextResponse)
+  async def get_metrics():
+    """Prometheus text format: server metrics plus the ones pushed by scrapers (worker label)."""
+    ITEMS_PER_SECOND.set(ingest_rate.rate())
+    WRITER_PENDING.set(writer.pending)
+    UPTIME_SECONDS.set((datetime.now() - stats["start_time"]).total_seconds())
+    BROWSER_MEMORY_MB.set(await asyncio.to_thread(camoufox_rss_mb))
+    if jobs is not None:
+      progress = await asyncio.to_thread(jobs.progress)
+      for status in ("pending", "leased", "done", "failed"):
+        JOBS.set(progress[status], status=status)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+  @app.post("/api/metrics/{worker}")
+  async def push_metrics(worker: str, snapshot: dict[str, dict]):
+    """Receive a metrics snapshot from a scraper process (main.py)."""
+    metrics.REGISTRY.push(worker, snapshot)
+    return {"status": "ok", "metrics": len(snapshot)}
+
+  def require_sqlite() -> SqliteWriter:
+    if not isinstance(writer, SqliteWriter):
+      raise HTTPException(status_code=400, detail="Query API requires --storage sqlite")
+    if reporter is not None:
+      raise HTTPException(status_code=409, detail="Query API needs one database: merge the shards (shards.py merge) and run without --workers")
+    return writer
+
+  @app.get("/api/places")
+  async def get_places(
+    domain: str | None = None,
+    min_rating: float | None = None,
+    query: str | None = None,
+    query_id: str | None = None,
+    cid: str | None = None,
+    limit: int = Query(100, ge=1, le=10000),
+    offset: int = Query(0, ge=0),
+  ):
+    """Query stored places by indexed fields."""
+    db = require_sqlite()
+    places = await asyncio.to_thread(
+      db.query_places,
+      domain=domain,
+      min_rating=min_rating,
+      query=query,
+      query_id=query_id,
+      cid=cid,
+      limit=limit,
+      offset=offset,
+    )
+    return {"count": len(places), "offset": offset, "places": places}
+
+  @app.get("/api/places/counts")
+  async def get_place_counts(by: str = Query("query", pattern="^(query|queryId|domain)$")):
+    """Count stored places per originating query or per domain."""
+    db = require_sqlite()
+    return {"by": by, "counts": await asyncio.to_thread(db.count_places, by)}
+
+  @app.get("/api/queries")
+  async def get_queries():
+    """Per-query received / new / duplicate counts, plus scroll and timing reports."""
+    query_stats = await asyncio.to_thread(all_query_stats)
+    return {"count": len(query_stats), "queries": [query_summary(query_id, query_stats) for query_id in sorted(query_stats)]}
+
+  @app.get("/api/queries/{query_id}")
+  async def get_query(query_id: str):
+    """Stats of a single query (counts include only rows already checked by the writer)."""
+    return await asyncio.to_thread(query_summary, query_id)
+
+  @app.post("/api/queries/{query_id}")
+  async def report_query(query_id: str, report: QueryReport):
+    """Record scroll count and wall time of a finished query."""
+    query_reports[query_id] = report.model_dump(exclude_none=True)
+    return await asyncio.to_thread(query_summary, query_id)
+
+  def require_jobs() -> JobQueue:
+    if jobs is None:
+      raise HTTPException(status_code=400, detail="Job queue requires --jobs queries.csv")
+    return jobs
+
+  @app.get("/api/jobs")
+  async def get_jobs():
+    """Queue depth, done / failed counts and the leases currently out."""
+    return await asyncio.to_thread(require_jobs().progress)
+
+  @app.post("/api/jobs/next")
+  async def next_job(request: JobRequest):
+    """Lease the next query to a node. `job` is null when none is ready; `finished` once nothing is left at all."""
+    queue = require_jobs()
+    job = await asyncio.to_thread(queue.lease, request.worker)
+    if job is None:
+      progress = await asyncio.to_thread(queue.progress)
+      return {"job": None, "finished": progress["finished"], "depth": progress["depth"]}
+    LEASES_GRANTED.inc()
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] 📋 {request.worker}: {job['q']['query']} (attempt {job['attempt']})")
+    return {"job": job, "finished": False}
+
+  @app.post("/api/jobs/{job_id}/complete")
+  async def complete_job(job_id: str, report: JobReport):
+    """Finish a leased query. `status` is "stale" when the lease expired (the query went to another node)."""
+    status = await asyncio.to_thread(require_jobs().complete, job_id, report.lease, report.result)
+    return {"job_id": job_id, "status": status or "stale"}
+
+  @app.post("/api/jobs/{job_id}/fail")
+  async def fail_job(job_id: str, report: JobReport):
+    """Report a failed attempt: the query is retried after a backoff, or `failed` after the last attempt."""
+    status = await asyncio.to_thread(require_jobs().fail, job_id, report.lease, report.error or "search failed")
+    return {"job_id": job_id, "status": status or "stale"}
+
+  def ingest(records: list[dict]) -> int:
+    """Count and queue validated items. Returns number of items accepted by the writer."""
+    stats["received"] += len(records)
+    ITEMS_RECEIVED.inc(len(records))
+    ingest_rate.add(len(records))
+
+    saved = writer.enqueue(records)
+    stats["saved"] += saved
+    ITEMS_SAVED.inc(saved)
+    return saved
+
+  @app.post("/api/data/stream", response_model=StreamResponse)
+  async def receive_stream(request: Request, idempotency_key: str | None = Header(None)):
+    """Bulk ingest: one JSON item per line (NDJSON), optionally gzip/zstd compressed (Content-Encoding).
+
+    The body is decompressed and split as it arrives; every STREAM_CHUNK_LINES lines are validated in one
+    pass straight into dicts and queued. Lines that fail validation are skipped and counted as rejected.
+
+    A compressed body that ends mid-frame is answered with 400 and status "truncated"; a broken body with
+    400 and status "error"; a body over STREAM_MAX_BYTES decompressed, or with a line over STREAM_MAX_LINE_BYTES,
+    with 413 and status "too_large". They keep the incomplete last line out and report in `received` how many
+    lines were already queued, so the client resends from the line after them. The Idempotency-Key is only
+    remembered for complete bodies.
+
+    Decompression, line splitting and validation run in threads, off the event loop. A second request with
+    the Idempotency-Key of one still being received gets a 409.
+    """
+    replayed = idempotency.reserve(idempotency_key)
+    if replayed is not None:
+      return replayed
+    try:
+      return await ingest_stream(request, idempotency_key)
+    finally:
+      idempotency.release(idempotency_key)
+
+  async def ingest_stream(request: Request, idempotency_key: str | None) -> StreamResponse | JSONResponse:
+    decompressor = stream_decompressor(request.headers.get("content-encoding", ""))
+    received = saved = rejected = 0
+    size = 0
+    lines: list[bytes] = []
+    tail = b""
+
+    def read_piece(pieces: Iterator[bytes]) -> list[bytes] | None:
+      """Next piece of the decompressed body, split into its complete lines. None once the chunk is used up."""
+      nonlocal size, tail
+      data = next(pieces, None)
+      if data is None:
+        return None
+      size += len(data)
+      if size > STREAM_MAX_BYTES:
+        raise StreamTooLarge(f"Body is over {STREAM_MAX_BYTES >> 20} MB")
+      *complete, tail = (tail + data).split(b"\n")
+      if len(tail) > STREAM_MAX_LINE_BYTES:
+        raise StreamTooLarge(f"Line {received + len(lines) + len(complete) + 1} is over {STREAM_MAX_LINE_BYTES >> 10} KB")
+      return [line for line in complete if line.strip()]
+
+    async def flush_lines():
+      nonlocal received, saved, rejected, lines
+      batch, lines = lines, []
+      records, bad = await asyncio.to_thread(validate_records, batch)
+      received += len(batch)
+      rejected += bad
+      saved += ingest(records)
+
+    async def partial(status: str, message: str, status_code: int = 400) -> JSONResponse:
+      """Error response with what was queued before the body broke off."""
+      if lines:
+        await flush_lines()
+      stats["errors"] += 1
+      INGEST_ERRORS.inc()
+      print(f"❌ Stream {status} after {received} items: {message}")
+      response = StreamResponse(status=status, received=received, saved=saved, rejected=rejected, message=message)
+      return JSONResponse(status_code=status_code, content=response.model_dump())
+
+    try:
+      async for chunk in request.stream():
+        if not chunk:
+          continue
+        pieces = decompressor.decompress(chunk, STREAM_PIECE_BYTES) if decompressor else iter([chunk])
+        while (complete := await asyncio.to_thread(read_piece, pieces)) is not None:
+          lines.extend(complete)
+          if len(lines) >= STREAM_CHUNK_LINES:
+            await flush_lines()
+    except StreamTooLarge as e:
+      return await partial("too_large", str(e), status_code=413)
+    except Exception as e:
+      return await partial("error", f"Invalid {request.headers.get('content-encoding', 'NDJSON')} body after {received + len(lines)} lines: {e}")
+
+    if decompressor is not None and not decompressor.eof:
+      return await partial(
+        "truncated", f"{request.headers.get('content-encoding')} body ended mid-frame; resend from line {received + len(lines) + 1}"
+      )
+    if tail.strip():
+      lines.append(tail)
+    if lines:
+      await flush_lines()
+
+    print(
+      f"[{datetime.now().strftime('%H:%M:%S')}] 📥 Stream: {received} items, 💾 Saved: {saved}, rejected: {rejected} | "
+      f"Total: {stats['saved']}, duplicates: {writer.duplicates}"
+    )
+    response = StreamResponse(
+      status="success",
+      received=received,
+      saved=saved,
+      rejected=rejected,
+      message=f"Data queued for {output_file}",
+    )
+    idempotency.remember(idempotency_key, response)
+    return response
+
   @app.post("/api/data", response_model=ServerResponse)
-  async def receive_data(batch: DataBatch):
+  async def receive_data(batch: DataBatch, idempotency_key: str | None = Header(None)):
     """Receive data from Tampermonkey script."""
+    replayed = idempotency.replay(idempotency_key)
+    if replayed is not None:
+      return replayed
+
     try:
       # Convert items to dicts
       items = [item.model_dump() for item in batch.items]
 
-      stats["received"] += len(items)
-
-      # Append to CSV
-      saved = append_to_csv(items)
-      stats["saved"] += saved
+      # Queue for the background writer
+      saved = ingest(items)
 
-      print(f"[{datetime.now().strftime('%H:%M:%S')}] 📥 Received: {len(items)}, 💾 Saved: {saved} | Total: {stats['saved']}")
+      print(
+        f"[{datetime.now().strftime('%H:%M:%S')}] 📥 Received: {len(items)}, 💾 Saved: {saved} | "
+        f"Total: {stats['saved']}, duplicates: {writer.duplicates}"
+      )
 
-      return ServerResponse(
+      response = ServerResponse(
         status="success",
         received=len(items),
         saved=saved,
-        message=f"Data saved to {output_file}",
+        message=f"Data queued for {output_file}",
       )
+      idempotency.remember(idempotency_key, response)
+      return response
 
     except Exception as e:
       stats["errors"] += 1
+      INGEST_ERRORS.inc()
       print(f"❌ Error: {e}")
       return ServerResponse(
         status="error",
@@ -214,6 +754,107 @@ def create_app(output_file: str) -> FastAPI:
   return app
 
 
+def open_jobs(options: argparse.Namespace) -> JobQueue | None:
+  if not options.jobs:
+    return None
+  return JobQueue(options.jobs_db, lease_seconds=options.lease_seconds, max_attempts=options.job_attempts)
+
+
+def load_jobs(options: argparse.Namespace):
+  """Add the --jobs grid to the queue file (queries already in it keep their state)."""
+  queries = parse_csv(options.jobs)
+  queue = open_jobs(options)
+  try:
+    added = queue.load(queries)
+    progress = queue.progress()
+  finally:
+    queue.close()
+  print(
+    f"📋 Job queue {options.jobs_db}: {len(queries)} queries in {options.jobs} ({added} new), "
+    f"{progress['depth']} to do, {progress['done']} done, {progress['failed']} failed"
+  )
+
+
+def _serve_shard(index: int, options: argparse.Namespace, sock: socket.socket, snapshots, flush_generation, sync_generation):
+  """Worker process of --workers: serve the shared socket, writing to shard `index`."""
+  global args
+  args = options
+  reporter = ShardReporter(index, options.workers, snapshots, flush_generation, sync_generation)
+  app = create_app(
+    shard_path(options.output, index),
+    storage=options.storage,
+    dedup=not options.no_dedup,
+    flush_size=options.flush_size,
+    flush_interval=options.flush_interval,
+    reporter=reporter,
+    jobs=open_jobs(options),
+  )
+  Server(Config(app, log_level="warning")).run(sockets=[sock])
+
+
+def serve_workers(options: argparse.Namespace):
+  """Run `options.workers` server processes on one port; restarts workers that die."""
+  context = multiprocessing.get_context("spawn")
+  # Coordinator: holds the workers' snapshots; ignores Ctrl+C so final snapshots still arrive
+  manager = SyncManager(ctx=context)
+  manager.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))
+  snapshots = manager.dict()
+  flush_generation = context.Value("i", 0)
+  sync_generation = context.Value("i", 0)
+
+  sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  sock.bind((options.host, options.port))
+  sock.listen(2048)
+  sock.set_inheritable(True)
+
+  processes: dict[int, multiprocessing.Process] = {}
+
+  def spawn(index: int):
+    process = context.Process(
+      target=_serve_shard,
+      args=(index, options, sock, snapshots, flush_generation, sync_generation),
+      name=f"server-worker{index}",
+    )
+    process.start()
+    processes[index] = process
+
+  for index in range(options.workers):
+    spawn(index)
+  print(f"🚀 {options.workers} server workers on http://localhost:{options.port}, shards: {shard_path(options.output, 0)}, ...")
+
+  def stop(signum, frame):
+    raise KeyboardInterrupt
+
+  signal.signal(signal.SIGTERM, stop)
+  try:
+    while any(process.is_alive() for process in processes.values()):
+      time.sleep(1)
+      for index, process in list(processes.items()):
+        # Exit code 0 is a clean shutdown (the worker got the signal itself)
+        if not process.is_alive() and process.exitcode != 0:
+          print(f"⚠️  Worker {index} exited ({process.exitcode}), restarting")
+          spawn(index)
+    raise KeyboardInterrupt
+  except KeyboardInterrupt:
+    # Ctrl+C reaches the workers too; stop the ones that didn't get a signal, then let them flush their shards
+    for process in processes.values():
+      process.join(timeout=1)
+      if process.is_alive():
+        process.terminate()
+    for process in processes.values():
+      process.join(timeout=30)
+
+    totals = {counter: sum(shard[counter] for shard in snapshots.values()) for counter in COUNTERS}
+    print("\n\n👋 Server stopped by user")
+    print(f"📊 Total received: {totals['received']}")
+    print(f"💾 Total saved: {totals['saved']}")
+    print(f"🔀 Merge the shards with: uv run python shards.py merge {options.output}")
+  finally:
+    sock.close()
+    manager.shutdown()
+
+
 def main():
   global args
   parser = argparse.ArgumentParser(
@@ -229,6 +870,30 @@ Examples:
 
   # View stats
   curl http://localhost:8080/stats
+
+  # Bulk ingest: gzip-compressed NDJSON, one item per line
+  gzip -c places.ndjson | curl --data-binary @- -H "Content-Encoding: gzip" http://localhost:8080/api/data/stream
+
+  # Results / new places per main.py query
+  curl http://localhost:8080/api/queries
+
+  # Prometheus metrics (server + scrapers)
+  curl http://localhost:8080/metrics
+
+  # SQLite storage with query API
+  uv run python server.py --storage sqlite --output places.db
+  curl "http://localhost:8080/api/places?domain=medico.ua&min_rating=4.5"
+
+  # Checkpoint buffered rows to disk
+  curl -X POST http://localhost:8080/flush
+
+  # 4 processes, each writing output.shard<N>.csv; merge them after stopping
+  uv run python server.py --workers 4
+  uv run python shards.py merge output.csv
+
+  # Coordinator for several scraper machines (main.py --coordinator http://<host>:8080)
+  uv run python server.py --host 0.0.0.0 --jobs queries.csv --lease-seconds 900
+  curl http://localhost:8080/api/jobs
         """,
   )
 
@@ -241,8 +906,14 @@ Examples:
   parser.add_argument(
     "--output",
     type=str,
-    default="output.csv",
-    help="Output CSV file (default: output.csv)",
+    default=None,
+    help="Output file (default: output.csv, or output.db with --storage sqlite)",
+  )
+  parser.add_argument(
+    "--storage",
+    choices=["csv", "sqlite"],
+    default="csv",
+    help="Storage backend (default: csv)",
   )
   parser.add_argument(
     "--host",
@@ -250,10 +921,74 @@ Examples:
     default="127.0.0.1",
     help="Server host (default: 127.0.0.1)",
   )
+  parser.add_argument(
+    "--flush-size",
+    type=int,
+    default=500,
+    help="Write buffered rows once this many are pending (default: 500)",
+  )
+  parser.add_argument(
+    "--flush-interval",
+    type=float,
+    default=2.0,
+    help="Max seconds rows stay buffered before being written (default: 2)",
+  )
+  parser.add_argument(
+    "--no-dedup",
+    action="store_true",
+    help="Write every received item, even if its placeId/cid is already saved",
+  )
 
-  args = parser.parse_args()
+  parser.add_argument(
+    "--workers",
+    type=int,
+    default=1,
+    help="Server processes; each writes its own shard of --output (default: 1)",
+  )
+
+  parser.add_argument(
+    "--jobs",
+    type=str,
+    default=None,
+    help="Query CSV (main.py format) to hand out to main.py --coordinator nodes over /api/jobs",
+  )
+  parser.add_argument(
+    "--jobs-db",
+    type=str,
+    default="scrapka_jobs.db",
+    help="Job queue file; keeps the queue's state across restarts (default: scrapka_jobs.db)",
+  )
+  parser.add_argument(
+    "--lease-seconds",
+    type=float,
+    default=600.0,
+    help="Seconds a node has to report a leased query before it goes back to the queue (default: 600)",
+  )
+  parser.add_argument(
+    "--job-attempts",
+    type=int,
+    default=3,
+    help="Leases per query before it counts as failed (default: 3)",
+  )
 
-  app = create_app(args.output)
+  args = parser.parse_args()
+  if args.output is None:
+    args.output = "output.db" if args.storage == "sqlite" else "output.csv"
+  if args.jobs:
+    load_jobs(args)
+
+  if args.workers > 1:
+    serve_workers(args)
+    return
+
+  app = create_app(
+    args.output,
+    storage=args.storage,
+    dedup=not args.no_dedup,
+    flush_size=args.flush_size,
+    flush_interval=args.flush_interval,
+    jobs=open_jobs(args),
+  )
 
   try:
     run(app, host=args.host, port=args.port, log_level="warning")
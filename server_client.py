@@ -0,0 +1,72 @@
+"""
+Small HTTP client for the scraper server (server.py), used by main.py.
+
+Uses only the standard library. Calls are best-effort: a missing or
+unreachable server is reported once and never stops a scraping run.
+"""
+
+import json
+import urllib.error
+import urllib.request
+from typing import Any
+
+
+class ServerClient:
+  """JSON client for the server's /api endpoints."""
+
+  def __init__(self, base_url: str = "http://localhost:8080", timeout: float = 5.0):
+    self.base_url = base_url.rstrip("/")
+    self.timeout = timeout
+    self._warned = False
+
+  def _request(self, method: str, path: str, payload: Any = None) -> Any:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(
+      f"{self.base_url}{path}",
+      data=data,
+      method=method,
+      headers={"Content-Type": "application/json"},
+    )
+    try:
+      with urllib.request.urlopen(request, timeout=self.timeout) as response:
+        return json.loads(response.read() or b"null")
+    except (urllib.error.URLError, OSError, ValueError) as e:
+      if not self._warned:
+        print(f"⚠️  Server {self.base_url} not reachable ({e}), continuing without it")
+        self._warned = True
+      return None
+
+  def flush(self, sync: bool = True) -> dict | None:
+    """Make the server write buffered rows, so per-query counts are final. sync=False skips the fsync checkpoint."""
+    return self._request("POST", "/flush" if sync else "/flush?sync=false")
+
+  def report_query(self, query_id: str, **report) -> dict | None:
+    """Send scroll count / wall time of a finished query. Returns the server's stats of that query."""
+    return self._request("POST", f"/api/queries/{query_id}", report)
+
+  def push_metrics(self, worker: str, snapshot: dict) -> dict | None:
+    """Send this process's metrics (metrics.REGISTRY.snapshot()) to the server's /metrics."""
+    return self._request("POST", f"/api/metrics/{worker}", snapshot)
+
+  def query_stats(self) -> list[dict]:
+    """Received / new / duplicate counts per query ID."""
+    response = self._request("GET", "/api/queries")
+    return response["queries"] if response else []
+
+  def next_job(self, worker: str) -> dict | None:
+    """Lease the next query from a coordinator (server.py --jobs): {"job": ... or None, "finished": bool}. None if unreachable."""
+    return self._request("POST", "/api/jobs/next", {"worker": worker})
+
+  def complete_job(self, job: dict, result: dict | None = None) -> str | None:
+    """Report a leased query done. Returns "done", or "stale" if the lease had expired."""
+    response = self._request("POST", f"/api/jobs/{job['job_id']}/complete", {"lease": job["lease"], "result": result})
+    return response["status"] if response else None
+
+  def fail_job(self, job: dict, error: str) -> str | None:
+    """Report a failed attempt of a leased query. Returns "pending" (will be retried), "failed" or "stale"."""
+    response = self._request("POST", f"/api/jobs/{job['job_id']}/fail", {"lease": job["lease"], "error": error})
+    return response["status"] if response else None
+
+  def jobs_progress(self) -> dict | None:
+    """Queue depth and progress of the coordinator."""
+    return self._request("GET", "/api/jobs")
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Multi-process server support: per-worker output shards and merging them.
+
+With `server.py --workers N` every server process owns one shard of the
+output (`output.shard0.csv`, `output.shard1.csv`, ... or `.db`), so the
+processes never share a file or a lock. A manager process acts as the
+coordinator: each worker publishes a snapshot of its counters there, and
+/stats, /api/queries and /flush combine them. `merge` folds the shards back
+into one output, one row per placeId with the fields of all its rows merged.
+
+Usage:
+    uv run python server.py --workers 4 --output output.csv
+
+    # After stopping the server
+    uv run python shards.py merge output.csv
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from storage import CSV_COLUMNS, SqliteWriter, iter_csv_places, iter_csv_rows, iter_sqlite_rows
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Counters summed over workers in /stats
+COUNTERS = ["received", "saved", "errors", "replayed", "duplicates", "merged", "pending", "written", "write_errors"]
+
+
+def shard_path(output: str, index: int) -> str:
+  """Output file of worker `index`: output.csv -> output.shard<index>.csv."""
+  path = Path(output)
+  return str(path.with_name(f"{path.stem}.shard{index}{path.suffix}"))
+
+
+def find_shards(output: str) -> list[Path]:
+  """Existing shard files of `output`, by worker index."""
+  path = Path(output)
+  shards = path.parent.glob(f"{path.stem}.shard*{path.suffix}")
+  return sorted(
+    (shard for shard in shards if shard.stem.rsplit(".shard", 1)[1].isdigit()),
+    key=lambda shard: int(shard.stem.rsplit(".shard", 1)[1]),
+  )
+
+
+def merge_query_stats(snapshots: list[dict]) -> dict[str, dict]:
+  """Per-query counts and reports of all workers (counts summed)."""
+  merged: dict[str, dict] = {}
+  for snapshot in snapshots:
+    for query_id, report in snapshot.get("reports", {}).items():
+      merged.setdefault(query_id, {"received": 0, "new": 0, "duplicates": 0}).update(report)
+    for query_id, counts in snapshot.get("queries", {}).items():
+      totals = merged.setdefault(query_id, {"received": 0, "new": 0, "duplicates": 0})
+      for key, value in counts.items():
+        totals[key] += value
+  return merged
+
+
+class ShardReporter:
+  """One worker's link to the coordinator.
+
+  A background thread publishes the worker's snapshot about once a second and
+  flushes the worker's writer when another worker asked for a cluster-wide
+  flush (shared flush generation counter). A flush that also bumped the sync
+  generation is an fsync checkpoint; others only drain the buffers.
+  """
+
+  def __init__(self, index: int, workers: int, snapshots, flush_generation, sync_generation, interval: float = 0.1):
+    self.index = index
+    self.workers = workers
+    # Manager dict (worker index -> snapshot) and shared multiprocessing.Value
+    self.snapshots = snapshots
+    self.flush_generation = flush_generation
+    self.sync_generation = sync_generation
+    self.interval = interval
+    self.flushed = flush_generation.value
+    self.synced = sync_generation.value
+    self._snapshot: Callable[[], dict] | None = None
+    # flush(fsync)
+    self._flush: Callable[[bool], Any] | None = None
+    self._stop = threading.Event()
+    self._thread: threading.Thread | None = None
+
+  def start(self, snapshot: Callable[[], dict], flush: Callable[[bool], Any]):
+    self._snapshot = snapshot
+    self._flush = flush
+    self.publish()
+    self._thread = threading.Thread(target=self._run, name=f"shard{self.index}-reporter", daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    self._stop.set()
+    if self._thread:
+      self._thread.join()
+    self.publish()
+
+  def publish(self):
+    snapshot = self._snapshot()
+    snapshot["flushed"] = self.flushed
+    try:
+      self.snapshots[self.index] = snapshot
+    except (OSError, EOFError):
+      # Coordinator gone (server shutting down)
+      pass
+
+  def _run(self):
+    last_publish = time.monotonic()
+    while not self._stop.wait(self.interval):
+      generation = self.flush_generation.value
+      if generation != self.flushed:
+        # request_flush bumps the sync generation first, so it is visible here
+        sync_generation = self.sync_generation.value
+        self._flush(sync_generation != self.synced)
+        self.flushed, self.synced = generation, sync_generation
+        self.publish()
+        last_publish = time.monotonic()
+      elif time.monotonic() - last_publish >= 1.0:
+        self.publish()
+        last_publish = time.monotonic()
+
+  def all_snapshots(self) -> list[dict]:
+    """Latest snapshot of every worker (this one's is fresh)."""
+    self.publish()
+    return [snapshot for _, snapshot in sorted(self.snapshots.items())]
+
+  def request_flush(self, timeout: float = 10.0, sync: bool = True) -> bool:
+    """Make every worker flush (and fsync with `sync`); True once all of them did."""
+    with self.flush_generation.get_lock():
+      if sync:
+        with self.sync_generation.get_lock():
+          self.sync_generation.value += 1
+      self.flush_generation.value += 1
+      generation = self.flush_generation.value
+    self._flush(sync)
+    self.flushed = generation
+    if sync:
+      self.synced = self.sync_generation.value
+    self.publish()
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+      snapshots = dict(self.snapshots.items())
+      if len(snapshots) >= self.workers and all(snapshot.get("flushed", 0) >= generation for snapshot in snapshots.values()):
+        return True
+      time.sleep(self.interval / 2)
+    return False
+
+
+def merge_csv(output: str, shards: list[Path]) -> tuple[int, int]:
+  """Rewrite `output` from itself plus `shards`, one row per placeId (cid if none). Returns (rows in, rows out).
+
+  Rows of the same place are merged like SqliteWriter's upsert: the first
+  non-empty value of every field wins (see storage.iter_csv_places).
+  """
+  sources = [str(path) for path in ([Path(output)] if Path(output).exists() else []) + shards]
+  rows_in = sum(1 for source in sources for _ in iter_csv_rows(source))
+
+  merged_path = Path(output).with_name(f"{Path(output).name}.merging")
+  rows_out = 0
+  with open(merged_path, "w", newline="", encoding="utf-8") as f:
+    writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in iter_csv_places(sources):
+      writer.writerow(row)
+      rows_out += 1
+    f.flush()
+    os.fsync(f.fileno())
+  os.replace(merged_path, output)
+
+  # The dedup index of the old output no longer matches; the server rebuilds it
+  for stale in (f"{output}.keys", f"{output}.keys.meta"):
+    if os.path.exists(stale):
+      os.remove(stale)
+  return rows_in, rows_out
+
+
+def merge_sqlite(output: str, shards: list[Path]) -> tuple[int, int]:
+  """Upsert all shard rows into `output` (placeId conflicts fill missing fields). Returns (rows in, rows out)."""
+  writer = SqliteWriter(output, flush_size=5000, flush_interval=3600)
+  writer.open()
+  rows_in = 0
+  try:
+    for shard in shards:
+      batch = []
+      for row in iter_sqlite_rows(str(shard)):
+        batch.append(row)
+        if len(batch) >= 5000:
+          writer.enqueue(batch)
+          writer.flush()
+          rows_in += len(batch)
+          batch = []
+      writer.enqueue(batch)
+      rows_in += len(batch)
+  finally:
+    writer.close()
+
+  conn = sqlite3.connect(output)
+  try:
+    rows_out = conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+  finally:
+    conn.close()
+  return rows_in, rows_out
+
+
+def merge(output: str, delete_shards: bool = False) -> tuple[int, int]:
+  """Merge all shards of `output` into it."""
+  shards = find_shards(output)
+  if not shards:
+    raise FileNotFoundError(f"No shards of {output} found")
+  if Path(output).suffix in SQLITE_SUFFIXES:
+    counts = merge_sqlite(output, shards)
+  else:
+    counts = merge_csv(output, shards)
+
+  if delete_shards:
+    for shard in shards:
+      for path in (shard, *(shard.with_name(shard.name + extra) for extra in (".keys", ".keys.meta", "-wal", "-shm"))):
+        if path.exists():
+          path.unlink()
+  return counts
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description="Server output shards (server.py --workers)",
+    formatter_class=argparse.RawDescriptionHelpFormatter,
+    epilog="""
+Examples:
+  # Combine output.shard*.csv into output.csv (stop the server first)
+  uv run python shards.py merge output.csv
+
+  # SQLite shards, removing them afterwards
+  uv run python shards.py merge places.db --delete-shards
+        """,
+  )
+  commands = parser.add_subparsers(dest="command", required=True)
+
+  merge_parser = commands.add_parser("merge", help="Merge shards into one output, deduplicated on placeId")
+  merge_parser.add_argument("output", help="Server --output file the shards belong to")
+  merge_parser.add_argument(
+    "--delete-shards",
+    action="store_true",
+    help="Delete the shard files after a successful merge",
+  )
+
+  args = parser.parse_args()
+
+  if args.command == "merge":
+    shards = find_shards(args.output)
+    print(f"🔀 Merging {len(shards)} shard(s) into {args.output}")
+    try:
+      rows_in, rows_out = merge(args.output, delete_shards=args.delete_shards)
+    except FileNotFoundError as e:
+      print(f"❌ {e}")
+      raise SystemExit(1) from e
+    print(f"✓ {rows_in} rows in, {rows_out} unique places in {args.output}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,690 @@
+"""
+Storage helpers for scraped places.
+
+DedupIndex keeps the placeId/cid keys of rows already in the output CSV so
+duplicates can be dropped before they touch disk. BufferedCsvWriter and
+SqliteWriter own the output and write buffered rows from a background thread.
+
+The CSV output is append-only, so a place can have several rows: a later row
+is only written when it fills fields the earlier ones lacked. Readers get one
+record per place from iter_csv_places, which merges those rows the way
+SqliteWriter's upsert does (the first non-empty value of every field wins).
+"""
+
+import csv
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import metrics
+
+# CSV columns order
+CSV_COLUMNS = [
+  "name",
+  "fullAddress",
+  "phones",
+  "website",
+  "domain",
+  "averageRating",
+  "reviewCount",
+  "categories",
+  "openingHours",
+  "placeId",
+  "kgmid",
+  "cid",
+  "latitude",
+  "longitude",
+  "googleMapsURL",
+  "googleKnowledgeURL",
+  "featuredImage",
+  "scrapedAt",
+  # Attribution: search text and main.py query ID that produced the row
+  "query",
+  "queryId",
+]
+
+# Column order of files written before attribution columns existed (also used for header-less files)
+LEGACY_CSV_COLUMNS = CSV_COLUMNS[: CSV_COLUMNS.index("scrapedAt") + 1]
+
+# Columns that don't count towards how "complete" a record is
+UNSCORED_COLUMNS = {"scrapedAt", "query", "queryId"}
+
+# Outcomes of DedupIndex.check
+NEW = "new"
+DUPLICATE = "duplicate"
+RICHER = "richer"
+
+# Rows can hold long opening hours / category lists
+csv.field_size_limit(sys.maxsize)
+
+
+def filled_fields(item: dict[str, Any]) -> int:
+  """Count non-empty data fields of a record."""
+  return sum(1 for col in CSV_COLUMNS if col not in UNSCORED_COLUMNS and item.get(col) not in (None, ""))
+
+
+def existing_csv_columns(path: str) -> list[str] | None:
+  """Columns of an existing output CSV (None if the file is missing or empty)."""
+  if not Path(path).exists():
+    return None
+  with open(path, "r", newline="", encoding="utf-8") as f:
+    first_row = next(csv.reader(f), None)
+  if not first_row:
+    return None
+  return first_row if "placeId" in first_row else LEGACY_CSV_COLUMNS
+
+
+def iter_csv_rows(path: str) -> Iterator[dict[str, str]]:
+  """Stream rows of an output CSV as dicts, one at a time.
+
+  Files written without a header row are read with the legacy column order.
+  """
+  with open(path, "r", newline="", encoding="utf-8") as f:
+    reader = csv.reader(f)
+    first_row = next(reader, None)
+    if not first_row:
+      return
+
+    header = first_row if "placeId" in first_row else LEGACY_CSV_COLUMNS
+    if header is LEGACY_CSV_COLUMNS:
+      reader = itertools.chain([first_row], reader)
+
+    for row in reader:
+      if len(row) >= len(header):
+        yield dict(zip(header, row))
+
+
+def place_key(row: dict[str, Any]) -> str | None:
+  """Identity of a place: its placeId, or its cid if it has none."""
+  place_id = row.get("placeId")
+  if place_id:
+    return f"p:{place_id}"
+  cid = row.get("cid")
+  return f"c:{cid}" if cid else None
+
+
+def merge_record(stored: dict[str, Any], new: dict[str, Any]):
+  """Fill the empty fields of `stored` from `new` (like COALESCE in SqliteWriter's upsert)."""
+  for col, value in new.items():
+    if stored.get(col) in (None, "") and value not in (None, ""):
+      stored[col] = value
+
+
+def iter_csv_places(paths: list[str]) -> Iterator[dict[str, str]]:
+  """Stream one record per place from output CSVs, merging the rows of a placeId (cid if none).
+
+  Two passes: the first counts each place's rows, the second yields a place
+  once its last row has been merged in. Memory holds one counter per place
+  plus the places whose rows are still coming. Rows without either key pass
+  through as they are.
+  """
+  remaining: dict[str, int] = {}
+  for path in paths:
+    for row in iter_csv_rows(path):
+      key = place_key(row)
+      if key:
+        remaining[key] = remaining.get(key, 0) + 1
+
+  pending: dict[str, dict[str, str]] = {}
+  for path in paths:
+    for row in iter_csv_rows(path):
+      key = place_key(row)
+      if key is None:
+        yield row
+        continue
+      if key in pending:
+        merge_record(pending[key], row)
+      else:
+        pending[key] = row
+      remaining[key] -= 1
+      if not remaining[key]:
+        yield pending.pop(key)
+
+
+def iter_sqlite_rows(path: str) -> Iterator[dict[str, Any]]:
+  """Stream places stored by SqliteWriter as dicts, one at a time."""
+  conn = sqlite3.connect(path)
+  conn.row_factory = sqlite3.Row
+  try:
+    for row in conn.execute("SELECT * FROM places ORDER BY id"):
+      item = dict(row)
+      item.pop("id", None)
+      yield item
+  finally:
+    conn.close()
+
+
+class DedupIndex:
+  """In-memory placeId/cid index of an output CSV, persisted in a sidecar file.
+
+  The sidecar (`<output>.keys`) holds one `placeId<TAB>cid<TAB>filled` line per
+  stored row, and `<output>.keys.meta` records how many CSV bytes it covers.
+  At startup only the CSV bytes written after that point are scanned, so a
+  large file loads in about the time it takes to read the sidecar.
+
+  A record whose key is known is a duplicate, unless it has more fields filled
+  than the stored one: then it is appended as another row of the same place.
+  Its fields are merged with the earlier rows when the CSV is read
+  (iter_csv_places), the first non-empty value of each field winning.
+  """
+
+  def __init__(self, csv_path: str):
+    self.csv_path = Path(csv_path)
+    self.keys_path = Path(f"{csv_path}.keys")
+    self.meta_path = Path(f"{csv_path}.keys.meta")
+    self.place_ids: dict[str, int] = {}
+    self.cids: dict[str, int] = {}
+    self._keys_file = None
+
+  def __len__(self) -> int:
+    return max(len(self.place_ids), len(self.cids))
+
+  def load(self):
+    """Load the sidecar index and catch up with rows it doesn't cover yet."""
+    csv_size = self.csv_path.stat().st_size if self.csv_path.exists() else 0
+    covered = 0
+
+    if self.meta_path.exists() and self.keys_path.exists():
+      try:
+        covered = json.loads(self.meta_path.read_text())["csv_size"]
+      except (ValueError, KeyError):
+        covered = 0
+
+    if 0 < covered <= csv_size:
+      self._load_keys_file()
+    else:
+      # Missing, stale or for a different file: rebuild from the CSV
+      covered = 0
+      self.keys_path.unlink(missing_ok=True)
+
+    self._keys_file = open(self.keys_path, "a", encoding="utf-8")  # noqa: SIM115 (kept open until close())
+    try:
+      if csv_size > covered:
+        self._scan_csv(covered)
+      self.save_meta()
+    except BaseException:
+      # The meta still covers only what it did, so the next load scans these rows again
+      self._keys_file.close()
+      self._keys_file = None
+      raise
+
+  def _load_keys_file(self):
+    with open(self.keys_path, "r", encoding="utf-8") as f:
+      for line in f:
+        place_id, cid, filled = line.rstrip("\n").split("\t")
+        self._remember(place_id, cid, int(filled))
+
+  def _scan_csv(self, offset: int):
+    """Index CSV rows starting at byte offset (0 = whole file incl. header)."""
+    with open(self.csv_path, "r", newline="", encoding="utf-8") as f:
+      first_row = next(csv.reader(f), None)
+      if not first_row:
+        return
+
+      # Files written without a header row use the legacy column order
+      header = first_row if "placeId" in first_row else LEGACY_CSV_COLUMNS
+      rows = csv.reader(f)
+      if offset:
+        f.seek(offset)
+      elif header is LEGACY_CSV_COLUMNS:
+        rows = itertools.chain([first_row], rows)
+
+      place_id_col = header.index("placeId") if "placeId" in header else None
+      cid_col = header.index("cid") if "cid" in header else None
+      scored_cols = [i for i, col in enumerate(header) if col in CSV_COLUMNS and col not in UNSCORED_COLUMNS]
+
+      for row in rows:
+        if len(row) < len(header):
+          continue
+        place_id = row[place_id_col] if place_id_col is not None else ""
+        cid = row[cid_col] if cid_col is not None else ""
+        if place_id or cid:
+          filled = sum(1 for i in scored_cols if row[i])
+          self._remember(place_id, cid, filled)
+          self._keys_file.write(f"{place_id}\t{cid}\t{filled}\n")
+
+  def _remember(self, place_id: str, cid: str, filled: int):
+    # The merged record has at least the fields of its most complete row
+    if place_id:
+      self.place_ids[place_id] = max(filled, self.place_ids.get(place_id, 0))
+    if cid:
+      self.cids[cid] = max(filled, self.cids.get(cid, 0))
+
+  def _known_filled(self, item: dict[str, Any]) -> int | None:
+    place_id = item.get("placeId")
+    if place_id and place_id in self.place_ids:
+      return self.place_ids[place_id]
+    cid = item.get("cid")
+    if cid and cid in self.cids:
+      return self.cids[cid]
+    return None
+
+  def check(self, item: dict[str, Any]) -> str:
+    """Classify a record as NEW, DUPLICATE or RICHER than the stored one."""
+    known = self._known_filled(item)
+    if known is None:
+      return NEW
+    return RICHER if filled_fields(item) > known else DUPLICATE
+
+  def add(self, item: dict[str, Any]):
+    """Remember a record that is going to be written to the CSV."""
+    self._remember(item.get("placeId") or "", item.get("cid") or "", filled_fields(item))
+
+  def persist(self, items: list[dict[str, Any]]):
+    """Append keys of rows that were written to the CSV to the sidecar."""
+    for item in items:
+      place_id = item.get("placeId") or ""
+      cid = item.get("cid") or ""
+      if place_id or cid:
+        self._keys_file.write(f"{place_id}\t{cid}\t{filled_fields(item)}\n")
+
+  def save_meta(self):
+    """Mark the sidecar as covering the CSV up to its current size."""
+    if self._keys_file:
+      self._keys_file.flush()
+    csv_size = self.csv_path.stat().st_size if self.csv_path.exists() else 0
+    self.meta_path.write_text(json.dumps({"csv_size": csv_size}))
+
+  def close(self):
+    if self._keys_file:
+      self.save_meta()
+      self._keys_file.close()
+      self._keys_file = None
+
+
+WRITE_SECONDS = metrics.histogram("scrapka_write_seconds", "Time to write one batch of rows to storage", ["backend"])
+ROWS_WRITTEN = metrics.counter("scrapka_rows_written_total", "Rows written to storage", ["backend"])
+WRITE_ERRORS = metrics.counter("scrapka_write_errors_total", "Failed writes of a batch of rows (kept buffered for the next flush)", ["backend"])
+
+
+class BufferedWriter:
+  """Base for writers that batch rows from all requests into one output.
+
+  `enqueue` only buffers rows; a background thread writes them once
+  `flush_size` rows are pending or `flush_interval` seconds have passed.
+  `close` flushes the rest and syncs the output to disk. A batch that fails
+  to write goes back to the front of the buffer and is retried by the next
+  flush, so rows already accepted (and deduplicated) are never dropped.
+  """
+
+  # Label of this writer's metrics
+  backend = "none"
+
+  def __init__(self, path: str, flush_size: int = 500, flush_interval: float = 2.0):
+    self.path = Path(path)
+    self.flush_size = flush_size
+    self.flush_interval = flush_interval
+    self.written = 0
+    self.duplicates = 0
+    self.merged = 0
+    self.write_errors = 0
+    # queryId -> {"received", "new", "duplicates"}, changed under the buffer lock (query_stats_snapshot to read it)
+    self.query_stats: dict[str, dict[str, int]] = {}
+    self._buffer: list[dict[str, Any]] = []
+    self._lock = threading.Lock()
+    self._write_lock = threading.Lock()
+    self._wakeup = threading.Condition(self._lock)
+    self._thread = None
+    self._closing = False
+
+  @property
+  def pending(self) -> int:
+    return len(self._buffer)
+
+  def open(self):
+    """Open the output and start the flush thread."""
+    self._open_output()
+    self._thread = threading.Thread(target=self._run, name=f"{type(self).__name__}-flush", daemon=True)
+    self._thread.start()
+
+  def enqueue(self, items: list[dict[str, Any]]) -> int:
+    """Buffer items for writing. Returns number of accepted items."""
+    with self._lock:
+      for item in items:
+        self._count(item, "received")
+      accepted = self._accept(items)
+      self._buffer.extend(accepted)
+      if len(self._buffer) >= self.flush_size:
+        self._wakeup.notify()
+    return len(accepted)
+
+  def flush(self, fsync: bool = False) -> int:
+    """Write all buffered rows now. Returns number of rows written."""
+    with self._write_lock:
+      with self._lock:
+        rows, self._buffer = self._buffer, []
+      if rows or fsync:
+        try:
+          with WRITE_SECONDS.time(backend=self.backend):
+            self._write(rows, fsync)
+        except Exception:
+          self.write_errors += 1
+          WRITE_ERRORS.inc(backend=self.backend)
+          with self._lock:
+            self._buffer[:0] = rows
+          raise
+      self.written += len(rows)
+      ROWS_WRITTEN.inc(len(rows), backend=self.backend)
+      return len(rows)
+
+  def _run(self):
+    last_flush = time.monotonic()
+    while True:
+      with self._lock:
+        while not self._closing and len(self._buffer) < self.flush_size:
+          remaining = self.flush_interval - (time.monotonic() - last_flush)
+          if remaining <= 0:
+            break
+          self._wakeup.wait(remaining)
+        if self._closing:
+          return
+
+      try:
+        self.flush()
+      except Exception as e:
+        print(f"❌ Flush error ({self.path}), {self.pending} rows kept for the next flush: {e}")
+      last_flush = time.monotonic()
+
+  def close(self):
+    """Stop the flush thread, write remaining rows and sync to disk."""
+    with self._lock:
+      self._closing = True
+      self._wakeup.notify()
+    if self._thread:
+      self._thread.join()
+      self._thread = None
+      self.flush(fsync=True)
+      self._close_output()
+
+  def query_stats_snapshot(self) -> dict[str, dict[str, int]]:
+    """Copy of query_stats, safe to take while other threads enqueue and write rows."""
+    with self._lock:
+      return {query_id: dict(counts) for query_id, counts in self.query_stats.items()}
+
+  def _count(self, item: dict[str, Any], key: str):
+    query_id = item.get("queryId")
+    if query_id:
+      counts = self.query_stats.setdefault(query_id, {"received": 0, "new": 0, "duplicates": 0})
+      counts[key] += 1
+
+  def _accept(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Filter items before buffering (called under the buffer lock)."""
+    for item in items:
+      self._count(item, "new")
+    return items
+
+  def _open_output(self):
+    raise NotImplementedError
+
+  def _write(self, rows: list[dict[str, Any]], fsync: bool):
+    raise NotImplementedError
+
+  def _close_output(self):
+    raise NotImplementedError
+
+
+class BufferedCsvWriter(BufferedWriter):
+  """Single-handle CSV writer; duplicates are dropped by DedupIndex before buffering.
+
+  Records that add fields to a known place are appended as another row of it;
+  read the output with iter_csv_places to get one merged record per place.
+  """
+
+  backend = "csv"
+
+  def __init__(self, path: str, dedup: DedupIndex | None = None, flush_size: int = 500, flush_interval: float = 2.0):
+    super().__init__(path, flush_size, flush_interval)
+    self.dedup = dedup
+    self.columns = CSV_COLUMNS
+    self._file = None
+    self._writer = None
+
+  def _open_output(self):
+    # Keep appending in the existing file's layout so its rows stay aligned
+    existing = existing_csv_columns(str(self.path))
+    self.columns = existing or CSV_COLUMNS
+    missing = [col for col in CSV_COLUMNS if col not in self.columns]
+    if missing:
+      print(f"⚠️  {self.path} has no {', '.join(missing)} column(s); start a new output file to store them")
+
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._file = open(self.path, "a", newline="", encoding="utf-8")  # noqa: SIM115 (kept open until close())
+    try:
+      self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+      if existing is None:
+        self._writer.writeheader()
+        self._file.flush()
+
+      if self.dedup is not None:
+        self.dedup.load()
+    except BaseException:
+      self._file.close()
+      self._file = None
+      raise
+
+  def _accept(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    if self.dedup is None:
+      return super()._accept(items)
+
+    accepted = []
+    for item in items:
+      status = self.dedup.check(item)
+      if status == DUPLICATE:
+        self.duplicates += 1
+        self._count(item, "duplicates")
+        continue
+      if status == RICHER:
+        self.merged += 1
+      else:
+        self._count(item, "new")
+      self.dedup.add(item)
+      accepted.append(item)
+    return accepted
+
+  def _write(self, rows: list[dict[str, Any]], fsync: bool):
+    if rows:
+      self._writer.writerows(rows)
+    self._file.flush()
+    if fsync:
+      os.fsync(self._file.fileno())
+
+    if self.dedup is not None and rows:
+      self.dedup.persist(rows)
+      # Sidecar and CSV agree after every flush, so a crash never makes the next start re-index written rows
+      self.dedup.save_meta()
+
+  def _close_output(self):
+    self._file.close()
+    self._file = None
+    if self.dedup is not None:
+      self.dedup.close()
+
+
+SQLITE_REAL_COLUMNS = {"averageRating", "latitude", "longitude"}
+SQLITE_INTEGER_COLUMNS = {"reviewCount"}
+
+
+class SqliteWriter(BufferedWriter):
+  """WAL-mode SQLite storage; each flush is one transaction of upserts on placeId.
+
+  On conflict the stored row keeps its values and only gets fields it was
+  missing filled from the new record.
+  """
+
+  backend = "sqlite"
+  columns = CSV_COLUMNS
+
+  def __init__(self, path: str, flush_size: int = 500, flush_interval: float = 2.0):
+    super().__init__(path, flush_size, flush_interval)
+    self._conn = None
+    self._upsert_sql = self._build_upsert_sql()
+
+  @classmethod
+  def _build_upsert_sql(cls) -> str:
+    data_columns = [col for col in cls.columns if col != "placeId"]
+    column_list = ", ".join(cls.columns)
+    placeholders = ", ".join(f":{col}" for col in cls.columns)
+    updates = ", ".join(f"{col} = COALESCE(places.{col}, excluded.{col})" for col in data_columns)
+    # Only touch the row when the new record fills a field that is still empty
+    fills_gap = " OR ".join(f"(places.{col} IS NULL AND excluded.{col} IS NOT NULL)" for col in data_columns)
+    return f"INSERT INTO places ({column_list}) VALUES ({placeholders}) ON CONFLICT(placeId) DO UPDATE SET {updates} WHERE {fills_gap}"
+
+  @classmethod
+  def _column_type(cls, col: str) -> str:
+    if col in SQLITE_REAL_COLUMNS:
+      return "REAL"
+    if col in SQLITE_INTEGER_COLUMNS:
+      return "INTEGER"
+    return "TEXT"
+
+  def _connect(self):
+    conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+  def _open_output(self):
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._conn = self._connect()
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    column_defs = ",\n  ".join(f"{col} {self._column_type(col)}{' UNIQUE' if col == 'placeId' else ''}" for col in self.columns)
+    self._conn.executescript(
+      f"""
+      CREATE TABLE IF NOT EXISTS places (
+        id INTEGER PRIMARY KEY,
+        {column_defs}
+      );
+      """
+    )
+    # Databases created before a column existed get it added
+    existing = {row[1] for row in self._conn.execute("PRAGMA table_info(places)")}
+    for col in self.columns:
+      if col not in existing:
+        self._conn.execute(f"ALTER TABLE places ADD COLUMN {col} {self._column_type(col)}")
+    self._conn.executescript(
+      """
+      CREATE INDEX IF NOT EXISTS idx_places_cid ON places(cid);
+      CREATE INDEX IF NOT EXISTS idx_places_domain ON places(domain, averageRating);
+      CREATE INDEX IF NOT EXISTS idx_places_query ON places(query);
+      CREATE INDEX IF NOT EXISTS idx_places_query_id ON places(queryId);
+      CREATE INDEX IF NOT EXISTS idx_places_rating ON places(averageRating);
+      """
+    )
+    self._conn.commit()
+
+  def _row(self, item: dict[str, Any]) -> dict[str, Any]:
+    # Empty strings become NULL so COALESCE can fill them later
+    return {col: (item.get(col) if item.get(col) != "" else None) for col in self.columns}
+
+  def _existing_place_ids(self, place_ids: list[str]) -> set[str]:
+    existing = set()
+    for i in range(0, len(place_ids), 500):
+      chunk = place_ids[i : i + 500]
+      placeholders = ", ".join("?" for _ in chunk)
+      rows = self._conn.execute(f"SELECT placeId FROM places WHERE placeId IN ({placeholders})", chunk)
+      existing.update(row[0] for row in rows)
+    return existing
+
+  def _accept(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # New vs duplicate is only known when the rows hit the database
+    return items
+
+  def _write(self, rows: list[dict[str, Any]], fsync: bool):
+    if rows:
+      outcomes = []
+      with self._conn:
+        seen = self._existing_place_ids([item["placeId"] for item in rows if item.get("placeId")])
+        for item in rows:
+          cursor = self._conn.execute(self._upsert_sql, self._row(item))
+          place_id = item.get("placeId")
+          if place_id in seen:
+            outcomes.append((item, "merged" if cursor.rowcount else "duplicates"))
+          else:
+            outcomes.append((item, "new"))
+            if place_id:
+              seen.add(place_id)
+      # Counted once the transaction committed (a failed batch is written again), under the lock readers copy them with
+      with self._lock:
+        for item, outcome in outcomes:
+          if outcome == "merged":
+            self.merged += 1
+            continue
+          if outcome == "duplicates":
+            self.duplicates += 1
+          self._count(item, outcome)
+    if fsync:
+      self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+  def _close_output(self):
+    self._conn.close()
+    self._conn = None
+
+  def query_places(
+    self,
+    domain: str | None = None,
+    min_rating: float | None = None,
+    query: str | None = None,
+    query_id: str | None = None,
+    cid: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+  ) -> list[dict[str, Any]]:
+    """Read stored places using the indexed columns. Safe to call from any thread."""
+    where, params = [], []
+    if domain is not None:
+      where.append("domain = ?")
+      params.append(domain)
+    if min_rating is not None:
+      where.append("averageRating >= ?")
+      params.append(min_rating)
+    if query is not None:
+      where.append("query = ?")
+      params.append(query)
+    if query_id is not None:
+      where.append("queryId = ?")
+      params.append(query_id)
+    if cid is not None:
+      where.append("cid = ?")
+      params.append(cid)
+
+    sql = f"SELECT {', '.join(self.columns)} FROM places"
+    if where:
+      sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id LIMIT ? OFFSET ?"
+    params += [limit, offset]
+
+    conn = self._connect()
+    try:
+      return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+      conn.close()
+
+  def count_places(self, by: str = "query") -> list[dict[str, Any]]:
+    """Count stored places grouped by an indexed column (query, queryId or domain)."""
+    if by not in ("query", "queryId", "domain"):
+      raise ValueError(f"Can't group by {by!r}")
+
+    conn = self._connect()
+    try:
+      rows = conn.execute(f"SELECT {by}, COUNT(*) AS places FROM places GROUP BY {by} ORDER BY places DESC")
+      return [dict(row) for row in rows]
+    finally:
+      conn.close()
+
+
+def open_writer(path: str, dedup: bool = True, **kwargs) -> BufferedWriter:
+  """Open a writer for `path`: SQLite for .db/.sqlite files, CSV otherwise."""
+  if Path(path).suffix in (".db", ".sqlite", ".sqlite3"):
+    writer = SqliteWriter(path, **kwargs)
+  else:
+    writer = BufferedCsvWriter(path, dedup=DedupIndex(path) if dedup else None, **kwargs)
+  writer.open()
+  return writer
@@ -32,4 +32,12 @@ em.export_to_json(path)
 print(f"JSON exported: {os.path.getsize(path)} bytes")
 os.unlink(path)
 
+# Test JSONL with projection and filter
+with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
+  path = f.name
+em_subset = ExportManager(dm, columns=["name", "placeId"], filters=["placeId=123"])
+assert em_subset.export_to_jsonl(path) == 1
+print(f"JSONL exported: {os.path.getsize(path)} bytes")
+os.unlink(path)
+
 print("All exports successful!")
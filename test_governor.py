@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+from governor import RateGovernor
+
+print("Testing RateGovernor...")
+with tempfile.TemporaryDirectory() as tmp:
+  path = os.path.join(tmp, "governor.db")
+  # 1 search per second, no burst beyond one token
+  governor = RateGovernor(path, {"search": 1.0}, burst=1.0, backoff=2.0, recovery=0.5, max_slowdown=4.0)
+
+  # The first search goes right away; the next ones queue a second apart
+  assert governor.reserve("search") == 0.0
+  assert 0.95 < governor.reserve("search") <= 1.0
+  assert 1.95 < governor.reserve("search") <= 2.0
+
+  # Another process sharing the file sees the same bucket
+  other = RateGovernor(path, {"search": 1.0}, burst=1.0)
+  assert 2.9 < other.reserve("search") <= 3.0
+  other.close()
+
+  # Soft blocks double the interval up to max_slowdown, successes bring it back
+  governor.reset()
+  assert governor.reserve("search") == 0.0
+  time.sleep(0.5)
+  assert governor.report_block("captcha") == 2.0
+  assert governor.report_block("captcha") == 4.0
+  assert governor.report_block("empty feed") == 4.0
+  # Tokens saved up since the last search are gone: the next one waits a full slowed-down interval
+  assert 3.9 < governor.reserve("search") <= 4.0
+  assert governor.report_success() == 2.0
+  assert governor.report_success() == 1.0
+  assert governor.report_success() == 1.0
+
+  status = governor.status()
+  assert status["blocks"] == 3 and status["last_signal"] == "empty feed"
+  governor.close()
+print("RateGovernor OK")
+
+print("All governor checks passed!")
@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+from jobs import DONE, FAILED, JobQueue
+
+print("Testing JobQueue...")
+queries = [{"search": "clinic", "city": city, "country": "ua", "query": f"clinic {city}"} for city in ("kyiv", "lviv")]
+
+with tempfile.TemporaryDirectory() as tmp:
+  path = os.path.join(tmp, "jobs.db")
+  queue = JobQueue(path, lease_seconds=0.2, max_attempts=2, retry_base=0)
+  assert queue.load(queries) == 2
+  # Loading the grid again adds nothing
+  assert queue.load(queries) == 0
+
+  # Jobs go out oldest first, each to one node
+  first = queue.lease("node-a")
+  second = queue.lease("node-b")
+  assert first["q"]["query"] == "clinic kyiv" and second["q"]["query"] == "clinic lviv"
+  assert queue.lease("node-c") is None
+  assert queue.progress()["leased"] == 2
+
+  assert queue.complete(first["job_id"], first["lease"], {"places": 3}) == DONE
+  # A report under the wrong token is ignored
+  assert queue.complete(second["job_id"], "not-the-lease") is None
+
+  # An unreported lease expires and the job is leased again, with a new token
+  time.sleep(0.3)
+  retry = queue.lease("node-c")
+  assert retry["job_id"] == second["job_id"] and retry["attempt"] == 2
+  assert queue.complete(second["job_id"], second["lease"]) is None
+
+  # The last attempt failing fails the job for good
+  assert queue.fail(retry["job_id"], retry["lease"], "captcha") == FAILED
+  assert queue.lease("node-a") is None
+
+  progress = queue.progress()
+  assert progress["done"] == 1 and progress["failed"] == 1 and progress["depth"] == 0
+  assert progress["finished"] and progress["completed_by"] == {"node-a": 1}
+  queue.close()
+
+  # The queue keeps its state across restarts
+  queue = JobQueue(path)
+  assert queue.load(queries) == 0 and queue.progress()["finished"]
+  queue.close()
+print("JobQueue OK")
+
+print("All job queue checks passed!")
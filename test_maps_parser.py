@@ -0,0 +1,84 @@
+import json
+import sys
+
+sys.path.insert(0, ".")
+from maps_parser import count_results, page_offset, page_size, page_url, parse_search_response
+
+
+def entry(**fields) -> list:
+  """Place entry with fields at the paths script.js's formatDataItem reads."""
+  data = [None] * 179
+  data[4] = [None] * 7 + [fields.get("rating"), fields.get("reviews")]
+  data[7] = fields.get("website")
+  data[9] = [None, None, 50.45, 30.52]
+  data[10] = fields.get("cid")
+  data[11] = fields.get("name")
+  data[13] = fields.get("categories")
+  data[34] = [None, fields.get("hours")]
+  data[39] = "1 Khreshchatyk St, Kyiv"
+  data[78] = fields.get("place_id")
+  data[89] = fields.get("kgmid")
+  data[178] = [[None, fields.get("phones")]]
+  # The JS filter keeps entries that have an index 14
+  return [None, data] + [None] * 13
+
+
+def body(*entries, wrapped: bool = True) -> str:
+  inner = ")]}'\n" + json.dumps([[None, [None, *entries]]])
+  return json.dumps({"c": 0, "d": inner}) + '/*""*/' if wrapped else inner
+
+
+print("Testing parse_search_response...")
+full = entry(
+  name="Clinic",
+  place_id="ChIJ1",
+  cid="123",
+  kgmid="/g/11x",
+  rating=4.5,
+  reviews=10,
+  website=["https://clinic.example/", "clinic.example"],
+  categories=["Dentist", "Orthodontist"],
+  hours=[["Monday", ["9 AM–1 PM", "2 PM–6 PM"]], ["Sunday", ["Closed"]]],
+  phones=[["044 123 4567"], ["+380 44 1234567"]],
+)
+places = parse_search_response(body(full, entry(place_id="ChIJ2")), scraped_at="2026-01-01T00:00:00.000Z")
+# Entries without a name are dropped, like the userscript's filter
+assert len(places) == 1
+place = places[0]
+assert place["name"] == "Clinic"
+assert place["placeId"] == "ChIJ1"
+assert place["averageRating"] == 4.5 and place["reviewCount"] == 10
+assert place["website"] == "https://clinic.example/" and place["domain"] == "clinic.example"
+assert place["latitude"] == 50.45 and place["longitude"] == 30.52
+assert place["categories"] == "Dentist, Orthodontist"
+# JS template literals join nested arrays with a bare comma
+assert place["openingHours"] == "Monday:[9 AM–1 PM,2 PM–6 PM], Sunday:[Closed]"
+assert place["phones"] == "044 123 4567, +380 44 1234567"
+assert place["googleMapsURL"] == "https://www.google.com/maps?cid=123"
+assert place["googleKnowledgeURL"] == "https://www.google.com/maps/search/*?kgmid=/g/11x&kponly"
+assert place["scrapedAt"] == "2026-01-01T00:00:00.000Z"
+
+# Missing optional fields become empty strings, plain `)]}'` bodies are accepted
+bare = parse_search_response(body(entry(name="Bare"), wrapped=False))[0]
+assert bare["phones"] == "" and bare["categories"] == "" and bare["googleMapsURL"] == ""
+print("parse_search_response OK")
+
+assert count_results(body(full, entry(place_id="ChIJ2"))) == 2
+
+print("Testing page_url...")
+first = "https://www.google.com/search?tbm=map&pb=!4m12!1m3!1d4!2d30!3d50!7i20!10b1&q=clinic"
+assert page_size(first) == 20 and page_offset(first) == 0
+# The first page leaves the offset out: it goes right after the page size
+second = page_url(first, 20)
+assert second == "https://www.google.com/search?tbm=map&pb=!4m12!1m3!1d4!2d30!3d50!7i20!8i20!10b1&q=clinic"
+assert page_offset(second) == 20
+# An existing offset is replaced, URL-encoded separators included
+assert page_url(second, 40) == second.replace("!8i20", "!8i40")
+encoded = "https://www.google.com/search?tbm=map&pb=%214m12%217i20%218i20%2110b1"
+assert page_url(encoded, 60) == "https://www.google.com/search?tbm=map&pb=%214m12%217i20%218i60%2110b1"
+assert page_offset(encoded) == 20
+# No paging in the request: nothing to replay
+assert page_url("https://www.google.com/search?tbm=map&pb=!4m12!10b1", 20) is None
+print("page_url OK")
+
+print("All parser checks passed!")
@@ -0,0 +1,120 @@
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, ".")
+import shards
+from storage import BufferedCsvWriter, DedupIndex, SqliteWriter, iter_csv_places, iter_csv_rows
+
+print("Testing DedupIndex...")
+with tempfile.TemporaryDirectory() as tmp:
+  path = os.path.join(tmp, "output.csv")
+  writer = BufferedCsvWriter(path, dedup=DedupIndex(path), flush_size=1000, flush_interval=3600)
+  writer.open()
+  writer.enqueue([{"placeId": "A", "name": "Clinic", "phones": "044"}, {"placeId": "B", "name": "Dentist"}])
+  writer.flush()
+  # The sidecar covers the CSV after every flush, not only on close
+  with open(f"{path}.keys.meta", encoding="utf-8") as f:
+    assert json.loads(f.read())["csv_size"] == os.path.getsize(path)
+  writer.close()
+
+  # Reloaded from the sidecar: known places are duplicates, a record adding fields is kept
+  writer = BufferedCsvWriter(path, dedup=DedupIndex(path), flush_size=1000, flush_interval=3600)
+  writer.open()
+  assert len(writer.dedup) == 2
+  assert writer.enqueue([{"placeId": "A", "name": "Clinic"}, {"placeId": "C", "name": "New"}]) == 1
+  assert writer.enqueue([{"placeId": "A", "name": "Clinic 2", "website": "https://a.example/", "domain": "a.example"}]) == 1
+  writer.close()
+  assert writer.duplicates == 1 and writer.merged == 1
+
+  # Rows appended after the sidecar was written (e.g. by an older server) are indexed on load
+  with open(path, "a", encoding="utf-8") as f:
+    f.write("Late,,,,,,,,,D,,,,,,,,,,\n")
+  index = DedupIndex(path)
+  index.load()
+  assert len(index) == 4
+  index.close()
+  # Keys are not remembered twice in the sidecar
+  with open(f"{path}.keys", encoding="utf-8") as f:
+    assert len(f.read().splitlines()) == 5
+
+  # Readers get one record per place: the first non-empty value of every field wins
+  assert len(list(iter_csv_rows(path))) == 5
+  places = {place["placeId"]: place for place in iter_csv_places([path])}
+  assert sorted(places) == ["A", "B", "C", "D"]
+  assert places["A"]["name"] == "Clinic" and places["A"]["phones"] == "044" and places["A"]["website"] == "https://a.example/"
+print("DedupIndex OK")
+
+print("Testing failed writes...")
+with tempfile.TemporaryDirectory() as tmp:
+  path = os.path.join(tmp, "output.csv")
+  writer = BufferedCsvWriter(path, dedup=DedupIndex(path), flush_size=1000, flush_interval=3600)
+  writer.open()
+  writer.enqueue([{"placeId": "A", "name": "Clinic"}])
+  write = writer._write
+
+  def disk_full(rows, fsync):
+    raise OSError("No space left on device")
+
+  writer._write = disk_full
+  try:
+    writer.flush()
+  except OSError:
+    pass
+  else:
+    raise AssertionError("flush() hid the write error")
+  # The batch is kept (its key is already in the dedup index) and written by the next flush
+  assert writer.pending == 1 and writer.write_errors == 1
+  writer._write = write
+  assert writer.flush() == 1
+  writer.close()
+  assert [row["placeId"] for row in iter_csv_rows(path)] == ["A"]
+print("Failed writes OK")
+
+print("Testing SqliteWriter query stats...")
+with tempfile.TemporaryDirectory() as tmp:
+  writer = SqliteWriter(os.path.join(tmp, "output.db"), flush_size=1000, flush_interval=3600)
+  writer.open()
+  writer.enqueue([{"placeId": "A", "name": "Clinic", "queryId": "q1"}, {"placeId": "B", "name": "Dentist", "queryId": "q1"}])
+  writer.flush()
+  writer.enqueue([{"placeId": "A", "name": "Clinic", "queryId": "q2"}, {"placeId": "A", "phones": "044", "queryId": "q2"}])
+  writer.flush()
+  snapshot = writer.query_stats_snapshot()
+  assert snapshot == {"q1": {"received": 2, "new": 2, "duplicates": 0}, "q2": {"received": 2, "new": 0, "duplicates": 1}}
+  assert writer.duplicates == 1 and writer.merged == 1
+  # A copy: later writes don't change it
+  writer.enqueue([{"placeId": "C", "name": "New", "queryId": "q2"}])
+  writer.close()
+  assert snapshot["q2"]["new"] == 0 and writer.query_stats["q2"]["new"] == 1
+print("SqliteWriter query stats OK")
+
+print("Testing shard merge...")
+with tempfile.TemporaryDirectory() as tmp:
+  output = os.path.join(tmp, "output.csv")
+  for index, rows in enumerate(
+    [
+      [{"placeId": "A", "name": "Clinic", "phones": "044"}, {"placeId": "B", "name": "Dentist"}],
+      [{"placeId": "A", "name": "Clinic", "website": "https://a.example/"}, {"cid": "7", "name": "No place ID"}],
+    ]
+  ):
+    writer = BufferedCsvWriter(shards.shard_path(output, index))
+    writer.open()
+    writer.enqueue(rows)
+    writer.close()
+  assert shards.merge(output, delete_shards=True) == (4, 3)
+  assert not shards.find_shards(output)
+  merged = {row["placeId"] or row["cid"]: row for row in iter_csv_rows(output)}
+  assert sorted(merged) == ["7", "A", "B"]
+  assert merged["A"]["phones"] == "044" and merged["A"]["website"] == "https://a.example/"
+
+  database = os.path.join(tmp, "output.db")
+  for index, rows in enumerate([[{"placeId": "A", "name": "Clinic"}], [{"placeId": "A", "phones": "044"}, {"placeId": "B", "name": "Dentist"}]]):
+    writer = SqliteWriter(shards.shard_path(database, index))
+    writer.open()
+    writer.enqueue(rows)
+    writer.close()
+  assert shards.merge(database) == (3, 2)
+print("Shard merge OK")
+
+print("All storage checks passed!")